@@ -1,26 +1,41 @@
+import time
+_script_start = time.perf_counter()
+
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import os
-import time
 import importlib
 import sys
+import threading
+import uuid
 
-# Forzar recarga de módulos para desarrollo
-if 'utils.user_manager' in sys.modules:
-    importlib.reload(sys.modules['utils.user_manager'])
-if 'utils.nlp_processor' in sys.modules:
-    importlib.reload(sys.modules['utils.nlp_processor'])
-if 'utils.data_manager' in sys.modules:
-    importlib.reload(sys.modules['utils.data_manager'])
-if 'utils.email_manager' in sys.modules:
-    importlib.reload(sys.modules['utils.email_manager'])
+# Recargar módulos en cada rerun solo en desarrollo (MISTI_DEV_RELOAD=1): rehace
+# las clases y deja desfasados los objetos guardados con st.cache_resource
+if os.getenv("MISTI_DEV_RELOAD"):
+    for _module in ('utils.nlp_processor', 'utils.email_templates', 'utils.email_manager'):
+        if _module in sys.modules:
+            importlib.reload(sys.modules[_module])
 
 from utils.nlp_processor import ExpenseProcessor
 from utils.supabase_manager import SupabaseManager
 from utils.email_manager import EmailManager
+from utils.email_queue import EmailJobQueue, monthly_summary_key
+from utils.email_worker import previous_month
+from utils.timing import RerunTimer
+from utils.transaction_frame import TransactionFrameVersions, build_transaction_frame
+
+# Reporte de tiempos de arranque y de cada rerun (MISTI_TIMINGS=1)
+SHOW_TIMINGS = bool(os.getenv("MISTI_TIMINGS"))
+timer = RerunTimer(_script_start)
+timer.mark("imports")
+
+def report_timings():
+    """Muestra y registra los tiempos de esta ejecución si MISTI_TIMINGS está activo"""
+    if SHOW_TIMINGS:
+        print(timer.summary())
+        st.caption(timer.summary())
 
 # Configuración de la página
 # Version: 1.0.1 - Fixed empty DataFrame handling
@@ -365,17 +380,133 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+def create_fake_db_manager():
+    """
+    SupabaseManager sobre el Supabase en memoria
+    
+    Variables de entorno:
+        MISTI_FAKE_LATENCY: Segundos de latencia por petición (por defecto 0.05)
+        MISTI_FAKE_ERROR_RATE: Probabilidad de error por petición (por defecto 0)
+        MISTI_FAKE_SEED_ROWS: Transacciones del usuario demo/demo (por defecto 500)
+    """
+    import tempfile
+    from utils.fake_supabase import FakeSupabaseClient
+    
+    client = FakeSupabaseClient(
+        latency=float(os.getenv("MISTI_FAKE_LATENCY", "0.05")),
+        error_rate=float(os.getenv("MISTI_FAKE_ERROR_RATE", "0")),
+        seed=0
+    )
+    
+    # Bandeja, réplica y resúmenes en un directorio temporal: los datos en memoria no sobreviven al proceso
+    tmp_dir = tempfile.mkdtemp(prefix="misti-fake-")
+    manager = SupabaseManager(
+        client=client,
+        outbox_path=os.path.join(tmp_dir, "outbox.db"),
+        replica_path=os.path.join(tmp_dir, "replica.db"),
+        stats_path=os.path.join(tmp_dir, "stats.db")
+    )
+    client.seed_user(
+        "demo",
+        password_hash=manager._hash_password("demo"),
+        full_name="Usuario Demo",
+        transactions=int(os.getenv("MISTI_FAKE_SEED_ROWS", "500"))
+    )
+    return manager
+
 # Inicializar procesador y gestor de base de datos SUPABASE
 # AHORA CON PERSISTENCIA EN LA NUBE ☁️
 @st.cache_resource
 def init_components():
     processor = ExpenseProcessor()
-    db_manager = SupabaseManager()  # 🔥 NUEVA BASE DE DATOS EN LA NUBE
-    email_manager = EmailManager()
+    if os.getenv("MISTI_FAKE_SUPABASE"):
+        # Desarrollo sin conexión: Supabase en memoria con latencia y errores simulados
+        db_manager = create_fake_db_manager()
+    else:
+        db_manager = SupabaseManager()  # 🔥 NUEVA BASE DE DATOS EN LA NUBE
+    # Estadísticas de meses cerrados compartidas con el worker de emails
+    email_manager = EmailManager(stats_cache=db_manager.monthly_stats)
     return processor, db_manager, email_manager
 
 processor, db_manager, email_manager = init_components()
 
+# Cola de emails compartida con el worker (ver Procfile)
+@st.cache_resource
+def init_email_queue():
+    return EmailJobQueue(os.getenv("MISTI_EMAIL_QUEUE", "data/email_jobs.db"))
+
+email_queue = init_email_queue()
+
+# Versiones del DataFrame de cada usuario: un alta o una baja crea la versión
+# siguiente parcheando la anterior, sin volver a descargar las transacciones
+@st.cache_resource
+def init_frame_versions():
+    return TransactionFrameVersions(ttl=float(os.getenv("MISTI_FRAME_TTL", "60")))
+
+frame_versions = init_frame_versions()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_user_frame(username: str, epoch: str, version: int) -> pd.DataFrame:
+    """DataFrame tipado de las transacciones del usuario en esa versión"""
+    patch = frame_versions.patch_for(username, version)
+    if patch is not None:
+        return TransactionFrameVersions.apply(load_user_frame(username, epoch, version - 1), patch)
+    return build_transaction_frame(db_manager.get_user_transactions(username, limit=None))
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_user_snapshot(username: str, epoch: str, version: int) -> dict:
+    """
+    Perfil y presupuesto vs gasto del usuario en esa versión de sus datos
+    
+    Usa la misma versión que load_user_frame: un alta, una baja o un acuse
+    cambian lo gastado, y la base se renueva cada MISTI_FRAME_TTL segundos
+    (ahí se ven también los cambios del perfil hechos desde otro lado).
+    """
+    return db_manager.load_dashboard_snapshot(username, with_transactions=False)
+
+def load_dashboard(username: str):
+    """
+    Snapshot (perfil y presupuestos) y DataFrame de la versión actual
+    
+    El snapshot se pide en otro hilo mientras este arma el DataFrame, así
+    la primera carga tarda lo que la más lenta de las dos y no la suma;
+    con ambas en la caché no se hace ninguna petición a Supabase.
+    """
+    version = frame_versions.current(username)
+    snapshot = {}
+    worker = threading.Thread(
+        target=lambda: snapshot.update(load_user_snapshot(username, frame_versions.epoch, version)),
+        name="misti-snapshot"
+    )
+    # El hilo usa st.cache_data: necesita el contexto de este rerun
+    add_script_run_ctx(worker)
+    worker.start()
+    df = load_user_frame(username, frame_versions.epoch, version)
+    worker.join()
+    return snapshot, df
+
+def fresh_frame_loader(username: str):
+    """
+    Carga para calcular meses cerrados que se guardan en la caché de estadísticas
+    
+    get_or_compute lee la versión del mes antes de llamar a la carga; el df
+    de la sesión puede ser de hasta MISTI_FRAME_TTL segundos antes (y no ver
+    lo escrito desde otro proceso), así que se descarga de nuevo, una sola
+    vez por rerun y solo si algún mes falta en la caché.
+    """
+    frames = []
+    
+    def load() -> pd.DataFrame:
+        if not frames:
+            frames.append(build_transaction_frame(
+                db_manager.get_user_transactions(username, limit=None, fresh=True)
+            ))
+        return frames[0].copy()
+    
+    return load
+
+timer.mark("componentes")
+
 # ========== SISTEMA DE LOGIN / REGISTRO ==========
 # Inicializar estado de sesión
 if 'logged_in' not in st.session_state:
@@ -485,6 +616,8 @@ if not st.session_state.logged_in:
             else:
                 st.warning("⚠️ Por favor completa todos los campos requeridos")
     
+    timer.mark("login")
+    report_timings()
     st.stop()  # Detener ejecución hasta que se loguee
 
 # ========== USUARIO LOGUEADO - APLICACIÓN PRINCIPAL ==========
@@ -493,6 +626,28 @@ if not st.session_state.logged_in:
 st.markdown('<div class="main-header">💰 Misti AI Wallet</div>', unsafe_allow_html=True)
 st.markdown('<div class="sub-header">🤖 Tu asistente inteligente de finanzas personales con IA</div>', unsafe_allow_html=True)
 
+# Revisar acuses de las transacciones guardadas en segundo plano. Va antes de
+# cargar el DataFrame: una fila confirmada recibe su id con un parche (sin
+# volver a descargar) y se puede eliminar; si alguna no se pudo entregar se
+# rehace la base en este mismo rerun para mostrarla como fallida
+pending_writes = []
+delivery_failed = False
+for future, descripcion, client_id in st.session_state.get('pending_writes', []):
+    if not future.done():
+        pending_writes.append((future, descripcion, client_id))
+        continue
+    success, message, transaction_id = future.result()
+    if success and transaction_id is not None:
+        frame_versions.record_ack(st.session_state.current_user['username'], client_id, transaction_id)
+        continue
+    delivery_failed = True
+    if not success:
+        st.error(f"Error al guardar \"{descripcion}\" en la nube: {message}. "
+                 "Sigue en este equipo; puedes reintentar desde la barra lateral")
+st.session_state.pending_writes = pending_writes
+if delivery_failed:
+    frame_versions.rebase(st.session_state.current_user['username'])
+
 # Sidebar Dark Mode con Perfil de Usuario Logueado
 with st.sidebar:
     # Mostrar información del usuario logueado
@@ -529,18 +684,32 @@ with st.sidebar:
     # Filtros con estilo dark
     st.markdown("<div style='color: #00d4ff; font-weight: 600; font-size: 0.9rem; margin-bottom: 1rem;'>📅 FILTROS</div>", unsafe_allow_html=True)
     
-    # Cargar datos del usuario actual desde SUPABASE 🔥
-    transactions = db_manager.get_user_transactions(current_user['username'])
-    df = pd.DataFrame(transactions)
-    
-    # Convertir fecha a datetime si hay datos
-    if not df.empty and 'fecha' in df.columns:
-        df['fecha'] = pd.to_datetime(df['fecha'])
+    # Cargar datos del usuario actual desde SUPABASE 🔥 (perfil, presupuestos y
+    # transacciones en paralelo, y desde la caché mientras no cambie la versión)
+    snapshot, df = load_dashboard(current_user['username'])
+    if snapshot.get('user'):
+        st.session_state.current_user = snapshot['user']
+    budgets = snapshot.get('budgets', [])
+    timer.mark("datos")
     
     # Botón de refrescar prominente
     if st.button("🔄 Actualizar Datos", type="primary", use_container_width=True):
+        # Forzar lectura fresca desde Supabase
+        db_manager.cache.invalidate(current_user['username'])
+        frame_versions.rebase(current_user['username'])
         st.rerun()
     
+    sync_status = db_manager.get_sync_status(current_user['username'])
+    if sync_status['pendientes'] > 0:
+        st.caption(f"⏳ {sync_status['pendientes']} transacciones pendientes de sincronizar")
+    if sync_status['fallidas'] > 0:
+        st.error(f"⚠️ {sync_status['fallidas']} transacciones no se pudieron guardar en la nube (siguen guardadas en este equipo)")
+        if st.button("🔁 Reintentar envío", use_container_width=True):
+            db_manager.retry_failed_transactions(current_user['username'])
+            st.rerun()
+    if sync_status['circuito'] == 'open':
+        st.warning("📡 Sin conexión con la nube: tus transacciones se guardan localmente y se enviarán al reconectar")
+    
     if not df.empty:
         # Filtro de fechas
         date_range = st.date_input(
@@ -560,50 +729,33 @@ with st.sidebar:
     st.markdown("### 📧 Notificaciones")
     st.markdown("")
     
-    with st.expander("⚙️ Configurar Email", expanded=False):
-        st.markdown("**Configura tu email de Gmail para recibir resúmenes mensuales**")
-        st.markdown("")
-        
-        gmail_user = st.text_input(
-            "Tu email de Gmail:",
-            value="",
-            placeholder="tu_email@gmail.com",
-            key="gmail_user",
-            help="Email desde donde se enviarán las notificaciones"
-        )
-        
-        gmail_password = st.text_input(
-            "Contraseña de aplicación:",
-            type="password",
-            placeholder="xxxx xxxx xxxx xxxx",
-            key="gmail_password",
-            help="Genera una contraseña de aplicación en: myaccount.google.com/apppasswords"
-        )
-        
-        st.markdown("---")
-        
-        if gmail_user and gmail_password and current_user.get('email'):
-            if st.button("📊 Enviar Resumen del Mes Anterior", type="primary", use_container_width=True):
-                with st.spinner("📤 Enviando resumen..."):
-                    # Calcular estadísticas del mes anterior
-                    stats = email_manager.calculate_monthly_stats(df)
-                    
-                    # Enviar email
-                    result = email_manager.send_monthly_summary(
-                        sender_email=gmail_user,
-                        sender_password=gmail_password,
-                        recipient_email=current_user['email'],
-                        user_data=current_user,
-                        stats=stats
+    with st.expander("📬 Resumen Mensual", expanded=False):
+        if current_user.get('email'):
+            st.markdown(f"**Cada inicio de mes te enviamos el resumen del mes anterior a {current_user['email']}**")
+            st.markdown("")
+            
+            # El envío lo hace el worker de emails (utils.email_worker); aquí solo se encola
+            last_month, last_year = previous_month()
+            job = email_queue.get_job(monthly_summary_key(current_user['username'], last_month, last_year))
+            
+            if job is None:
+                if df.empty:
+                    st.info("💡 Registra transacciones para recibir tu resumen")
+                elif st.button("📊 Enviar Resumen del Mes Anterior", type="primary", use_container_width=True):
+                    stats = email_manager.get_monthly_stats(
+                        current_user['username'], last_month, last_year,
+                        fresh_frame_loader(current_user['username'])
                     )
-                    
-                    if result['success']:
-                        st.success(f"✅ {result['message']}")
-                        st.balloons()
-                    else:
-                        st.error(f"❌ {result['message']}")
+                    email_queue.enqueue_monthly_summary(current_user, stats)
+                    st.success("📬 Resumen en cola: llegará a tu inbox en unos minutos")
+            elif job['status'] == 'sent':
+                st.success(f"✅ Resumen enviado el {job['sent_at']}")
+            elif job['status'] == 'failed':
+                st.error(f"❌ No se pudo enviar el resumen: {job['last_error']}")
+            else:
+                st.info("⏳ Tu resumen está en cola de envío")
         else:
-            st.info("💡 Completa tu email en el perfil y configura Gmail para recibir resúmenes")
+            st.info("💡 Completa tu email en el perfil para recibir resúmenes mensuales")
     
     st.markdown("---")
     
@@ -775,14 +927,18 @@ with tab1:
                     'categoria': result['categoria'],
                     'monto': result['monto'],
                     'descripcion': result['descripcion'],
-                    'fecha': result.get('fecha', datetime.now()).strftime('%Y-%m-%d')
+                    'fecha': result.get('fecha', datetime.now()).strftime('%Y-%m-%d'),
+                    # Identifica la fila en el DataFrame hasta que Supabase le asigne id
+                    'client_id': str(uuid.uuid4())
                 }
                 
-                success, message = db_manager.add_transaction(current_user['username'], transaction_data)
-                
-                if not success:
-                    st.error(f"Error al guardar: {message}")
-                    st.stop()
+                # Se guarda en segundo plano; el acuse se revisa en el próximo rerun
+                future = db_manager.enqueue_transaction(current_user['username'], transaction_data)
+                st.session_state.setdefault('pending_writes', []).append(
+                    (future, result['descripcion'], transaction_data['client_id'])
+                )
+                # El dashboard muestra la fila al instante sin volver a descargar
+                frame_versions.record_add(current_user['username'], transaction_data)
                 
                 st.balloons()
                 
@@ -838,6 +994,8 @@ with tab1:
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Tab 2: Dashboard
+timer.mark("sidebar y nueva transacción")
+
 with tab2:
     if df.empty:
         # Mensaje de bienvenida personalizado
@@ -856,6 +1014,9 @@ with tab2:
             </div>
         """, unsafe_allow_html=True)
     else:
+        # plotly solo se carga cuando hay gráficos que mostrar
+        import plotly.graph_objects as go
+        
         # Aplicar filtros
         filtered_df = df.copy()
         
@@ -936,6 +1097,52 @@ with tab2:
         st.markdown("---")
         st.markdown("")
         
+        # Presupuestos del mes actual (vienen del snapshot del dashboard)
+        budgets_with_limit = [b for b in budgets if b['presupuesto'] > 0]
+        if budgets_with_limit:
+            st.markdown("### 🎯 Presupuestos del Mes")
+            st.markdown("")
+            
+            for budget in budgets_with_limit:
+                progress = min(budget['gastado'] / budget['presupuesto'], 1.0)
+                st.markdown(
+                    f"**{budget['categoria'].title()}** — S/ {budget['gastado']:,.2f} de S/ {budget['presupuesto']:,.2f}"
+                )
+                st.progress(progress)
+            
+            st.markdown("---")
+            st.markdown("")
+        
+        # Meses cerrados: salen de la caché de estadísticas, no de recalcular las filas
+        closed_months = []
+        month_start = pd.Timestamp.now().normalize().replace(day=1)
+        first_month = df['fecha'].min().replace(day=1)
+        while len(closed_months) < 6:
+            month_start -= pd.DateOffset(months=1)
+            if month_start < first_month:
+                break
+            closed_months.append((month_start.month, month_start.year))
+        
+        if closed_months:
+            st.markdown("### 📅 Meses Anteriores")
+            st.markdown("")
+            
+            history = []
+            load_fresh = fresh_frame_loader(current_user['username'])
+            for month, year in closed_months:
+                stats = email_manager.get_monthly_stats(current_user['username'], month, year, load_fresh)
+                history.append({
+                    'Mes': f"{stats['month_name']} {year}",
+                    'Ingresos': f"S/ {stats['total_ingresos']:,.2f}",
+                    'Gastos': f"S/ {stats['total_gastos']:,.2f}",
+                    'Balance': f"S/ {stats['balance']:,.2f}",
+                    'Transacciones': stats['num_transacciones']
+                })
+            st.dataframe(pd.DataFrame(history), use_container_width=True, hide_index=True)
+            
+            st.markdown("---")
+            st.markdown("")
+        
         # Gráficos separados por tipo (gastos e ingresos)
         col1, col2 = st.columns(2)
         
@@ -1147,6 +1354,8 @@ with tab2:
             """, unsafe_allow_html=True)
 
 # Tab 3: Historial
+timer.mark("dashboard")
+
 with tab3:
     st.markdown("### 📋 Historial Completo de Transacciones")
     st.markdown("")
@@ -1198,7 +1407,8 @@ with tab3:
         st.markdown("### 🗑️ Gestionar Transacciones")
         st.markdown("")
         
-        expense_ids = filtered_df.index.tolist()
+        # Las transacciones pendientes aún no tienen id en Supabase
+        expense_ids = filtered_df.index[filtered_df['id'].notna()].tolist()
         if expense_ids:
             col1, col2 = st.columns([4, 1])
             
@@ -1215,8 +1425,10 @@ with tab3:
                 st.write("")
                 if st.button("🗑️ Eliminar", type="secondary", use_container_width=True):
                     # 🔥 ELIMINAR DE SUPABASE
-                    success, message = db_manager.delete_transaction(selected_expense, current_user['username'])
+                    transaction_id = int(filtered_df.loc[selected_expense, 'id'])
+                    success, message = db_manager.delete_transaction(transaction_id, current_user['username'])
                     if success:
+                        frame_versions.record_delete(current_user['username'], transaction_id)
                         st.success(message)
                         st.rerun()
                     else:
@@ -1250,3 +1462,6 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+timer.mark("historial")
+report_timings()
@@ -0,0 +1,74 @@
+"""
+Benchmark del envío masivo de resúmenes mensuales
+Envía contra un servidor SMTP local en proceso (benchmarks.smtp_sink) que
+simula la latencia por mensaje de un proveedor real
+
+Uso:
+    python -m benchmarks.bench_email_dispatch [usuarios] [latencia_ms]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.smtp_sink import SMTPSink
+from utils.email_manager import EmailManager
+
+
+class FrameSource:
+    """Imita DataManager.load_expenses: 6 transacciones del mes pasado por usuario"""
+    
+    def __init__(self, usernames):
+        now = pd.Timestamp.now()
+        last_month = (now - pd.DateOffset(months=1)).strftime('%Y-%m-15')
+        self.loads = 0
+        self._df = pd.DataFrame({
+            'fecha': [last_month] * 6 * len(usernames),
+            'usuario': [username for username in usernames for _ in range(6)],
+            'tipo': (['gasto'] * 5 + ['ingreso']) * len(usernames),
+            'monto': [12.5, 40.0, 8.9, 120.0, 33.3, 2500.0] * len(usernames),
+            'categoria': ['alimentacion', 'transporte', 'salud', 'servicios', 'compras', 'salario'] * len(usernames)
+        })
+    
+    def load_expenses(self, usuario=None) -> pd.DataFrame:
+        self.loads += 1
+        if usuario is not None:
+            return self._df[self._df['usuario'] == usuario].copy()
+        return self._df.copy()
+
+
+def main():
+    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    
+    users = [
+        {'username': f'user{i}', 'full_name': f'Usuario {i}', 'email': f'user{i}@example.com'}
+        for i in range(num_users)
+    ]
+    
+    print(f"📧 {num_users} resúmenes, {latency * 1000:.0f} ms por mensaje en el servidor")
+    print(f"{'configuración':<36}{'segundos':>10}{'emails/s':>10}{'logins':>8}{'lecturas':>10}{'ok':>6}")
+    
+    for name, workers, max_per_second in [
+        ("1 conexión, sin límite", 1, None),
+        ("4 conexiones, sin límite", 4, None),
+        ("8 conexiones, sin límite", 8, None),
+        ("8 conexiones, máx 50/s", 8, 50.0),
+    ]:
+        with SMTPSink(latency=latency, max_messages=100) as sink:
+            manager = EmailManager(sink.host, sink.port, use_tls=False)
+            
+            source = FrameSource([user['username'] for user in users])
+            start = time.perf_counter()
+            results = manager.send_monthly_summaries_to_all_users(
+                'misti@example.com', 'secreto', users, source,
+                workers=workers, max_per_second=max_per_second
+            )
+            elapsed = time.perf_counter() - start
+            
+            ok = sum(r['result']['success'] for r in results)
+            print(f"{name:<36}{elapsed:>10.2f}{num_users / elapsed:>10.1f}{sink.logins:>8}{source.loads:>10}{ok:>6}")
+
+
+if __name__ == "__main__":
+    main()
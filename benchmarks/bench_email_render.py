@@ -0,0 +1,58 @@
+"""
+Benchmark del armado de los emails de resumen mensual
+Mide por email el costo de la plantilla (HTML y texto) y del mensaje MIME
+completo, y lo compara con el tiempo de envío por mensaje de un proveedor SMTP
+
+Uso:
+    python -m benchmarks.bench_email_render [emails] [latencia_smtp_ms]
+"""
+import sys
+import time
+
+from utils.email_manager import EmailManager
+
+
+def sample_inputs(count: int):
+    """Usuarios y estadísticas sintéticas, distintas en cada email"""
+    manager = EmailManager()
+    categorias = ['alimentacion', 'transporte', 'salud', 'servicios', 'compras', 'otros']
+    inputs = []
+    for i in range(count):
+        top = [(cat, 500.0 / (j + 1) + i) for j, cat in enumerate(categorias)]
+        gastos = sum(monto for _, monto in top)
+        stats = manager._build_monthly_stats(3, 2026, gastos, 2500.0 - (i % 3) * 1000, 20 + i % 30, top)
+        inputs.append(({'username': f'user{i}', 'full_name': f'Usuario {i}'}, stats))
+    return manager, inputs
+
+
+def measure(fn, inputs) -> float:
+    """Microsegundos promedio por email"""
+    start = time.perf_counter()
+    for user_data, stats in inputs:
+        fn(user_data, stats)
+    return (time.perf_counter() - start) / len(inputs) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    smtp_latency_us = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) * 1000
+
+    manager, inputs = sample_inputs(count)
+    template = manager.template
+
+    print(f"📧 {count} emails, envío SMTP de referencia: {smtp_latency_us / 1000:.0f} ms por mensaje")
+    print(f"{'paso':<28}{'µs/email':>12}{'% del envío':>14}")
+
+    for name, fn in [
+        ("plantilla HTML", template.render_html),
+        ("plantilla texto", template.render_text),
+        ("mensaje MIME completo", lambda user_data, stats: manager._build_monthly_summary_message(
+            'misti@example.com', f"{user_data['username']}@example.com", user_data, stats
+        )),
+    ]:
+        per_email = measure(fn, inputs)
+        print(f"{name:<28}{per_email:>12.1f}{per_email / smtp_latency_us * 100:>13.2f}%")
+
+
+if __name__ == "__main__":
+    main()
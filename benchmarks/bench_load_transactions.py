@@ -0,0 +1,107 @@
+"""
+Benchmark de DatabaseManager.load_transactions
+Compara la carga columnar contra pd.read_sql_query + pd.to_datetime
+
+Uso:
+    python -m benchmarks.bench_load_transactions [filas]
+"""
+import gc
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from utils.database_manager import DatabaseManager
+
+
+def read_sql_query_load(db_path: str, usuario: str) -> pd.DataFrame:
+    """Carga con el camino anterior: pd.read_sql_query seguido de pd.to_datetime"""
+    conn = sqlite3.connect(db_path)
+    df = pd.read_sql_query(
+        "SELECT * FROM transactions WHERE usuario = ? ORDER BY fecha DESC, timestamp DESC",
+        conn, params=(usuario,)
+    )
+    conn.close()
+    if not df.empty:
+        df['fecha'] = pd.to_datetime(df['fecha'])
+    return df
+
+
+def populate(db_path: str, rows: int, usuario: str):
+    """Llena la base con transacciones sintéticas de un solo usuario"""
+    rng = np.random.default_rng(42)
+    fechas = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, rows), unit='D')
+    fechas = fechas.strftime('%Y-%m-%d')
+    categorias = np.array(['alimentacion', 'transporte', 'salud', 'servicios', 'compras', 'otros'])
+    montos = rng.uniform(1, 500, rows).round(2)
+    cats = categorias[rng.integers(0, len(categorias), rows)]
+    
+    conn = sqlite3.connect(db_path)
+    conn.executemany("""
+        INSERT INTO transactions
+        (fecha, usuario, tipo, monto, categoria, descripcion, texto_original, timestamp)
+        VALUES (?, ?, 'gasto', ?, ?, ?, ?, '2024-01-01 12:00:00')
+    """, (
+        (fechas[i], usuario, float(montos[i]), cats[i],
+         f'Gasto en {cats[i]} #{i}', f'gasté {montos[i]} en {cats[i]}')
+        for i in range(rows)
+    ))
+    conn.commit()
+    conn.close()
+
+
+def measure(func, *args, repeat: int = 3):
+    """
+    Devuelve (segundos, pico de memoria en MB, resultado)
+    
+    El tiempo es el mejor de `repeat` corridas sin tracemalloc, que añade
+    sobrecosto a cada asignación; el pico se mide en una corrida aparte.
+    """
+    elapsed = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = min(elapsed, time.perf_counter() - start)
+        del result
+    
+    gc.collect()
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    usuario = 'bench'
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        db = DatabaseManager(db_path)
+        print(f"📦 Generando {rows:,} transacciones...")
+        populate(db_path, rows, usuario)
+        
+        # Calentar la caché de páginas de SQLite para ambos caminos
+        read_sql_query_load(db_path, usuario)
+        
+        old_time, old_peak, old_df = measure(read_sql_query_load, db_path, usuario)
+        new_time, new_peak, new_df = measure(db.load_transactions, usuario)
+        
+        assert len(old_df) == len(new_df) == rows
+        assert (old_df['fecha'].values == new_df['fecha'].values).all()
+        
+        print(f"{'camino':<24}{'tiempo (s)':>12}{'pico (MB)':>12}")
+        print(f"{'read_sql_query':<24}{old_time:>12.2f}{old_peak:>12.1f}")
+        print(f"{'columnar':<24}{new_time:>12.2f}{new_peak:>12.1f}")
+        print(f"⚡ {old_time / new_time:.2f}x más rápido, {old_peak / new_peak:.2f}x menos memoria pico")
+
+
+if __name__ == "__main__":
+    main()
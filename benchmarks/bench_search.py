@@ -0,0 +1,75 @@
+"""
+Benchmark de DatabaseManager.search_transactions
+Mide términos raros y comunes ("gasto" aparece en casi todas las filas)
+
+Uso:
+    python -m benchmarks.bench_search [filas] [usuarios]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from utils.database_manager import DatabaseManager
+
+# Palabras de descripción: las primeras aparecen mucho más que las últimas
+WORDS = np.array(['gasto', 'cafe', 'almuerzo', 'taxi', 'super', 'farmacia', 'cine',
+                  'luz', 'internet', 'regalo', 'libro', 'veterinario', 'peluqueria'])
+WEIGHTS = np.array([40, 12, 10, 8, 8, 5, 4, 3, 3, 3, 2, 1, 1], dtype=float)
+
+QUERIES = ['gasto', 'cafe', 'ga', 'gasto cafe', 'almuerzo taxi', 'veterinario', 'peluq', 'noexiste']
+
+
+def populate(db_path: str, rows: int, users: int):
+    """Llena la base con transacciones sintéticas repartidas entre varios usuarios"""
+    rng = np.random.default_rng(42)
+    fechas = np.datetime64('2015-01-01') + rng.integers(0, 3650, rows)
+    picks = rng.choice(len(WORDS), size=(rows, 3), p=WEIGHTS / WEIGHTS.sum())
+    montos = rng.uniform(1, 500, rows).round(2)
+    
+    conn = sqlite3.connect(db_path)
+    conn.executemany("""
+        INSERT INTO transactions
+        (fecha, usuario, tipo, monto, categoria, descripcion, texto_original, timestamp)
+        VALUES (?, ?, 'gasto', ?, 'otros', ?, ?, '2024-01-01 12:00:00')
+    """, (
+        (str(fechas[i]), f'user{i % users}', float(montos[i]),
+         ' '.join(WORDS[picks[i]]), f'{" ".join(WORDS[picks[i][:2]])} {montos[i]} soles')
+        for i in range(rows)
+    ))
+    conn.commit()
+    conn.close()
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """Mejor tiempo de `repeat` corridas, en milisegundos"""
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        db = DatabaseManager(db_path)
+        print(f"📦 Generando {rows:,} transacciones de {users} usuarios...")
+        populate(db_path, rows, users)
+        
+        print(f"{'búsqueda':<18}{'resultados':>12}{'tiempo (ms)':>14}")
+        for query in QUERIES:
+            found = len(db.search_transactions('user0', query))
+            elapsed = best_of(lambda: db.search_transactions('user0', query))
+            print(f"{query:<18}{found:>12}{elapsed:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
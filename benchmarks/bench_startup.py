@@ -0,0 +1,84 @@
+"""
+Benchmark del arranque en frío: tiempo de importar cada módulo que usa app.py
+Cada medición corre en un proceso nuevo, sin módulos en caché
+
+Uso:
+    python -m benchmarks.bench_startup [repeticiones]
+"""
+import statistics
+import subprocess
+import sys
+
+# En el orden en que los importa app.py antes de mostrar el login
+MODULES = [
+    'utils.nlp_processor',
+    'utils.supabase_manager',
+    'utils.email_manager',
+    'utils.email_queue',
+    'utils.email_worker',
+    'plotly.graph_objects',
+]
+
+# Módulos que app.py recargaba en cada rerun (ahora solo con MISTI_DEV_RELOAD)
+RELOADED = [
+    'utils.user_manager',
+    'utils.nlp_processor',
+    'utils.data_manager',
+    'utils.email_manager',
+]
+
+RELOAD_SNIPPET = f"""
+import importlib, statistics, time
+modules = [importlib.import_module(name) for name in {RELOADED!r}]
+samples = []
+for _ in range(20):
+    start = time.perf_counter()
+    for module in modules:
+        importlib.reload(module)
+    samples.append((time.perf_counter() - start) * 1000)
+print(statistics.median(samples))
+"""
+
+SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def cold_import_ms(module: str, repeat: int) -> float:
+    """Mediana de milisegundos para importar el módulo en un proceso nuevo"""
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', SNIPPET.format(module=module)],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            return float('nan')
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    
+    print(f"🚀 Importación en frío (mediana de {repeat} procesos)")
+    print(f"{'módulo':<28}{'ms':>10}")
+    for module in MODULES:
+        elapsed = cold_import_ms(module, repeat)
+        label = f"{elapsed:>10.0f}" if elapsed == elapsed else f"{'no instalado':>10}"
+        print(f"{module:<28}{label}")
+    
+    # Todo lo que importa app.py al arrancar, en un solo proceso
+    together = ", ".join(MODULES[:-1])
+    print(f"{'(todos los de utils)':<28}{cold_import_ms(together, repeat):>10.0f}")
+    
+    # Lo que cuesta cada rerun con la recarga de módulos activa
+    result = subprocess.run([sys.executable, '-c', RELOAD_SNIPPET], capture_output=True, text=True)
+    print(f"\n🔁 importlib.reload de {len(RELOADED)} módulos por rerun: {float(result.stdout):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
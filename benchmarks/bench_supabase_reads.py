@@ -0,0 +1,75 @@
+"""
+Benchmark de lecturas de SupabaseManager contra el Supabase en memoria
+Simula varias sesiones concurrentes con latencia de red y compara
+estrategias de lectura por peticiones al backend y tiempo total
+
+Uso:
+    python -m benchmarks.bench_supabase_reads [sesiones] [latencia_ms] [filas]
+"""
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.fake_supabase import FakeSupabaseClient
+from utils.supabase_manager import SupabaseManager
+
+
+def make_manager(latency: float, rows: int, tmp_dir: str, name: str, cache_ttl: float):
+    """Crea un SupabaseManager con datos sembrados en un cliente en memoria"""
+    client = FakeSupabaseClient(latency=latency, seed=0)
+    client.seed_user("demo", transactions=rows)
+    manager = SupabaseManager(
+        cache_ttl=cache_ttl,
+        client=client,
+        outbox_path=f"{tmp_dir}/{name}-outbox.db",
+        replica_path=f"{tmp_dir}/{name}-replica.db",
+        stats_path=f"{tmp_dir}/{name}-stats.db"
+    )
+    return manager, client
+
+
+def run_sessions(manager: SupabaseManager, sessions: int, reads: int, limit):
+    """Cada sesión hace varias lecturas seguidas, todas en paralelo"""
+    def session(_):
+        for _ in range(reads):
+            manager.get_user_transactions("demo", limit=limit)
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        list(executor.map(session, range(sessions)))
+    return time.perf_counter() - start
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    rows = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    reads = 5
+    
+    tmp_dir = tempfile.mkdtemp(prefix="misti-bench-")
+    try:
+        print(f"📊 {sessions} sesiones x {reads} lecturas, {latency * 1000:.0f} ms de latencia, {rows:,} filas")
+        print(f"{'estrategia':<34}{'peticiones':>12}{'segundos':>12}")
+        
+        for name, cache_ttl, limit in [
+            ("últimas 100, sin caché", 0.0, 100),
+            ("últimas 100, caché 30 s", 30.0, 100),
+            ("historial completo, sin caché", 0.0, None),
+            ("historial completo, caché 30 s", 30.0, None),
+        ]:
+            manager, client = make_manager(latency, rows, tmp_dir, name.replace(' ', '_'), cache_ttl)
+            # La primera lectura del historial llena la réplica local
+            manager.get_user_transactions("demo", limit=limit)
+            client.request_count = 0
+            
+            elapsed = run_sessions(manager, sessions, reads, limit)
+            print(f"{name:<34}{client.request_count:>12}{elapsed:>12.2f}")
+            manager.outbox.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
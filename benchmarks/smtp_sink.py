@@ -0,0 +1,101 @@
+"""
+Servidor SMTP mínimo en proceso para benchmarks
+Acepta login y mensajes sin entregarlos a nadie
+"""
+import socketserver
+import threading
+import time
+
+
+class SMTPSink:
+    """
+    Servidor SMTP que descarta los mensajes y cuenta lo recibido
+    
+    Sirve cada conexión en su propio hilo. Simula la latencia por mensaje de
+    un proveedor real (latency), el corte tras max_messages por conexión
+    (responde 421 como Gmail) y rechaza destinatarios que contengan
+    'rechazado'.
+    """
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, max_messages: int = 0):
+        """
+        Args:
+            host: Interfaz donde escuchar
+            port: Puerto (0 elige uno libre)
+            latency: Segundos de espera por mensaje recibido
+            max_messages: Mensajes por conexión antes de cortar (0 = sin límite)
+        """
+        self.latency = latency
+        self.max_messages = max_messages
+        self.connections = 0
+        self.logins = 0
+        self.messages = 0
+        self._lock = threading.Lock()
+        
+        sink = self
+        
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                sink._count('connections')
+                self._reply(220, "sink ESMTP")
+                sent = 0
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode('utf-8', 'replace').strip()
+                    verb = command.split(' ', 1)[0].upper()
+                    
+                    if verb in ('EHLO', 'HELO'):
+                        self.wfile.write(b"250-sink\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                    elif verb == 'AUTH':
+                        sink._count('logins')
+                        self._reply(235, "Authentication successful")
+                    elif verb == 'MAIL':
+                        if sink.max_messages and sent >= sink.max_messages:
+                            self._reply(421, "Too many messages, closing connection")
+                            return
+                        self._reply(250, "OK")
+                    elif verb == 'RCPT':
+                        if 'rechazado' in command:
+                            self._reply(550, "No such user")
+                        else:
+                            self._reply(250, "OK")
+                    elif verb == 'DATA':
+                        self._reply(354, "End data with <CR><LF>.<CR><LF>")
+                        while self.rfile.readline() not in (b".\r\n", b""):
+                            pass
+                        if sink.latency:
+                            time.sleep(sink.latency)
+                        sent += 1
+                        sink._count('messages')
+                        self._reply(250, "Queued")
+                    elif verb == 'QUIT':
+                        self._reply(221, "Bye")
+                        return
+                    else:
+                        self._reply(250, "OK")
+            
+            def _reply(self, code: int, text: str):
+                self.wfile.write(f"{code} {text}\r\n".encode())
+        
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+        
+        self._server = Server((host, port), Handler)
+        self.host, self.port = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
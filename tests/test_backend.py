@@ -0,0 +1,47 @@
+"""
+Los tres backends cumplen utils.backend.TransactionBackend
+"""
+from utils.backend import TransactionBackend
+from utils.data_manager import DataManager
+from utils.database_manager import DatabaseManager
+from utils.fake_supabase import FakeSupabaseClient
+from utils.supabase_manager import SupabaseManager
+from utils.user_manager import UserManager
+
+TRANSACTION = {'tipo': 'Gasto', 'categoria': 'comida', 'monto': 12.5, 'descripcion': 'almuerzo', 'fecha': '2026-09-03'}
+
+
+def make_backends(tmp_path):
+    UserManager(str(tmp_path)).register_user('ana', 'Ana', 'ana@example.com', 'secreta')
+    db = DatabaseManager(str(tmp_path / "misti.db"))
+    db.register_user('ana', 'Ana', 'ana@example.com', 'secreta')
+    
+    client = FakeSupabaseClient(latency=0, seed=0)
+    supabase = SupabaseManager(
+        client=client,
+        outbox_path=str(tmp_path / "outbox.db"),
+        replica_path=str(tmp_path / "replica.db"),
+        stats_path=str(tmp_path / "stats.db")
+    )
+    client.seed_user('ana', password_hash=supabase._hash_password('secreta'), full_name='Ana', transactions=0)
+    
+    return [DataManager(str(tmp_path)), db, supabase]
+
+
+def test_backends_implement_protocol(tmp_path):
+    for backend in make_backends(tmp_path):
+        assert isinstance(backend, TransactionBackend)
+        
+        # Un usuario registrado existe aunque todavía no tenga transacciones
+        assert backend.get_user_by_username('ana')['username'] == 'ana'
+        assert backend.get_user_by_username('nadie') is None
+        
+        assert backend.save_transaction('ana', TRANSACTION)[0]
+        if isinstance(backend, SupabaseManager):
+            # Supabase guarda primero en la bandeja de salida: se envía antes de leer
+            backend.outbox.replay()
+        rows = backend.get_user_transactions('ana', limit=None)
+        assert [(row['categoria'], row['monto'], row['fecha']) for row in rows] == [('comida', 12.5, '2026-09-03')]
+        
+        assert backend.remove_transaction(rows[0]['id'], 'ana')[0]
+        assert backend.get_user_transactions('ana', limit=None) == []
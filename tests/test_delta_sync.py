@@ -0,0 +1,37 @@
+"""
+Primera sincronización de la réplica por tramos de id en paralelo
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.delta_sync import DeltaSync
+from utils.fake_supabase import FakeSupabaseClient
+
+
+def test_first_sync_fetches_every_row_in_parallel_spans(tmp_path):
+    client = FakeSupabaseClient(latency=0, seed=0)
+    # Ids intercalados entre usuarios: los tramos de ana tienen huecos
+    client.seed_user('ana', transactions=2300)
+    client.seed_user('beto', transactions=700)
+    client.table('transactions').insert([
+        {'username': 'ana', 'tipo': 'Gasto', 'categoria': 'comida', 'monto': 1.0,
+         'descripcion': 'extra', 'fecha': '2026-09-01'}
+        for _ in range(400)
+    ]).execute()
+    
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        replica = DeltaSync(db_path=str(tmp_path / "replica.db"), page_size=250, executor=executor)
+        result = replica.sync(client, 'ana')
+    
+    server = {row['id'] for row in client.tables['transactions'] if row['username'] == 'ana'}
+    local = {row['id'] for row in replica.get_transactions('ana')}
+    assert result['actualizadas'] == len(server) == 2700
+    assert local == server
+
+
+def test_first_sync_of_small_user_is_one_page(tmp_path):
+    client = FakeSupabaseClient(latency=0, seed=0)
+    client.seed_user('ana', transactions=10)
+    
+    replica = DeltaSync(db_path=str(tmp_path / "replica.db"), page_size=250)
+    assert replica.sync(client, 'ana')['actualizadas'] == 10
+    assert len(replica.get_transactions('ana')) == 10
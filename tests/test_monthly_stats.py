@@ -0,0 +1,70 @@
+"""
+Estadísticas mensuales con las filas tal como las guarda Supabase ('Gasto' / 'Ingreso')
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from utils.database_manager import DatabaseManager
+from utils.email_manager import EmailManager
+from utils.email_worker import load_month_from_supabase
+
+SEPTEMBER = [
+    {'username': 'ana', 'fecha': '2026-09-03', 'tipo': 'Gasto', 'monto': 50.0, 'categoria': 'transporte'},
+    {'username': 'ana', 'fecha': '2026-09-15', 'tipo': 'Ingreso', 'monto': 900.0, 'categoria': 'sueldo'},
+]
+
+
+class FakeSupabase:
+    """Lo mínimo de SupabaseManager que usa el programador del worker"""
+    
+    def get_users_with_email(self):
+        return [{'username': 'ana', 'full_name': 'Ana', 'email': 'ana@example.com'}]
+    
+    def iter_transactions_between(self, desde, hasta):
+        return iter(SEPTEMBER)
+
+
+def test_grouped_stats_with_capitalized_tipo():
+    ledger = pd.DataFrame(SEPTEMBER).rename(columns={'username': 'usuario'})
+    
+    stats = EmailManager().calculate_monthly_stats_for_users(ledger, 9, 2026)['ana']
+    
+    assert stats['total_gastos'] == 50.0
+    assert stats['total_ingresos'] == 900.0
+    assert stats['balance'] == 850.0
+    assert stats['num_transacciones'] == 2
+    assert [c['categoria'] for c in stats['top_categories']] == ['transporte']
+
+
+def test_single_user_stats_with_capitalized_tipo():
+    stats = EmailManager().calculate_monthly_stats(pd.DataFrame(SEPTEMBER), 9, 2026)
+    
+    assert stats['total_gastos'] == 50.0
+    assert stats['total_ingresos'] == 900.0
+
+
+def test_worker_ledger_from_supabase():
+    users, load_ledger = load_month_from_supabase(FakeSupabase())(9, 2026)
+    
+    stats = EmailManager().get_monthly_stats_for_users(
+        [user['username'] for user in users], 9, 2026, load_ledger
+    )['ana']
+    
+    assert stats['total_gastos'] == 50.0
+    assert stats['total_ingresos'] == 900.0
+    assert stats['balance'] == 850.0
+
+
+def test_grouped_stats_match_sqlite_monthly_summary(tmp_path):
+    db = DatabaseManager(str(tmp_path / "misti.db"))
+    for row in SEPTEMBER:
+        db.add_transaction(row['monto'], row['categoria'], row['categoria'], row['categoria'],
+                           datetime.strptime(row['fecha'], '%Y-%m-%d'), row['username'], row['tipo'].lower())
+    manager = EmailManager()
+    
+    from_summary = manager.calculate_monthly_stats_from_summary(db.get_monthly_summary('ana', 2026, 9), 9, 2026)
+    ledger = pd.DataFrame(SEPTEMBER).rename(columns={'username': 'usuario'})
+    
+    assert manager.calculate_monthly_stats_for_users(ledger, 9, 2026)['ana'] == from_summary
+    assert manager.calculate_monthly_stats(pd.DataFrame(SEPTEMBER), 9, 2026) == from_summary
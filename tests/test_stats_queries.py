@@ -0,0 +1,72 @@
+"""
+Consultas SQL de las funciones de Postgres corridas sobre SQLite con tipo en mayúsculas y minúsculas
+"""
+import sqlite3
+
+import pytest
+
+from utils.supabase_manager import USER_STATS_QUERY, BUDGET_VS_ACTUAL_QUERY
+
+TRANSACTIONS = [
+    ('ana', 'Gasto', 'comida', 30.0, '2026-09-02'),
+    ('ana', 'gasto', 'comida', 20.0, '2026-09-10'),
+    ('ana', 'GASTO', 'transporte', 15.0, '2026-09-30'),
+    ('ana', 'Ingreso', 'sueldo', 900.0, '2026-09-01'),
+    ('ana', 'INGRESO', 'extra', 100.0, '2026-09-20'),
+    ('ana', 'gasto', 'comida', 500.0, '2026-10-01'),
+    ('bob', 'Gasto', 'comida', 70.0, '2026-09-05'),
+]
+
+BUDGETS = [
+    ('ana', 'comida', 100.0, 9, 2026),
+    ('ana', 'ocio', 40.0, 9, 2026),
+    ('ana', 'comida', 999.0, 10, 2026),
+]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("""
+        CREATE TABLE transactions (
+            username TEXT, tipo TEXT, categoria TEXT, monto REAL, fecha TEXT
+        )
+    """)
+    conn.execute("CREATE TABLE budgets (username TEXT, categoria TEXT, monto REAL, mes INT, anio INT)")
+    conn.executemany("INSERT INTO transactions VALUES (?, ?, ?, ?, ?)", TRANSACTIONS)
+    conn.executemany("INSERT INTO budgets VALUES (?, ?, ?, ?, ?)", BUDGETS)
+    yield conn
+    conn.close()
+
+
+def test_user_stats_ignores_tipo_case(conn):
+    row = conn.execute(
+        USER_STATS_QUERY.format(username=':p_username'), {'p_username': 'ana'}
+    ).fetchone()
+    
+    assert row == (6, 1000.0, 565.0, 435.0, '2026-10-01')
+
+
+def test_user_stats_without_transactions(conn):
+    row = conn.execute(
+        USER_STATS_QUERY.format(username=':p_username'), {'p_username': 'nadie'}
+    ).fetchone()
+    
+    assert row == (0, 0, 0, 0, None)
+
+
+def test_budget_vs_actual_ignores_tipo_case(conn):
+    query = BUDGET_VS_ACTUAL_QUERY.format(
+        username=':p_username', mes=':p_mes', anio=':p_anio', desde=':desde', hasta=':hasta'
+    )
+    rows = conn.execute(query, {
+        'p_username': 'ana', 'p_mes': 9, 'p_anio': 2026,
+        'desde': '2026-09-01', 'hasta': '2026-10-01'
+    }).fetchall()
+    
+    # comida suma 'Gasto' y 'gasto'; transporte no tiene presupuesto y ocio no tiene gastos
+    assert rows == [
+        ('comida', 100.0, 50.0, 50.0),
+        ('ocio', 40.0, 0, 40.0),
+        ('transporte', 0, 15.0, -15.0),
+    ]
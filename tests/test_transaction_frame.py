@@ -0,0 +1,62 @@
+"""
+Altas pendientes en el DataFrame de la sesión y su acuse con el id de Supabase
+"""
+from utils.fake_supabase import FakeSupabaseClient
+from utils.supabase_manager import SupabaseManager
+from utils.transaction_frame import TransactionFrameVersions, build_transaction_frame
+
+ROW = {'tipo': 'Gasto', 'categoria': 'comida', 'monto': 12.5, 'descripcion': 'almuerzo',
+       'fecha': '2026-09-03', 'client_id': 'c-1'}
+
+
+def frame_at(versions, base, username, version):
+    """Lo que hace load_user_frame en app.py, sin st.cache_data"""
+    patch = versions.patch_for(username, version)
+    if patch is None:
+        return base
+    return TransactionFrameVersions.apply(frame_at(versions, base, username, version - 1), patch)
+
+
+def test_ack_patches_id_without_rebase(tmp_path):
+    client = FakeSupabaseClient(latency=0, seed=0)
+    manager = SupabaseManager(
+        client=client,
+        outbox_path=str(tmp_path / "outbox.db"),
+        replica_path=str(tmp_path / "replica.db"),
+        stats_path=str(tmp_path / "stats.db")
+    )
+    client.seed_user('ana', transactions=3)
+    versions = TransactionFrameVersions(ttl=3600)
+    
+    base_version = versions.current('ana')
+    base = build_transaction_frame(manager.get_user_transactions('ana', limit=None))
+    
+    future = manager.enqueue_transaction('ana', ROW)
+    versions.record_add('ana', ROW)
+    success, _, transaction_id = future.result(timeout=5)
+    assert success and transaction_id is not None
+    
+    version = versions.record_ack('ana', ROW['client_id'], transaction_id)
+    assert versions.patch_for('ana', base_version) is None  # la base sigue siendo la misma
+    
+    df = frame_at(versions, base, 'ana', version)
+    added = df[df['client_id'] == ROW['client_id']].iloc[0]
+    assert len(df) == 4
+    assert added['id'] == transaction_id
+    assert not added['pendiente']
+    assert added['tipo'] == 'gasto'
+
+
+def test_resend_of_saved_row_returns_its_id(tmp_path):
+    client = FakeSupabaseClient(latency=0, seed=0)
+    manager = SupabaseManager(
+        client=client,
+        outbox_path=str(tmp_path / "outbox.db"),
+        replica_path=str(tmp_path / "replica.db"),
+        stats_path=str(tmp_path / "stats.db")
+    )
+    
+    _, _, first = manager._insert_transactions('ana', [ROW])
+    _, _, again = manager._insert_transactions('ana', [ROW])
+    
+    assert first == again == {'c-1': first['c-1']}
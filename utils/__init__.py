@@ -1,7 +1,21 @@
 """
 Paquete de utilidades para Misti AI Wallet
 """
-from .nlp_processor import ExpenseProcessor
-from .data_manager import DataManager
+import importlib
+
+# Las clases se importan al primer uso: importar un submódulo (por ejemplo
+# utils.email_queue) no debe cargar pandas a través de DataManager
+_LAZY_EXPORTS = {
+    'ExpenseProcessor': '.nlp_processor',
+    'DataManager': '.data_manager',
+}
 
 __all__ = ['ExpenseProcessor', 'DataManager']
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
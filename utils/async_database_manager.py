@@ -0,0 +1,113 @@
+"""
+Fachada asíncrona sobre DatabaseManager
+Ejecuta las consultas SQLite en un pool de hilos para poder solaparlas con asyncio
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Dict
+import pandas as pd
+
+from .database_manager import DatabaseManager
+
+
+class AsyncDatabaseManager:
+    """
+    Envoltorio asyncio de DatabaseManager
+    
+    Cada llamada corre en un hilo del pool y usa la conexión SQLite de ese
+    hilo, que se abre en su primera consulta y se reutiliza después, así
+    ninguna conexión se comparte entre hilos ni se abre una por llamada
+    (ver DatabaseManager.use_thread_connections). Con la base en
+    modo WAL varias lecturas avanzan a la vez, de modo que con asyncio.gather
+    la latencia total es la de la consulta más lenta y no la suma de todas.
+    """
+    
+    def __init__(self, db_path: str = "data/misti_wallet.db", max_workers: int = 4,
+                 db_manager: Optional[DatabaseManager] = None):
+        """
+        Inicializa la fachada asíncrona
+        
+        Args:
+            db_path: Ruta al archivo de base de datos
+            max_workers: Máximo de consultas simultáneas
+            db_manager: DatabaseManager existente a reutilizar (opcional)
+        """
+        self.db_manager = db_manager or DatabaseManager(db_path)
+        self.db_manager.use_thread_connections()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="misti-db"
+        )
+    
+    async def _run(self, func, *args, **kwargs):
+        """Ejecuta una función bloqueante en el pool de hilos"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    # ==================== LECTURAS ====================
+    
+    async def load_transactions(self, usuario: Optional[str] = None) -> pd.DataFrame:
+        """Carga transacciones como DataFrame sin bloquear el event loop"""
+        return await self._run(self.db_manager.load_transactions, usuario)
+    
+    async def get_user(self, username: str) -> Optional[Dict]:
+        """Obtiene información de un usuario sin bloquear el event loop"""
+        return await self._run(self.db_manager.get_user, username)
+    
+    async def get_monthly_summary(self, usuario: str, year: int, month: int) -> pd.DataFrame:
+        """Obtiene el resumen pre-agregado de un mes sin bloquear el event loop"""
+        return await self._run(self.db_manager.get_monthly_summary, usuario, year, month)
+    
+    async def search_transactions(self, usuario: str, query: str, limit: int = 20) -> pd.DataFrame:
+        """Busca transacciones por texto sin bloquear el event loop"""
+        return await self._run(self.db_manager.search_transactions, usuario, query, limit)
+    
+    async def load_dashboard(self, usuario: str, year: int, month: int) -> Dict:
+        """
+        Carga en paralelo todo lo que necesita el dashboard
+        
+        Args:
+            usuario: Nombre de usuario
+            year: Año del resumen mensual
+            month: Mes del resumen mensual
+            
+        Returns:
+            Dict con keys: user, transactions, monthly_summary
+        """
+        user, transactions, summary = await asyncio.gather(
+            self.get_user(usuario),
+            self.load_transactions(usuario),
+            self.get_monthly_summary(usuario, year, month)
+        )
+        
+        return {
+            'user': user,
+            'transactions': transactions,
+            'monthly_summary': summary
+        }
+    
+    # ==================== ESCRITURAS ====================
+    
+    async def add_transaction(self, **kwargs) -> bool:
+        """Agrega una transacción sin bloquear el event loop"""
+        return await self._run(self.db_manager.add_transaction, **kwargs)
+    
+    async def delete_transaction(self, transaction_id: int) -> bool:
+        """Elimina una transacción sin bloquear el event loop"""
+        return await self._run(self.db_manager.delete_transaction, transaction_id)
+    
+    # ==================== CICLO DE VIDA ====================
+    
+    def close(self):
+        """Espera a que terminen las consultas pendientes y libera los hilos y sus conexiones"""
+        self._executor.shutdown(wait=True)
+        self.db_manager.close_thread_connections()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        # Cerrar el pool fuera del event loop para no bloquearlo
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.close)
@@ -0,0 +1,56 @@
+"""
+Interfaz común de los backends de datos
+SupabaseManager, DatabaseManager y DataManager la implementan, así la app
+puede trabajar con cualquiera de ellos (o con el Supabase en memoria)
+"""
+from typing import Dict, List, Optional, Protocol, Tuple, runtime_checkable
+
+
+@runtime_checkable
+class TransactionBackend(Protocol):
+    """
+    Operaciones mínimas que la app necesita de un backend
+    
+    Las transacciones se intercambian con las keys de Supabase: id, username,
+    tipo, categoria, monto, descripcion, fecha ('YYYY-MM-DD') y created_at.
+    """
+    
+    def get_user_by_username(self, username: str) -> Optional[Dict]:
+        """Datos del usuario o None si no existe"""
+        ...
+    
+    def get_user_transactions(self, username: str, limit: Optional[int] = 100) -> List[Dict]:
+        """Transacciones del usuario, más recientes primero; limit=None trae todas"""
+        ...
+    
+    def save_transaction(self, username: str, transaction_data: Dict) -> Tuple[bool, str]:
+        """Guarda una transacción (keys: tipo, categoria, monto, descripcion, fecha)"""
+        ...
+    
+    def remove_transaction(self, transaction_id: int, username: str) -> Tuple[bool, str]:
+        """Borra una transacción del usuario"""
+        ...
+
+
+def local_row_to_transaction(row: Dict) -> Dict:
+    """
+    Convierte una fila de los backends locales (SQLite o CSV) al formato común
+    
+    Args:
+        row: Dict con keys: id, fecha, usuario, tipo, monto, categoria,
+             descripcion, texto_original, timestamp
+    """
+    fecha = row['fecha']
+    if hasattr(fecha, 'strftime'):
+        fecha = fecha.strftime('%Y-%m-%d')
+    
+    return {
+        'id': int(row['id']),
+        'username': row['usuario'],
+        'tipo': row['tipo'],
+        'categoria': row['categoria'],
+        'monto': float(row['monto']),
+        'descripcion': row['descripcion'],
+        'fecha': str(fecha)[:10],
+        'created_at': row['timestamp']
+    }
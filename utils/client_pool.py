@@ -0,0 +1,164 @@
+"""
+Pool de clientes de Supabase para sesiones concurrentes
+Cada petición toma un cliente libre y lo devuelve al terminar
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class ClientPool:
+    """
+    Pool acotado de clientes de Supabase
+    
+    Se usa igual que un cliente (pool.table(...)...execute(), pool.rpc(...)):
+    la consulta se arma sin tocar ningún cliente y solo execute() toma uno
+    del pool durante la petición. Los clientes se crean a demanda hasta
+    max_size y se reutilizan del último devuelto al primero, para aprovechar
+    las conexiones keep-alive que siguen abiertas. Si todos están ocupados,
+    la petición espera hasta timeout segundos.
+    """
+    
+    def __init__(self, factory: Callable[[], Any], max_size: int = 8, timeout: float = 10.0):
+        """
+        Args:
+            factory: Función que crea un cliente nuevo
+            max_size: Máximo de clientes (y de peticiones simultáneas)
+            timeout: Segundos máximos esperando un cliente libre
+        """
+        self._factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle: List[Any] = []
+        self._created = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        
+        # Métricas
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._timeouts = 0
+        
+        # Crear el primer cliente ya: si faltan credenciales, falla al iniciar
+        self._idle.append(self._factory())
+        self._created = 1
+    
+    def table(self, name: str) -> '_PooledQuery':
+        """Inicia una consulta sobre una tabla"""
+        return _PooledQuery(self, (('table', (name,), {}),))
+    
+    def rpc(self, name: str, params: Dict) -> '_PooledQuery':
+        """Llama a una función de Postgres"""
+        return _PooledQuery(self, (('rpc', (name, params), {}),))
+    
+    # ==================== CHECKOUT ====================
+    
+    @contextmanager
+    def checkout(self):
+        """Presta un cliente durante el bloque with"""
+        client = self._acquire()
+        try:
+            yield client
+        finally:
+            self._release(client)
+    
+    def _acquire(self):
+        """Toma un cliente libre, crea uno si hay cupo o espera a que se libere"""
+        start = time.perf_counter()
+        waited = False
+        
+        with self._cond:
+            while not self._idle and self._created >= self.max_size:
+                waited = True
+                remaining = self.timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise TimeoutError(f"❌ Sin clientes libres tras {self.timeout:.0f}s en el pool de Supabase")
+                self._cond.wait(remaining)
+            
+            if self._idle:
+                client = self._idle.pop()
+                create = False
+            else:
+                self._created += 1
+                create = True
+            
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                elapsed = time.perf_counter() - start
+                self._waits += 1
+                self._wait_time += elapsed
+                self._max_wait = max(self._max_wait, elapsed)
+        
+        if create:
+            # Crear fuera del lock: puede tardar y no debe frenar al resto
+            try:
+                client = self._factory()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        
+        return client
+    
+    def _release(self, client):
+        """Devuelve un cliente al pool y despierta a quien esté esperando"""
+        with self._cond:
+            self._idle.append(client)
+            self._in_use -= 1
+            self._cond.notify()
+    
+    def stats(self) -> Dict:
+        """
+        Métricas del pool
+        
+        Returns:
+            Dict con keys: max_size, creados, en_uso, libres, checkouts,
+            esperas, espera_total, espera_max, timeouts
+        """
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'creados': self._created,
+                'en_uso': self._in_use,
+                'libres': len(self._idle),
+                'checkouts': self._checkouts,
+                'esperas': self._waits,
+                'espera_total': round(self._wait_time, 4),
+                'espera_max': round(self._max_wait, 4),
+                'timeouts': self._timeouts
+            }
+
+
+class _PooledQuery:
+    """
+    Consulta encadenable que se arma sin cliente
+    
+    Guarda cada paso (.select, .eq, .order, ...) y al llamar execute() los
+    repite sobre un cliente prestado por el pool.
+    """
+    
+    def __init__(self, pool: ClientPool, steps: Tuple):
+        self._pool = pool
+        self._steps = steps
+    
+    def __getattr__(self, name: str):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        
+        def step(*args, **kwargs) -> '_PooledQuery':
+            return _PooledQuery(self._pool, self._steps + ((name, args, kwargs),))
+        return step
+    
+    def execute(self):
+        with self._pool.checkout() as client:
+            target = client
+            for name, args, kwargs in self._steps:
+                target = getattr(target, name)(*args, **kwargs)
+            return target.execute()
@@ -4,7 +4,10 @@ Módulo de gestión de datos para almacenar y recuperar gastos
 import pandas as pd
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+from .backend import local_row_to_transaction
+from .user_manager import UserManager
 
 
 class DataManager:
@@ -21,6 +24,8 @@ class DataManager:
         """
         self.data_dir = data_dir
         self.csv_file = os.path.join(data_dir, "gastos.csv")
+        # Usuarios del mismo data_dir; se abre en la primera consulta de usuario
+        self._users: Optional[UserManager] = None
         
         # Crear directorio si no existe
         if not os.path.exists(data_dir):
@@ -390,3 +395,68 @@ class DataManager:
         except Exception as e:
             print(f"Error al importar: {e}")
             return False
+    
+    # ==================== INTERFAZ DE BACKEND ====================
+    # Implementación de utils.backend.TransactionBackend
+    
+    def get_user_by_username(self, username: str) -> Optional[Dict]:
+        """
+        Obtiene datos de un usuario
+        
+        El CSV no guarda usuarios: se leen con UserManager del mismo data_dir
+        (users.json), así existe cualquier usuario registrado, tenga o no
+        transacciones.
+        """
+        if self._users is None:
+            self._users = UserManager(self.data_dir)
+        return self._users.get_user(username)
+    
+    def get_user_transactions(self, username: str, limit: Optional[int] = 100) -> List[Dict]:
+        """
+        Obtiene transacciones de un usuario en el formato común
+        
+        Args:
+            username: Usuario dueño de las transacciones
+            limit: Máximo de transacciones; None trae todas
+        """
+        df = self.load_expenses(usuario=username)
+        if df.empty:
+            return []
+        
+        df = df.sort_values(['fecha', 'timestamp'], ascending=False)
+        if limit is not None:
+            df = df.head(limit)
+        
+        return [local_row_to_transaction(row) for row in df.to_dict('records')]
+    
+    def save_transaction(self, username: str, transaction_data: Dict) -> Tuple[bool, str]:
+        """
+        Guarda una transacción recibida en el formato común
+        
+        Args:
+            username: Usuario dueño de la transacción
+            transaction_data: Dict con keys: tipo, categoria, monto, descripcion, fecha
+        """
+        try:
+            self.add_expense(
+                monto=transaction_data['monto'],
+                categoria=transaction_data['categoria'],
+                descripcion=transaction_data['descripcion'],
+                texto_original=transaction_data.get('texto_original', transaction_data['descripcion']),
+                fecha=datetime.strptime(str(transaction_data['fecha'])[:10], '%Y-%m-%d'),
+                usuario=username,
+                tipo=transaction_data['tipo'].lower()
+            )
+            return True, "✅ Transacción guardada"
+        except Exception as e:
+            return False, f"❌ Error: {str(e)}"
+    
+    def remove_transaction(self, transaction_id: int, username: str) -> Tuple[bool, str]:
+        """Elimina una transacción verificando que pertenezca al usuario"""
+        expense = self.get_expense_by_id(transaction_id)
+        if expense is None or expense['usuario'] != username:
+            return False, "❌ Transacción no encontrada"
+        
+        if self.delete_expense(transaction_id):
+            return True, "✅ Transacción eliminada"
+        return False, "❌ No se pudo eliminar"
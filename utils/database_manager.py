@@ -2,25 +2,74 @@
 Módulo de gestión de base de datos SQLite para Misti AI Wallet
 Reemplaza el almacenamiento CSV/JSON por SQLite
 """
+import atexit
+import gc
 import sqlite3
+import threading
+import numpy as np
 import pandas as pd
 import os
+import re
+import unicodedata
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 import hashlib
 
+from .backend import local_row_to_transaction
+from .login_tracker import LastLoginTracker
+
+
+# Columnas de transactions en el orden en que las devuelve load_transactions
+TRANSACTION_COLUMNS = [
+    'id', 'fecha', 'usuario', 'tipo', 'monto', 'categoria',
+    'descripcion', 'texto_original', 'timestamp'
+]
+
+# Filas leídas del cursor por lote en load_transactions
+FETCH_BATCH_SIZE = 10000
+
+# Índices de prefijo de transactions_fts (largos en letras)
+SEARCH_PREFIXES = '2 3 4 5 6'
+
+# Coincidencias más recientes que search_transactions ordena por relevancia
+SEARCH_CANDIDATES = 200
+
+
+class _ThreadConnection(sqlite3.Connection):
+    """
+    Conexión que un hilo conserva entre llamadas (ver use_thread_connections)
+    
+    close() solo deshace lo que haya quedado sin confirmar, así los métodos
+    de DatabaseManager siguen llamándolo igual que con una conexión nueva.
+    """
+    
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+    
+    def release(self):
+        """Cierra la conexión de verdad"""
+        super().close()
+
 
 class DatabaseManager:
     """Gestor de base de datos SQLite"""
     
-    def __init__(self, db_path: str = "data/misti_wallet.db"):
+    def __init__(self, db_path: str = "data/misti_wallet.db", last_login_delay: float = 30.0):
         """
         Inicializa el gestor de base de datos
         
         Args:
             db_path: Ruta al archivo de base de datos
+            last_login_delay: Segundos máximos que last_login tarda en guardarse
         """
         self.db_path = db_path
+        # Conexión por hilo; None = una conexión nueva por llamada
+        self._local: Optional[threading.local] = None
+        self._thread_connections: List[_ThreadConnection] = []
+        self._thread_connections_lock = threading.Lock()
+        self.last_login = LastLoginTracker(self._save_last_logins, max_delay=last_login_delay)
+        atexit.register(self.last_login.close)
         
         # Crear directorio si no existe
         db_dir = os.path.dirname(db_path)
@@ -32,13 +81,48 @@ class DatabaseManager:
     
     def _get_connection(self):
         """Obtiene una conexión a la base de datos"""
-        return sqlite3.connect(self.db_path)
+        if self._local is None:
+            return sqlite3.connect(self.db_path)
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # La cierra close_thread_connections desde otro hilo
+            conn = sqlite3.connect(self.db_path, factory=_ThreadConnection, check_same_thread=False)
+            self._local.conn = conn
+            with self._thread_connections_lock:
+                self._thread_connections.append(conn)
+        elif conn.in_transaction:
+            # Una llamada anterior falló antes de confirmar o cerrar
+            conn.rollback()
+        return conn
+    
+    def use_thread_connections(self):
+        """
+        Reutiliza una conexión por hilo en lugar de abrir una en cada llamada
+        
+        Pensado para un pool de hilos fijo (AsyncDatabaseManager): cada hilo
+        abre su conexión la primera vez y la conserva hasta
+        close_thread_connections, sin compartirla con otros hilos.
+        """
+        if self._local is None:
+            self._local = threading.local()
+    
+    def close_thread_connections(self):
+        """Cierra las conexiones por hilo (cuando esos hilos ya no consultan)"""
+        with self._thread_connections_lock:
+            connections, self._thread_connections = self._thread_connections, []
+            self._local = None
+        for conn in connections:
+            conn.release()
     
     def _create_tables(self):
         """Crea las tablas necesarias si no existen"""
         conn = self._get_connection()
         cursor = conn.cursor()
         
+        # WAL permite lecturas concurrentes mientras otra conexión escribe
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         # Tabla de usuarios
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -68,9 +152,170 @@ class DatabaseManager:
             )
         """)
         
+        # Índice para las consultas por usuario y fecha (cubre el ORDER BY de load_transactions)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_transactions_usuario_fecha
+            ON transactions(usuario, fecha, timestamp)
+        """)
+        
+        self._create_monthly_summary(cursor)
+        self._create_search_index(cursor)
+        
         conn.commit()
         conn.close()
     
+    def _create_monthly_summary(self, cursor):
+        """
+        Crea la tabla de resúmenes mensuales y los triggers que la mantienen
+        
+        La tabla guarda totales por (usuario, año, mes, tipo, categoría) y se
+        actualiza automáticamente con cada INSERT, UPDATE o DELETE en
+        transactions. Si la tabla no existía se llena con el historial actual.
+        """
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'monthly_summary'
+        """)
+        existed = cursor.fetchone() is not None
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS monthly_summary (
+                usuario TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                month INTEGER NOT NULL,
+                tipo TEXT NOT NULL,
+                categoria TEXT NOT NULL,
+                total REAL NOT NULL DEFAULT 0,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (usuario, year, month, tipo, categoria)
+            )
+        """)
+        
+        # Sumar la fila nueva a su mes
+        add_new = """
+            INSERT INTO monthly_summary (usuario, year, month, tipo, categoria, total, count)
+            VALUES (NEW.usuario, CAST(strftime('%Y', NEW.fecha) AS INTEGER),
+                    CAST(strftime('%m', NEW.fecha) AS INTEGER),
+                    NEW.tipo, NEW.categoria, NEW.monto, 1)
+            ON CONFLICT (usuario, year, month, tipo, categoria) DO UPDATE SET
+                total = total + excluded.total,
+                count = count + 1;
+        """
+        
+        # Restar la fila anterior de su mes y limpiar grupos vacíos
+        remove_old = """
+            UPDATE monthly_summary
+            SET total = total - OLD.monto, count = count - 1
+            WHERE usuario = OLD.usuario
+              AND year = CAST(strftime('%Y', OLD.fecha) AS INTEGER)
+              AND month = CAST(strftime('%m', OLD.fecha) AS INTEGER)
+              AND tipo = OLD.tipo
+              AND categoria = OLD.categoria;
+            DELETE FROM monthly_summary WHERE count <= 0;
+        """
+        
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_summary_insert
+            AFTER INSERT ON transactions
+            BEGIN
+                {add_new}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_summary_delete
+            AFTER DELETE ON transactions
+            BEGIN
+                {remove_old}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_summary_update
+            AFTER UPDATE OF fecha, usuario, tipo, monto, categoria ON transactions
+            BEGIN
+                {remove_old}
+                {add_new}
+            END
+        """)
+        
+        if not existed:
+            self._fill_monthly_summary(cursor)
+    
+    def _fill_monthly_summary(self, cursor):
+        """Recalcula monthly_summary completo a partir de transactions"""
+        cursor.execute("DELETE FROM monthly_summary")
+        cursor.execute("""
+            INSERT INTO monthly_summary (usuario, year, month, tipo, categoria, total, count)
+            SELECT usuario,
+                   CAST(strftime('%Y', fecha) AS INTEGER),
+                   CAST(strftime('%m', fecha) AS INTEGER),
+                   tipo, categoria, SUM(monto), COUNT(*)
+            FROM transactions
+            GROUP BY 1, 2, 3, 4, 5
+        """)
+    
+    def _create_search_index(self, cursor):
+        """
+        Crea el índice FTS5 sobre descripcion y texto_original
+        
+        Es una tabla de contenido externo: no duplica el texto, solo guarda el
+        índice y lo lee de transactions. El tokenizador unicode61 con
+        remove_diacritics hace que "cafe" encuentre "café". El usuario también
+        se indexa para que MATCH descarte las filas de otros usuarios. Los
+        índices de prefijo de 2 a 6 letras (SEARCH_PREFIXES) evitan que una
+        búsqueda por prefijo tenga que juntar todas las palabras que empiezan
+        así mientras el usuario escribe.
+        """
+        cursor.execute("""
+            SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'
+        """)
+        row = cursor.fetchone()
+        # Un índice creado con otros prefijos se vuelve a armar
+        if row is not None and f"prefix='{SEARCH_PREFIXES}'" not in row[0]:
+            cursor.execute("DROP TABLE transactions_fts")
+            row = None
+        existed = row is not None
+        
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+                usuario,
+                descripcion,
+                texto_original,
+                content='transactions',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='{SEARCH_PREFIXES}'
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_insert
+            AFTER INSERT ON transactions
+            BEGIN
+                INSERT INTO transactions_fts (rowid, usuario, descripcion, texto_original)
+                VALUES (NEW.id, NEW.usuario, NEW.descripcion, NEW.texto_original);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_delete
+            AFTER DELETE ON transactions
+            BEGIN
+                INSERT INTO transactions_fts (transactions_fts, rowid, usuario, descripcion, texto_original)
+                VALUES ('delete', OLD.id, OLD.usuario, OLD.descripcion, OLD.texto_original);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_update
+            AFTER UPDATE OF usuario, descripcion, texto_original ON transactions
+            BEGIN
+                INSERT INTO transactions_fts (transactions_fts, rowid, usuario, descripcion, texto_original)
+                VALUES ('delete', OLD.id, OLD.usuario, OLD.descripcion, OLD.texto_original);
+                INSERT INTO transactions_fts (rowid, usuario, descripcion, texto_original)
+                VALUES (NEW.id, NEW.usuario, NEW.descripcion, NEW.texto_original);
+            END
+        """)
+        
+        if not existed:
+            cursor.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+    
     # ==================== GESTIÓN DE USUARIOS ====================
     
     def _hash_password(self, password: str) -> str:
@@ -136,13 +381,12 @@ class DatabaseManager:
                 conn.close()
                 return {'success': False, 'message': '❌ Contraseña incorrecta'}
             
-            # Actualizar last_login
-            last_login = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            cursor.execute("UPDATE users SET last_login = ? WHERE username = ?", 
-                          (last_login, username.lower().strip()))
-            conn.commit()
             conn.close()
             
+            # last_login se guarda en el próximo lote, no en este login
+            last_login = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self.last_login.touch(user[0], last_login)
+            
             return {
                 'success': True,
                 'message': f'¡Bienvenido de vuelta, {user[1]}! 🎉',
@@ -177,12 +421,22 @@ class DatabaseManager:
                     'full_name': user[1],
                     'email': user[2],
                     'created_at': user[3],
-                    'last_login': user[4]
+                    'last_login': self.last_login.pending(user[0]) or user[4]
                 }
             return None
         except Exception:
             return None
     
+    def _save_last_logins(self, logins: Dict[str, str]):
+        """Guarda un lote de last_login en una sola transacción"""
+        conn = self._get_connection()
+        conn.executemany(
+            "UPDATE users SET last_login = ? WHERE username = ?",
+            [(when, username) for username, when in logins.items()]
+        )
+        conn.commit()
+        conn.close()
+    
     # ==================== GESTIÓN DE TRANSACCIONES ====================
     
     def add_transaction(self, monto: float, categoria: str, descripcion: str,
@@ -209,30 +463,87 @@ class DatabaseManager:
             return False
     
     def load_transactions(self, usuario: Optional[str] = None) -> pd.DataFrame:
-        """Carga transacciones como DataFrame"""
+        """
+        Carga transacciones como DataFrame
+        
+        En lugar de pasar por pd.read_sql_query, cuenta las filas, reserva un
+        array de NumPy por columna con su tipo final y lo llena lote a lote
+        desde el cursor. La fecha se guarda como días enteros (datetime64[D])
+        al copiar cada lote, así que no hace falta un pd.to_datetime aparte.
+        El DataFrame se construye una sola vez al final, sin copiar los arrays.
+        """
         try:
             conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            where = "WHERE usuario = ?" if usuario else ""
+            params = (usuario,) if usuario else ()
+            
+            # Leer conteo y filas dentro de la misma transacción de lectura
+            cursor.execute("BEGIN")
+            cursor.execute(f"SELECT COUNT(*) FROM transactions {where}", params)
+            total = cursor.fetchone()[0]
+            
+            # Al filtrar por usuario la columna es constante: no se pide a SQLite
+            text_columns = ['tipo', 'categoria', 'descripcion', 'texto_original', 'timestamp']
+            if not usuario:
+                text_columns.insert(0, 'usuario')
+            
+            ids = np.empty(total, dtype=np.int64)
+            days = np.empty(total, dtype='datetime64[D]')
+            montos = np.empty(total, dtype=np.float64)
+            texts = {col: np.empty(total, dtype=object) for col in text_columns}
+            
+            cursor.execute(f"""
+                SELECT id, fecha, monto, {', '.join(text_columns)}
+                FROM transactions {where}
+                ORDER BY fecha DESC, timestamp DESC
+            """, params)
+            
+            # Los arrays de objetos crecen con millones de strings y el
+            # recolector cíclico los recorrería en cada pasada; se pausa
+            # mientras se copian los lotes
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                pos = 0
+                while True:
+                    batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+                    if not batch:
+                        break
+                    end = pos + len(batch)
+                    columns = list(zip(*batch))
+                    ids[pos:end] = columns[0]
+                    days[pos:end] = columns[1]
+                    montos[pos:end] = columns[2]
+                    for i, col in enumerate(text_columns, start=3):
+                        texts[col][pos:end] = columns[i]
+                    pos = end
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
             
             if usuario:
-                query = "SELECT * FROM transactions WHERE usuario = ? ORDER BY fecha DESC, timestamp DESC"
-                df = pd.read_sql_query(query, conn, params=(usuario,))
-            else:
-                query = "SELECT * FROM transactions ORDER BY fecha DESC, timestamp DESC"
-                df = pd.read_sql_query(query, conn)
+                texts['usuario'] = np.full(total, usuario, dtype=object)
             
+            conn.rollback()
             conn.close()
             
-            # Convertir fecha a datetime
-            if not df.empty:
-                df['fecha'] = pd.to_datetime(df['fecha'])
-            
-            return df
+            data = {
+                'id': ids,
+                'fecha': days.astype('datetime64[ns]'),
+                'usuario': texts['usuario'],
+                'tipo': texts['tipo'],
+                'monto': montos,
+                'categoria': texts['categoria'],
+                'descripcion': texts['descripcion'],
+                'texto_original': texts['texto_original'],
+                'timestamp': texts['timestamp']
+            }
+            return pd.DataFrame(data, columns=TRANSACTION_COLUMNS, copy=False)
         except Exception as e:
             print(f"Error al cargar transacciones: {e}")
-            return pd.DataFrame(columns=[
-                'id', 'fecha', 'usuario', 'tipo', 'monto', 'categoria',
-                'descripcion', 'texto_original', 'timestamp'
-            ])
+            return pd.DataFrame(columns=TRANSACTION_COLUMNS)
     
     def delete_transaction(self, transaction_id: int) -> bool:
         """Elimina una transacción por ID"""
@@ -264,6 +575,142 @@ class DatabaseManager:
             print(f"Error al limpiar datos: {e}")
             return False
     
+    def search_transactions(self, usuario: str, query: str, limit: int = 20) -> pd.DataFrame:
+        """
+        Busca transacciones de un usuario por texto
+        
+        Cada palabra de la búsqueda se trata como prefijo ("alm" encuentra
+        "almuerzo") y todas deben aparecer. Mayúsculas y tildes se ignoran.
+        
+        FTS5 devuelve las SEARCH_CANDIDATES coincidencias más recientes (en
+        orden de id, sin calcular nada por fila) y solo esas se ordenan por
+        relevancia. bm25() no sirve para esto: para el factor IDF recorre la
+        lista completa de cada término, que con palabras comunes ("gasto")
+        es casi todo el historial.
+        
+        Args:
+            usuario: Nombre de usuario dueño de las transacciones
+            query: Texto a buscar en descripcion y texto_original
+            limit: Máximo de resultados
+            
+        Returns:
+            DataFrame con las transacciones encontradas, la más relevante primero
+        """
+        # Convertir cada palabra en un término de prefijo entre comillas para
+        # que la sintaxis de FTS5 (AND, NEAR, *, ...) no se interprete
+        words = [word.replace('"', '') for word in query.split()]
+        words = [word for word in words if word]
+        if not words:
+            return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+        terms = ' '.join(f'"{word}"*' for word in words)
+        
+        user = usuario.replace('"', '')
+        match = f'usuario:"{user}" AND {{descripcion texto_original}}: ({terms})'
+        
+        try:
+            conn = self._get_connection()
+            df = pd.read_sql_query("""
+                SELECT t.*
+                FROM (
+                    SELECT rowid
+                    FROM transactions_fts
+                    WHERE transactions_fts MATCH ?
+                    ORDER BY rowid DESC
+                    LIMIT ?
+                ) AS candidates
+                JOIN transactions t ON t.id = candidates.rowid
+                WHERE t.usuario = ?
+            """, conn, params=(match, max(limit, SEARCH_CANDIDATES), usuario))
+            conn.close()
+            
+            if df.empty:
+                return df
+            
+            df['fecha'] = pd.to_datetime(df['fecha'])
+            df['_relevancia'] = self._search_relevance(df, words)
+            return df.sort_values(['_relevancia', 'id'], ascending=False, kind='stable')\
+                .head(limit)\
+                .drop(columns='_relevancia')\
+                .reset_index(drop=True)
+        except Exception as e:
+            print(f"Error al buscar transacciones: {e}")
+            return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+    
+    @staticmethod
+    def _search_relevance(df: pd.DataFrame, words: List[str]) -> pd.Series:
+        """
+        Relevancia estilo BM25 (frecuencia del término y largo del texto)
+        
+        Sin el factor IDF: todas las candidatas contienen todos los términos.
+        Las palabras se normalizan como el tokenizador de FTS5 (minúsculas y
+        sin tildes) y cuentan las que empiezan con cada término.
+        """
+        def tokens(text: str) -> List[str]:
+            text = unicodedata.normalize('NFKD', text.lower())
+            return re.findall(r'\w+', ''.join(c for c in text if not unicodedata.combining(c)))
+        
+        texts = (df['descripcion'].fillna('') + ' ' + df['texto_original'].fillna('')).map(tokens)
+        lengths = texts.map(len)
+        # k1 = 1.2 y b = 0.75, los valores de bm25() en FTS5
+        norm = 1.2 * (0.25 + 0.75 * lengths / max(lengths.mean(), 1))
+        
+        relevance = pd.Series(0.0, index=df.index)
+        for term in {token for word in words for token in tokens(word)}:
+            tf = texts.map(lambda row: sum(token.startswith(term) for token in row))
+            relevance += tf * 2.2 / (tf + norm)
+        return relevance
+    
+    # ==================== RESÚMENES MENSUALES ====================
+    
+    def rebuild_monthly_summary(self) -> bool:
+        """
+        Reconstruye la tabla monthly_summary desde cero
+        
+        Útil después de importar datos con los triggers desactivados o si se
+        sospecha que los totales acumulados se desviaron.
+        
+        Returns:
+            True si se reconstruyó correctamente
+        """
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            self._fill_monthly_summary(cursor)
+            
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"Error al reconstruir resumen mensual: {e}")
+            return False
+    
+    def get_monthly_summary(self, usuario: str, year: int, month: int) -> pd.DataFrame:
+        """
+        Obtiene los totales pre-agregados de un usuario para un mes
+        
+        Args:
+            usuario: Nombre de usuario
+            year: Año a consultar
+            month: Mes a consultar (1-12)
+            
+        Returns:
+            DataFrame con columnas tipo, categoria, total y count
+        """
+        try:
+            conn = self._get_connection()
+            df = pd.read_sql_query("""
+                SELECT tipo, categoria, total, count
+                FROM monthly_summary
+                WHERE usuario = ? AND year = ? AND month = ?
+                ORDER BY total DESC
+            """, conn, params=(usuario, year, month))
+            conn.close()
+            return df
+        except Exception as e:
+            print(f"Error al cargar resumen mensual: {e}")
+            return pd.DataFrame(columns=['tipo', 'categoria', 'total', 'count'])
+    
     def get_transaction_by_id(self, transaction_id: int) -> Optional[Dict]:
         """Obtiene una transacción por ID"""
         try:
@@ -289,10 +736,88 @@ class DatabaseManager:
             return None
         except Exception:
             return None
+    
+    # ==================== INTERFAZ DE BACKEND ====================
+    # Implementación de utils.backend.TransactionBackend
+    
+    def get_user_by_username(self, username: str) -> Optional[Dict]:
+        """Obtiene datos de un usuario"""
+        return self.get_user(username)
+    
+    def get_user_transactions(self, username: str, limit: Optional[int] = 100) -> List[Dict]:
+        """
+        Obtiene transacciones de un usuario en el formato común
+        
+        Args:
+            username: Usuario dueño de las transacciones
+            limit: Máximo de transacciones; None trae todas
+        """
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            # En el cursor y no en la conexión: la conexión puede ser la del hilo (ver use_thread_connections)
+            cursor.row_factory = sqlite3.Row
+            
+            # En SQLite LIMIT -1 significa sin límite
+            cursor.execute("""
+                SELECT id, fecha, usuario, tipo, monto, categoria, descripcion, texto_original, timestamp
+                FROM transactions
+                WHERE usuario = ?
+                ORDER BY fecha DESC, timestamp DESC
+                LIMIT ?
+            """, (username, -1 if limit is None else limit))
+            
+            rows = [local_row_to_transaction(dict(row)) for row in cursor.fetchall()]
+            conn.close()
+            return rows
+        except Exception as e:
+            print(f"Error al obtener transacciones: {e}")
+            return []
+    
+    def save_transaction(self, username: str, transaction_data: Dict) -> Tuple[bool, str]:
+        """
+        Guarda una transacción recibida en el formato común
+        
+        Args:
+            username: Usuario dueño de la transacción
+            transaction_data: Dict con keys: tipo, categoria, monto, descripcion, fecha
+        """
+        saved = self.add_transaction(
+            monto=transaction_data['monto'],
+            categoria=transaction_data['categoria'],
+            descripcion=transaction_data['descripcion'],
+            texto_original=transaction_data.get('texto_original', transaction_data['descripcion']),
+            fecha=datetime.strptime(str(transaction_data['fecha'])[:10], '%Y-%m-%d'),
+            usuario=username,
+            tipo=transaction_data['tipo'].lower()
+        )
+        return (True, "✅ Transacción guardada") if saved else (False, "❌ No se pudo guardar")
+    
+    def remove_transaction(self, transaction_id: int, username: str) -> Tuple[bool, str]:
+        """Elimina una transacción verificando que pertenezca al usuario"""
+        transaction = self.get_transaction_by_id(transaction_id)
+        if not transaction or transaction['usuario'] != username:
+            return False, "❌ Transacción no encontrada"
+        
+        if self.delete_transaction(transaction_id):
+            return True, "✅ Transacción eliminada"
+        return False, "❌ No se pudo eliminar"
 
 
 if __name__ == "__main__":
-    # Test del módulo
-    print("✅ DatabaseManager creado exitosamente")
-    db = DatabaseManager("data/test.db")
-    print("✅ Base de datos inicializada")
+    import sys
+    
+    # Reconstruir resúmenes: python -m utils.database_manager rebuild-summary [db_path]
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild-summary":
+        db_path = sys.argv[2] if len(sys.argv) > 2 else "data/misti_wallet.db"
+        db = DatabaseManager(db_path)
+        if db.rebuild_monthly_summary():
+            print(f"✅ Resumen mensual reconstruido en {db_path}")
+        else:
+            print("❌ No se pudo reconstruir el resumen mensual")
+            sys.exit(1)
+    else:
+        # Test del módulo
+        print("✅ DatabaseManager creado exitosamente")
+        db = DatabaseManager("data/test.db")
+        print("✅ Base de datos inicializada")
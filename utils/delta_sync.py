@@ -0,0 +1,402 @@
+"""
+Réplica local de transacciones sincronizada por deltas con Supabase
+Después de la primera carga solo viaja lo que cambió desde la última sincronización
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+# Margen que se vuelve a pedir antes de la marca de agua: una transacción que
+# confirma tarde puede tener un updated_at un poco anterior a la última leída
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class DeltaSync:
+    """
+    Mantiene una copia local (SQLite) de las transacciones de cada usuario
+    
+    Cada sincronización pide solo las filas con updated_at posterior a la
+    marca de agua del usuario y las borradas desde entonces (tabla
+    transaction_tombstones, ver SQL_SETUP). Si no hay lápidas disponibles,
+    o cada reconcile_every segundos, se comparan los ids locales con los del
+    servidor para detectar borrados.
+    
+    La primera sincronización de un usuario descarga su historial por
+    tramos de id en paralelo (en el executor, si se pasa uno).
+    
+    Las sincronizaciones de un mismo usuario se hacen de a una; las de
+    usuarios distintos corren en paralelo.
+    """
+    
+    def __init__(self, db_path: str = "data/replica.db", page_size: int = 1000,
+                 reconcile_every: float = 3600.0, executor: Optional[Executor] = None):
+        """
+        Inicializa la réplica local
+        
+        Args:
+            db_path: Ruta al archivo SQLite de la réplica
+            page_size: Filas por petición a Supabase
+            reconcile_every: Segundos entre reconciliaciones completas de ids
+            executor: Pool donde pedir en paralelo las páginas de la primera
+                carga (None = de a una)
+        """
+        self.db_path = db_path
+        self.page_size = page_size
+        self.reconcile_every = reconcile_every
+        self._executor = executor
+        # Un candado por usuario; _locks_lock solo protege el diccionario
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self._create_tables()
+    
+    def _get_connection(self):
+        """Obtiene una conexión a la réplica"""
+        return sqlite3.connect(self.db_path)
+    
+    def _create_tables(self):
+        """Crea las tablas de la réplica si no existen"""
+        conn = self._get_connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                fecha TEXT NOT NULL,
+                updated_at TEXT,
+                data TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_replica_username_fecha
+            ON transactions(username, fecha DESC, id DESC)
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                username TEXT PRIMARY KEY,
+                watermark TEXT,
+                tombstone_watermark TEXT,
+                last_reconcile REAL NOT NULL DEFAULT 0
+            )
+        """)
+        conn.commit()
+        conn.close()
+    
+    def _user_lock(self, username: str) -> threading.Lock:
+        """Candado que serializa las operaciones sobre la réplica de un usuario"""
+        with self._locks_lock:
+            return self._locks.setdefault(username, threading.Lock())
+    
+    # ==================== SINCRONIZACIÓN ====================
+    
+    def sync(self, client, username: str, force_reconcile: bool = False) -> Dict:
+        """
+        Trae de Supabase los cambios del usuario desde la última sincronización
+        
+        Args:
+            client: Cliente de Supabase
+            username: Usuario a sincronizar
+            force_reconcile: Comparar todos los ids aunque no toque todavía
+        
+        Returns:
+            Dict con keys: actualizadas, borradas, reconciliado
+        """
+        with self._user_lock(username):
+            state = self._get_state(username)
+            
+            if state['watermark'] is None:
+                updated, watermark = self._pull_all(client, username)
+            else:
+                updated, watermark = self._pull_changes(client, username, state['watermark'])
+            
+            deleted = 0
+            tombstone_watermark = state['tombstone_watermark']
+            tombstones_ok = True
+            if state['watermark'] is not None:
+                try:
+                    deleted, tombstone_watermark = self._pull_tombstones(
+                        client, username, tombstone_watermark
+                    )
+                except Exception as e:
+                    # Sin tabla de lápidas los borrados se detectan reconciliando
+                    print(f"⚠️ No se pudieron leer borrados, se reconciliará: {e}")
+                    tombstones_ok = False
+            elif watermark is not None:
+                # En la primera carga la réplica ya refleja los borrados
+                tombstone_watermark = watermark
+            
+            last_reconcile = state['last_reconcile']
+            reconcile = state['watermark'] is not None and (
+                force_reconcile
+                or not tombstones_ok
+                or time.time() - last_reconcile >= self.reconcile_every
+            )
+            if reconcile:
+                deleted += self._reconcile_ids(client, username)
+                last_reconcile = time.time()
+            elif state['watermark'] is None:
+                last_reconcile = time.time()
+            
+            self._save_state(username, watermark, tombstone_watermark, last_reconcile)
+            
+            return {'actualizadas': updated, 'borradas': deleted, 'reconciliado': reconcile}
+    
+    def _pull_changes(self, client, username: str, watermark: Optional[str]):
+        """
+        Descarga las filas modificadas desde la marca de agua, por páginas
+        
+        Returns:
+            (filas recibidas, nueva marca de agua)
+        """
+        since = self._with_overlap(watermark)
+        received = 0
+        last = None
+        
+        while True:
+            query = client.table('transactions')\
+                .select('*')\
+                .eq('username', username)
+            
+            if last is not None:
+                query = query.or_(
+                    f"updated_at.gt.{last['updated_at']},"
+                    f"and(updated_at.eq.{last['updated_at']},id.gt.{last['id']})"
+                )
+            elif since is not None:
+                query = query.gte('updated_at', since)
+            
+            result = query\
+                .order('updated_at')\
+                .order('id')\
+                .limit(self.page_size)\
+                .execute()
+            
+            page = result.data or []
+            if page:
+                self._upsert_rows(page)
+                received += len(page)
+                last = page[-1]
+                watermark = max(watermark or '', last['updated_at'] or '') or None
+            
+            if len(page) < self.page_size:
+                return received, watermark
+    
+    def _pull_all(self, client, username: str):
+        """
+        Primera carga: descarga el historial completo pidiendo tramos en paralelo
+        
+        La primera página (por id, con el total de filas) basta para un
+        usuario con pocas transacciones. Si hay más, el resto del rango de
+        ids se parte en tramos de unas page_size filas que se piden a la
+        vez. Los tramos no se solapan y el id no cambia, así que un alta o
+        un borrado durante la descarga no corre filas de un tramo a otro;
+        lo que cambie mientras tanto llega en la siguiente sincronización.
+        
+        Returns:
+            (filas recibidas, nueva marca de agua)
+        """
+        result = client.table('transactions')\
+            .select('*', count='exact')\
+            .eq('username', username)\
+            .order('id')\
+            .limit(self.page_size)\
+            .execute()
+        first = result.data or []
+        total = result.count or 0
+        
+        batches = [first]
+        if len(first) == self.page_size and total > len(first):
+            newest = client.table('transactions')\
+                .select('id')\
+                .eq('username', username)\
+                .order('id', desc=True)\
+                .limit(1)\
+                .execute().data
+            low, high = first[-1]['id'] + 1, newest[0]['id'] + 1
+            spans = -(-(total - len(first)) // self.page_size)
+            step = max(1, -(-(high - low) // spans))
+            
+            def fetch_span(start: int) -> List[Dict]:
+                return self._fetch_id_span(client, username, start, min(start + step, high))
+            
+            starts = range(low, high, step)
+            batches.extend(self._executor.map(fetch_span, starts) if self._executor else map(fetch_span, starts))
+        
+        received = 0
+        watermark = None
+        for rows in batches:
+            if rows:
+                self._upsert_rows(rows)
+                received += len(rows)
+                watermark = max(watermark or '', *(row['updated_at'] or '' for row in rows)) or None
+        return received, watermark
+    
+    def _fetch_id_span(self, client, username: str, start: int, end: int) -> List[Dict]:
+        """Filas del usuario con start <= id < end, por páginas de id si hay más de una"""
+        rows = []
+        after = start - 1
+        while True:
+            page = client.table('transactions')\
+                .select('*')\
+                .eq('username', username)\
+                .gt('id', after)\
+                .lt('id', end)\
+                .order('id')\
+                .limit(self.page_size)\
+                .execute().data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+            after = page[-1]['id']
+    
+    def _pull_tombstones(self, client, username: str, watermark: Optional[str]):
+        """
+        Aplica los borrados registrados desde la marca de agua
+        
+        Returns:
+            (filas borradas localmente, nueva marca de agua de lápidas)
+        """
+        query = client.table('transaction_tombstones')\
+            .select('id, deleted_at')\
+            .eq('username', username)
+        
+        since = self._with_overlap(watermark)
+        if since is not None:
+            query = query.gte('deleted_at', since)
+        
+        tombstones = query.order('deleted_at').execute().data or []
+        if not tombstones:
+            return 0, watermark
+        
+        deleted = self._delete_rows(username, [t['id'] for t in tombstones])
+        return deleted, max(watermark or '', tombstones[-1]['deleted_at'])
+    
+    def _reconcile_ids(self, client, username: str) -> int:
+        """Borra de la réplica las filas cuyo id ya no existe en el servidor"""
+        remote: Set[int] = set()
+        start = 0
+        while True:
+            page = client.table('transactions')\
+                .select('id')\
+                .eq('username', username)\
+                .order('id')\
+                .range(start, start + self.page_size - 1)\
+                .execute().data or []
+            remote.update(row['id'] for row in page)
+            if len(page) < self.page_size:
+                break
+            start += self.page_size
+        
+        conn = self._get_connection()
+        local = {row[0] for row in conn.execute(
+            "SELECT id FROM transactions WHERE username = ?", (username,)
+        )}
+        conn.close()
+        
+        return self._delete_rows(username, list(local - remote))
+    
+    @staticmethod
+    def _with_overlap(watermark: Optional[str]) -> Optional[str]:
+        """Retrocede la marca de agua SYNC_OVERLAP para no perder filas rezagadas"""
+        if watermark is None:
+            return None
+        try:
+            return (datetime.fromisoformat(watermark) - SYNC_OVERLAP).isoformat()
+        except ValueError:
+            return watermark
+    
+    # ==================== RÉPLICA LOCAL ====================
+    
+    def _upsert_rows(self, rows: List[Dict]):
+        """Inserta o reemplaza filas en la réplica"""
+        conn = self._get_connection()
+        conn.executemany("""
+            INSERT INTO transactions (id, username, fecha, updated_at, data)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                username = excluded.username,
+                fecha = excluded.fecha,
+                updated_at = excluded.updated_at,
+                data = excluded.data
+        """, [
+            (row['id'], row['username'], row['fecha'], row.get('updated_at'),
+             json.dumps(row, default=str))
+            for row in rows
+        ])
+        conn.commit()
+        conn.close()
+    
+    def _delete_rows(self, username: str, ids: List[int]) -> int:
+        """Borra filas de la réplica; devuelve cuántas existían"""
+        if not ids:
+            return 0
+        conn = self._get_connection()
+        cursor = conn.executemany(
+            "DELETE FROM transactions WHERE id = ? AND username = ?",
+            [(i, username) for i in ids]
+        )
+        deleted = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return deleted
+    
+    def forget(self, username: str, transaction_id: int):
+        """Quita una transacción borrada desde esta app sin esperar a la próxima sincronización"""
+        with self._user_lock(username):
+            self._delete_rows(username, [transaction_id])
+    
+    def get_transactions(self, username: str) -> List[Dict]:
+        """Transacciones de la réplica ordenadas por fecha (más recientes primero)"""
+        conn = self._get_connection()
+        rows = conn.execute("""
+            SELECT data FROM transactions
+            WHERE username = ?
+            ORDER BY fecha DESC, id DESC
+        """, (username,)).fetchall()
+        conn.close()
+        return [json.loads(data) for (data,) in rows]
+    
+    def _get_state(self, username: str) -> Dict:
+        """Marcas de agua y última reconciliación del usuario"""
+        conn = self._get_connection()
+        row = conn.execute("""
+            SELECT watermark, tombstone_watermark, last_reconcile
+            FROM sync_state WHERE username = ?
+        """, (username,)).fetchone()
+        conn.close()
+        
+        if row is None:
+            return {'watermark': None, 'tombstone_watermark': None, 'last_reconcile': 0.0}
+        return {'watermark': row[0], 'tombstone_watermark': row[1], 'last_reconcile': row[2]}
+    
+    def _save_state(self, username: str, watermark: Optional[str],
+                    tombstone_watermark: Optional[str], last_reconcile: float):
+        """Guarda las marcas de agua del usuario"""
+        conn = self._get_connection()
+        conn.execute("""
+            INSERT INTO sync_state (username, watermark, tombstone_watermark, last_reconcile)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(username) DO UPDATE SET
+                watermark = excluded.watermark,
+                tombstone_watermark = excluded.tombstone_watermark,
+                last_reconcile = excluded.last_reconcile
+        """, (username, watermark, tombstone_watermark, last_reconcile))
+        conn.commit()
+        conn.close()
+    
+    def reset(self, username: str):
+        """Descarta la réplica del usuario; la próxima sincronización la rehace completa"""
+        with self._user_lock(username):
+            conn = self._get_connection()
+            conn.execute("DELETE FROM transactions WHERE username = ?", (username,))
+            conn.execute("DELETE FROM sync_state WHERE username = ?", (username,))
+            conn.commit()
+            conn.close()
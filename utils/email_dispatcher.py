@@ -0,0 +1,147 @@
+"""
+Envío concurrente de emails con límite de tasa y reintentos
+Varios hilos, cada uno con su propia conexión SMTP, comparten una cola de mensajes
+"""
+import queue
+import random
+import smtplib
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .rate_limiter import TokenBucket
+from .smtp_session import SMTPSession
+
+
+def is_transient_smtp_error(error: Exception) -> bool:
+    """Indica si vale la pena reintentar: códigos 4xx, cortes y errores de red"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException hereda de OSError; lo que queda son errores de red
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class EmailDispatcher:
+    """
+    Pool acotado de conexiones SMTP para envíos masivos
+    
+    Cada hilo abre una SMTPSession y la reutiliza para todos los mensajes
+    que toma de la cola. Un TokenBucket compartido limita los envíos por
+    segundo entre todos los hilos. Los errores transitorios se reintentan
+    con backoff exponencial y jitter; los permanentes (5xx) se reportan de
+    inmediato. Si el servidor rechaza el login, ningún hilo vuelve a
+    intentarlo: los mensajes restantes fallan sin conectarse, para no
+    arriesgar un bloqueo de la cuenta por intentos repetidos.
+    """
+    
+    def __init__(self,
+                 session_factory: Callable[[], SMTPSession],
+                 workers: int = 4,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 max_retries: int = 3,
+                 base_delay: float = 1.0,
+                 max_delay: float = 30.0):
+        """
+        Args:
+            session_factory: Función que crea una SMTPSession por hilo
+            workers: Conexiones (hilos) simultáneas
+            rate_limiter: Límite de envíos por segundo (None = sin límite)
+            max_retries: Reintentos por mensaje ante errores transitorios
+            base_delay: Espera inicial entre reintentos (segundos)
+            max_delay: Espera máxima entre reintentos (segundos)
+        """
+        self._session_factory = session_factory
+        self.workers = workers
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    def send_all(self,
+                 messages: List[Tuple[str, str, str]],
+                 on_result: Optional[Callable[[int, Dict], None]] = None) -> List[Dict]:
+        """
+        Envía todos los mensajes y espera a que terminen
+        
+        Args:
+            messages: Lista de (remitente, destinatario, mensaje MIME como texto)
+            on_result: Se llama desde el hilo que envió con (índice, resultado)
+                apenas termina cada mensaje
+        
+        Returns:
+            Un resultado por mensaje, en el mismo orden, con keys: success,
+            message, intentos y, si falló, transitorio (y autenticacion si el
+            servidor rechazó el login)
+        """
+        results: List[Optional[Dict]] = [None] * len(messages)
+        pending = queue.Queue()
+        for index, message in enumerate(messages):
+            pending.put((index, message))
+        
+        # Primer rechazo de login; a partir de ahí no se vuelve a conectar
+        auth_failures: List[Dict] = []
+        
+        def worker():
+            with self._session_factory() as session:
+                while True:
+                    try:
+                        index, (from_addr, to_addr, message) = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    if auth_failures:
+                        results[index] = {**auth_failures[0], 'intentos': 0}
+                    else:
+                        results[index] = self._send_with_retry(session, from_addr, to_addr, message)
+                        if results[index].get('autenticacion'):
+                            auth_failures.append(results[index])
+                    if on_result is not None:
+                        on_result(index, results[index])
+        
+        threads = [
+            threading.Thread(target=worker, name=f"misti-email-{i}", daemon=True)
+            for i in range(min(self.workers, len(messages)))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        return results
+    
+    def _send_with_retry(self, session: SMTPSession, from_addr: str, to_addr: str, message: str) -> Dict:
+        """Envía un mensaje respetando el límite de tasa y reintentando fallos transitorios"""
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                session.send(from_addr, to_addr, message)
+                return {
+                    'success': True,
+                    'message': f'Resumen enviado exitosamente a {to_addr}',
+                    'intentos': attempt + 1
+                }
+            except smtplib.SMTPAuthenticationError as e:
+                # Reintentar un login rechazado solo acerca un bloqueo de la cuenta;
+                # para la cola es transitorio: se reenvía cuando se corrijan las credenciales
+                return {
+                    'success': False,
+                    'message': f'Error de autenticación SMTP: {str(e)}',
+                    'intentos': attempt + 1,
+                    'transitorio': True,
+                    'autenticacion': True
+                }
+            except Exception as e:
+                transient = is_transient_smtp_error(e)
+                if attempt == self.max_retries or not transient:
+                    return {
+                        'success': False,
+                        'message': f'Error al enviar email: {str(e)}',
+                        'intentos': attempt + 1,
+                        'transitorio': transient
+                    }
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
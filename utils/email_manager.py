@@ -3,28 +3,58 @@ Sistema de notificaciones por email para Misti AI Wallet
 Envía resúmenes mensuales automáticos a los usuarios
 """
 
-import smtplib
-import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import pandas as pd
 
+from .email_dispatcher import EmailDispatcher
+from .email_templates import MonthlySummaryTemplate
+from .monthly_stats_cache import MonthlyStatsCache
+from .rate_limiter import TokenBucket
+from .smtp_session import SMTPSession
+
+
+# Nombres de meses
+MONTH_NAMES = [
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+    'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
+]
+
+# Emoji de cada categoría en el top de gastos
+CATEGORY_EMOJI = {
+    'alimentacion': '🍽️',
+    'transporte': '🚗',
+    'entretenimiento': '🎮',
+    'salud': '⚕️',
+    'educacion': '📚',
+    'servicios': '💡',
+    'compras': '🛍️',
+    'otros': '📦'
+}
+
 
 class EmailManager:
     """Gestor de notificaciones por email"""
     
-    def __init__(self, smtp_server: str = "smtp.gmail.com", smtp_port: int = 587):
+    def __init__(self, smtp_server: str = "smtp.gmail.com", smtp_port: int = 587, use_tls: bool = True,
+                 stats_cache: Optional[MonthlyStatsCache] = None):
         """
         Inicializa el gestor de emails
         
         Args:
             smtp_server: Servidor SMTP (por defecto Gmail)
             smtp_port: Puerto SMTP (587 para TLS)
+            use_tls: Hacer STARTTLS (desactivar solo con servidores locales de prueba)
+            stats_cache: Caché de meses cerrados (la de SupabaseManager.monthly_stats,
+                que se invalida con cada escritura); None = calcular siempre
         """
         self.smtp_server = smtp_server
         self.smtp_port = smtp_port
+        self.use_tls = use_tls
+        self.stats_cache = stats_cache
+        self.template = MonthlySummaryTemplate()
     
     def _create_monthly_summary_html(self, user_data: Dict, stats: Dict) -> str:
         """
@@ -37,229 +67,50 @@ class EmailManager:
         Returns:
             HTML formateado del email
         """
-        month_name = stats['month_name']
-        year = stats['year']
-        
-        # Colores neón para el email
-        cyan = '#00d4ff'
-        green = '#00ff88'
-        red = '#ff5252'
-        purple = '#7a5af8'
-        
-        balance_color = green if stats['balance'] >= 0 else red
-        balance_icon = '📈' if stats['balance'] >= 0 else '📉'
-        
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
-                body {{
-                    font-family: 'Inter', sans-serif;
-                    background: linear-gradient(135deg, #0a0a0a 0%, #1a1a1a 100%);
-                    color: #e0e0e0;
-                    padding: 20px;
-                    margin: 0;
-                }}
-                .container {{
-                    max-width: 600px;
-                    margin: 0 auto;
-                    background: rgba(20, 20, 20, 0.9);
-                    border-radius: 20px;
-                    border: 1px solid rgba(0, 212, 255, 0.3);
-                    overflow: hidden;
-                    box-shadow: 0 20px 60px rgba(0, 212, 255, 0.2);
-                }}
-                .header {{
-                    background: linear-gradient(135deg, {cyan} 0%, {purple} 100%);
-                    padding: 30px;
-                    text-align: center;
-                    color: white;
-                }}
-                .header h1 {{
-                    margin: 0;
-                    font-size: 2rem;
-                    font-weight: 700;
-                }}
-                .header p {{
-                    margin: 10px 0 0 0;
-                    font-size: 1.1rem;
-                    opacity: 0.9;
-                }}
-                .content {{
-                    padding: 30px;
-                }}
-                .greeting {{
-                    font-size: 1.2rem;
-                    margin-bottom: 20px;
-                    color: {cyan};
-                }}
-                .metrics {{
-                    display: flex;
-                    gap: 15px;
-                    margin: 20px 0;
-                }}
-                .metric-card {{
-                    flex: 1;
-                    padding: 20px;
-                    border-radius: 12px;
-                    text-align: center;
-                    border: 1px solid rgba(255, 255, 255, 0.1);
-                }}
-                .metric-card.green {{
-                    background: rgba(0, 255, 136, 0.1);
-                    border-color: rgba(0, 255, 136, 0.3);
-                }}
-                .metric-card.red {{
-                    background: rgba(255, 82, 82, 0.1);
-                    border-color: rgba(255, 82, 82, 0.3);
-                }}
-                .metric-card.cyan {{
-                    background: rgba(0, 212, 255, 0.1);
-                    border-color: rgba(0, 212, 255, 0.3);
-                }}
-                .metric-card .icon {{
-                    font-size: 2rem;
-                    margin-bottom: 10px;
-                }}
-                .metric-card .label {{
-                    font-size: 0.85rem;
-                    color: #888;
-                    text-transform: uppercase;
-                    letter-spacing: 1px;
-                    font-weight: 600;
-                    margin-bottom: 5px;
-                }}
-                .metric-card .value {{
-                    font-size: 1.8rem;
-                    font-weight: 700;
-                }}
-                .metric-card.green .value {{ color: {green}; }}
-                .metric-card.red .value {{ color: {red}; }}
-                .metric-card.cyan .value {{ color: {balance_color}; }}
-                .categories {{
-                    margin: 30px 0;
-                }}
-                .categories h3 {{
-                    color: {purple};
-                    margin-bottom: 15px;
-                }}
-                .category-item {{
-                    display: flex;
-                    justify-content: space-between;
-                    padding: 12px;
-                    margin: 8px 0;
-                    background: rgba(255, 255, 255, 0.05);
-                    border-radius: 8px;
-                    border-left: 3px solid {cyan};
-                }}
-                .category-name {{
-                    font-weight: 600;
-                }}
-                .category-amount {{
-                    color: {cyan};
-                    font-weight: 700;
-                }}
-                .footer {{
-                    margin-top: 30px;
-                    padding: 20px;
-                    text-align: center;
-                    background: rgba(0, 0, 0, 0.3);
-                    border-top: 1px solid rgba(255, 255, 255, 0.1);
-                    color: #888;
-                    font-size: 0.9rem;
-                }}
-                .cta-button {{
-                    display: inline-block;
-                    margin-top: 20px;
-                    padding: 15px 30px;
-                    background: linear-gradient(135deg, {cyan} 0%, {purple} 100%);
-                    color: white;
-                    text-decoration: none;
-                    border-radius: 10px;
-                    font-weight: 700;
-                    box-shadow: 0 5px 20px rgba(0, 212, 255, 0.4);
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>💰 Misti AI Wallet</h1>
-                    <p>Resumen Mensual - {month_name} {year}</p>
-                </div>
-                
-                <div class="content">
-                    <div class="greeting">
-                        ¡Hola {user_data['full_name']}! 👋
-                    </div>
-                    
-                    <p>Aquí está tu resumen financiero de <strong>{month_name} {year}</strong>:</p>
-                    
-                    <div class="metrics">
-                        <div class="metric-card green">
-                            <div class="icon">💰</div>
-                            <div class="label">Ingresos</div>
-                            <div class="value">S/ {stats['total_ingresos']:,.2f}</div>
-                        </div>
-                        
-                        <div class="metric-card red">
-                            <div class="icon">💸</div>
-                            <div class="label">Gastos</div>
-                            <div class="value">S/ {stats['total_gastos']:,.2f}</div>
-                        </div>
-                    </div>
-                    
-                    <div class="metric-card cyan" style="margin: 20px 0;">
-                        <div class="icon">{balance_icon}</div>
-                        <div class="label">Balance Final</div>
-                        <div class="value">S/ {stats['balance']:,.2f}</div>
-                    </div>
-                    
-                    <div class="categories">
-                        <h3>📊 Top Categorías de Gastos</h3>
-        """
+        return self.template.render_html(user_data, stats)
+    
+    def _build_monthly_summary_message(self,
+                                       sender_email: str,
+                                       recipient_email: str,
+                                       user_data: Dict,
+                                       stats: Dict) -> str:
+        """Arma el mensaje MIME del resumen mensual listo para enviar"""
+        message = MIMEMultipart("alternative")
+        message["Subject"] = f"📊 Resumen de {stats['month_name']} - Misti AI Wallet"
+        message["From"] = sender_email
+        message["To"] = recipient_email
         
-        # Agregar categorías
-        for cat in stats['top_categories'][:5]:
-            html += f"""
-                        <div class="category-item">
-                            <span class="category-name">{cat['emoji']} {cat['categoria'].title()}</span>
-                            <span class="category-amount">S/ {cat['monto']:,.2f}</span>
-                        </div>
-            """
-        
-        html += f"""
-                    </div>
-                    
-                    <p style="margin-top: 30px; color: #b0b0b0; text-align: center;">
-                        📝 Registraste <strong>{stats['num_transacciones']}</strong> transacciones este mes
-                    </p>
-                    
-                    <div style="text-align: center;">
-                        <a href="#" class="cta-button">Ver Detalles Completos →</a>
-                    </div>
-                </div>
-                
-                <div class="footer">
-                    <p>Este es un mensaje automático de Misti AI Wallet</p>
-                    <p>💡 Gestiona tus finanzas de forma inteligente</p>
-                </div>
-            </div>
-        </body>
-        </html>
+        # Texto plano primero: los clientes muestran la última alternativa que soporten
+        text = self.template.render_text(user_data, stats)
+        message.attach(MIMEText(text, "plain"))
+        
+        # Crear HTML
+        html = self._create_monthly_summary_html(user_data, stats)
+        html_part = MIMEText(html, "html")
+        message.attach(html_part)
+        
+        return message.as_string()
+    
+    def open_session(self, sender_email: str, sender_password: str,
+                     max_messages: int = 90) -> SMTPSession:
         """
+        Abre una sesión SMTP reutilizable para enviar varios emails
         
-        return html
+        Args:
+            sender_email: Email del remitente
+            sender_password: Contraseña de aplicación
+            max_messages: Mensajes por conexión antes de reconectar
+        """
+        return SMTPSession(self.smtp_server, self.smtp_port, sender_email, sender_password,
+                           max_messages=max_messages, use_tls=self.use_tls)
     
     def send_monthly_summary(self, 
                             sender_email: str, 
                             sender_password: str,
                             recipient_email: str,
                             user_data: Dict,
-                            stats: Dict) -> Dict:
+                            stats: Dict,
+                            session: Optional[SMTPSession] = None) -> Dict:
         """
         Envía un resumen mensual por email
         
@@ -269,30 +120,20 @@ class EmailManager:
             recipient_email: Email del destinatario
             user_data: Información del usuario
             stats: Estadísticas del mes
+            session: Sesión abierta con open_session (si no, se abre una solo para este email)
             
         Returns:
             Dict con resultado del envío
         """
         try:
-            # Crear mensaje
-            message = MIMEMultipart("alternative")
-            message["Subject"] = f"📊 Resumen de {stats['month_name']} - Misti AI Wallet"
-            message["From"] = sender_email
-            message["To"] = recipient_email
-            
-            # Crear HTML
-            html = self._create_monthly_summary_html(user_data, stats)
-            html_part = MIMEText(html, "html")
-            message.attach(html_part)
+            message = self._build_monthly_summary_message(sender_email, recipient_email, user_data, stats)
             
             # Enviar email
-            context = ssl.create_default_context()
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.ehlo()
-                server.starttls(context=context)
-                server.ehlo()
-                server.login(sender_email, sender_password)
-                server.sendmail(sender_email, recipient_email, message.as_string())
+            if session is not None:
+                session.send(sender_email, recipient_email, message)
+            else:
+                with self.open_session(sender_email, sender_password) as one_off:
+                    one_off.send(sender_email, recipient_email, message)
             
             return {
                 'success': True,
@@ -320,7 +161,137 @@ class EmailManager:
         Returns:
             Dict con estadísticas del mes
         """
-        # Si no se especifica mes, usar el mes anterior
+        month, year = self._resolve_month(month, year)
+        
+        if df.empty:
+            return self._build_monthly_stats(month, year, 0, 0, 0, [])
+        
+        # Filtrar por mes y año
+        df['fecha'] = pd.to_datetime(df['fecha'])
+        month_df = df[(df['fecha'].dt.month == month) & (df['fecha'].dt.year == year)]
+        
+        # Separar gastos e ingresos
+        tipos = self._normalize_tipo(month_df['tipo'])
+        gastos_df = month_df[tipos == 'gasto']
+        ingresos_df = month_df[tipos == 'ingreso']
+        
+        # Calcular totales
+        total_gastos = gastos_df['monto'].sum() if not gastos_df.empty else 0
+        total_ingresos = ingresos_df['monto'].sum() if not ingresos_df.empty else 0
+        
+        cat_summary = gastos_df.groupby('categoria')['monto'].sum() if not gastos_df.empty else None
+        
+        return self._build_monthly_stats(
+            month, year, total_gastos, total_ingresos, len(month_df),
+            cat_summary.sort_values(ascending=False).items() if cat_summary is not None else []
+        )
+    
+    def calculate_monthly_stats_for_users(self,
+                                          df: pd.DataFrame,
+                                          month: Optional[int] = None,
+                                          year: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Calcula las estadísticas mensuales de todos los usuarios de una vez
+        
+        Equivale a llamar calculate_monthly_stats con las transacciones de
+        cada usuario, pero recorre el historial una sola vez: filtra el mes
+        y agrupa por usuario, tipo y categoría. El costo depende del tamaño
+        de los datos, no de usuarios × datos.
+        
+        Args:
+            df: DataFrame con las transacciones de todos los usuarios (columna usuario)
+            month: Mes a analizar (None = mes anterior)
+            year: Año a analizar (None = año actual)
+        
+        Returns:
+            Dict usuario → estadísticas del mes, para cada usuario con
+            transacciones en df (con ceros si no tuvo movimientos ese mes)
+        """
+        month, year = self._resolve_month(month, year)
+        
+        if df.empty:
+            return {}
+        
+        fechas = pd.to_datetime(df['fecha'])
+        month_df = df.loc[(fechas.dt.month == month) & (fechas.dt.year == year),
+                          ['usuario', 'tipo', 'categoria', 'monto']]
+        
+        # Totales por usuario, tipo y categoría: las mismas filas que
+        # DatabaseManager.get_monthly_summary guarda pre-agregadas
+        summary = month_df.groupby(['usuario', 'tipo', 'categoria'], dropna=False)['monto']\
+            .agg(total='sum', count='size')\
+            .reset_index()
+        
+        return self._stats_from_summary(summary, df['usuario'].unique(), month, year)
+    
+    def get_monthly_stats(self,
+                          username: str,
+                          month: int,
+                          year: int,
+                          load: Callable[[], pd.DataFrame]) -> Dict:
+        """
+        Estadísticas de un mes de un usuario, desde la caché si el mes está cerrado
+        
+        Args:
+            username: Usuario
+            month: Mes
+            year: Año
+            load: Función que devuelve las transacciones del usuario (solo se
+                llama si hay que calcular)
+        """
+        def compute():
+            return self.calculate_monthly_stats(load(), month, year)
+        
+        if self.stats_cache is None:
+            return compute()
+        return self.stats_cache.get_or_compute(username, month, year, compute)
+    
+    def get_monthly_stats_for_users(self,
+                                    usernames: List[str],
+                                    month: int,
+                                    year: int,
+                                    load_ledger: Callable[[], pd.DataFrame]) -> Dict[str, Dict]:
+        """
+        Estadísticas de un mes para varios usuarios, desde la caché si el mes está cerrado
+        
+        Si todos los usuarios están en la caché no se cargan transacciones;
+        si falta alguno, se carga el historial una vez, se calculan todos con
+        calculate_monthly_stats_for_users y se guardan los que faltaban.
+        
+        Args:
+            usernames: Usuarios a consultar
+            month: Mes
+            year: Año
+            load_ledger: Función que devuelve las transacciones de todos los usuarios
+        
+        Returns:
+            Dict usuario → estadísticas (con ceros para quien no tuvo movimientos)
+        """
+        cache = self.stats_cache if self.stats_cache is not None and \
+            self.stats_cache.is_closed(month, year) else None
+        
+        cached, versions = cache.get_month(month, year) if cache else ({}, {})
+        missing = [username for username in usernames if username not in cached]
+        
+        computed = self.calculate_monthly_stats_for_users(load_ledger(), month, year) if missing else {}
+        empty = self._build_monthly_stats(month, year, 0, 0, 0, [])
+        fresh = {username: computed.get(username, empty) for username in missing}
+        
+        if cache:
+            cache.put_many(month, year, fresh, versions)
+        
+        return {
+            username: cached[username] if username in cached else fresh[username]
+            for username in usernames
+        }
+    
+    @staticmethod
+    def _normalize_tipo(tipos: pd.Series) -> pd.Series:
+        """Supabase guarda 'Gasto' / 'Ingreso'; los cálculos comparan en minúsculas"""
+        return tipos.astype(str).str.strip().str.lower()
+    
+    def _resolve_month(self, month: Optional[int], year: Optional[int]) -> Tuple[int, int]:
+        """Si no se especifica mes, usa el mes anterior"""
         if month is None or year is None:
             now = datetime.now()
             if now.month == 1:
@@ -329,56 +300,109 @@ class EmailManager:
             else:
                 month = now.month - 1
                 year = now.year
+        return month, year
+    
+    def calculate_monthly_stats_from_summary(self,
+                                             summary_df: pd.DataFrame,
+                                             month: int,
+                                             year: int) -> Dict:
+        """
+        Calcula estadísticas mensuales a partir de totales pre-agregados
         
-        # Nombres de meses
-        month_names = [
-            'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
-            'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
-        ]
+        Equivalente a calculate_monthly_stats pero recibe las filas de
+        DatabaseManager.get_monthly_summary en lugar del historial completo.
+        calculate_monthly_stats_for_users arma esas mismas filas para todos
+        los usuarios y las resuelve con el mismo cálculo (_stats_from_summary).
         
-        # Filtrar por mes y año
-        df['fecha'] = pd.to_datetime(df['fecha'])
-        month_df = df[(df['fecha'].dt.month == month) & (df['fecha'].dt.year == year)]
+        Args:
+            summary_df: DataFrame con columnas tipo, categoria, total y count
+            month: Mes del resumen
+            year: Año del resumen
+            
+        Returns:
+            Dict con estadísticas del mes
+        """
+        return self._stats_from_summary(summary_df.assign(usuario=''), [''], month, year)['']
+    
+    def _stats_from_summary(self,
+                            summary: pd.DataFrame,
+                            usuarios,
+                            month: int,
+                            year: int) -> Dict[str, Dict]:
+        """
+        Estadísticas de varios usuarios a partir de sus filas de resumen
         
-        # Separar gastos e ingresos
-        gastos_df = month_df[month_df['tipo'] == 'gasto']
-        ingresos_df = month_df[month_df['tipo'] == 'ingreso']
+        Todo se calcula con agrupaciones sobre el resumen completo (nunca un
+        filtro por usuario), así el costo no crece con la cantidad de usuarios.
         
-        # Calcular totales
-        total_gastos = gastos_df['monto'].sum() if not gastos_df.empty else 0
-        total_ingresos = ingresos_df['monto'].sum() if not ingresos_df.empty else 0
-        balance = total_ingresos - total_gastos
+        Args:
+            summary: DataFrame con columnas usuario, tipo, categoria, total y count
+            usuarios: Usuarios a incluir (con ceros si no tienen filas)
+            month: Mes del resumen
+            year: Año del resumen
+            
+        Returns:
+            Dict usuario → estadísticas del mes
+        """
+        summary = summary.assign(tipo=self._normalize_tipo(summary['tipo']))
         
-        # Top categorías de gastos
-        category_emoji = {
-            'alimentacion': '🍽️',
-            'transporte': '🚗',
-            'entretenimiento': '🎮',
-            'salud': '⚕️',
-            'educacion': '📚',
-            'servicios': '💡',
-            'compras': '🛍️',
-            'otros': '📦'
+        counts = summary.groupby('usuario')['count'].sum().reindex(usuarios, fill_value=0)
+        totals = summary.groupby(['usuario', 'tipo'])['total'].sum().unstack(fill_value=0)
+        totals = totals.reindex(index=usuarios, columns=['gasto', 'ingreso'], fill_value=0)
+        
+        # Gasto por usuario y categoría, de mayor a menor dentro de cada usuario
+        categories = summary[summary['tipo'] == 'gasto']\
+            .groupby(['usuario', 'categoria'], as_index=False)['total'].sum()\
+            .sort_values(['usuario', 'total'], ascending=[True, False], kind='stable')
+        
+        top_by_user: Dict[str, List[Tuple[str, float]]] = {}
+        for usuario, categoria, total in categories.itertuples(index=False):
+            top_by_user.setdefault(usuario, []).append((categoria, total))
+        
+        return {
+            usuario: self._build_monthly_stats(
+                month, year,
+                totals.at[usuario, 'gasto'],
+                totals.at[usuario, 'ingreso'],
+                int(counts[usuario]),
+                top_by_user.get(usuario, [])
+            )
+            for usuario in usuarios
         }
+    
+    def _build_monthly_stats(self,
+                             month: int,
+                             year: int,
+                             total_gastos: float,
+                             total_ingresos: float,
+                             num_transacciones: int,
+                             top_pairs: Iterable[Tuple[str, float]]) -> Dict:
+        """
+        Arma el diccionario de estadísticas mensuales que usa el email
         
-        top_categories = []
-        if not gastos_df.empty:
-            cat_summary = gastos_df.groupby('categoria')['monto'].sum().sort_values(ascending=False)
-            for cat, monto in cat_summary.items():
-                top_categories.append({
-                    'categoria': cat,
-                    'monto': monto,
-                    'emoji': category_emoji.get(cat, '📦')
-                })
+        Args:
+            top_pairs: (categoria, monto) de gastos, ya ordenados de mayor a menor
+        """
+        balance = total_ingresos - total_gastos
+        
+        # Top categorías de gastos
+        top_categories = [
+            {
+                'categoria': cat,
+                'monto': monto,
+                'emoji': CATEGORY_EMOJI.get(cat, '📦')
+            }
+            for cat, monto in top_pairs
+        ]
         
         return {
             'month': month,
             'year': year,
-            'month_name': month_names[month - 1],
+            'month_name': MONTH_NAMES[month - 1],
             'total_gastos': total_gastos,
             'total_ingresos': total_ingresos,
             'balance': balance,
-            'num_transacciones': len(month_df),
+            'num_transacciones': num_transacciones,
             'top_categories': top_categories
         }
     
@@ -386,47 +410,73 @@ class EmailManager:
                                            sender_email: str,
                                            sender_password: str,
                                            users: List[Dict],
-                                           data_manager) -> List[Dict]:
+                                           data_manager,
+                                           max_messages_per_connection: int = 90,
+                                           workers: int = 4,
+                                           max_per_second: Optional[float] = 5.0,
+                                           max_retries: int = 3) -> List[Dict]:
         """
         Envía resúmenes mensuales a todos los usuarios con email
         
+        Los mensajes se arman primero y luego salen por un pool de workers
+        conexiones SMTP (ver EmailDispatcher): cada conexión hace login una
+        vez, todas comparten el límite de max_per_second envíos por segundo
+        y los errores transitorios se reintentan con backoff.
+        
         Args:
             sender_email: Email del remitente
             sender_password: Contraseña de aplicación
             users: Lista de usuarios
             data_manager: Instancia de DataManager para cargar datos
+            max_messages_per_connection: Mensajes por conexión antes de reconectar
+            workers: Conexiones SMTP simultáneas
+            max_per_second: Límite de envíos por segundo (None = sin límite)
+            max_retries: Reintentos por email ante errores transitorios
             
         Returns:
             Lista con resultados del envío
         """
-        results = []
+        recipients = []
+        messages = []
+        
+        # Un solo recorrido del historial; los meses cerrados salen de la caché
+        ledger = data_manager.load_expenses()
+        with_transactions = set(ledger['usuario']) if 'usuario' in ledger.columns else set()
+        month, year = self._resolve_month(None, None)
+        stats_by_user = self.get_monthly_stats_for_users(
+            [user['username'] for user in users], month, year, lambda: ledger
+        )
         
         for user in users:
             # Solo enviar a usuarios con email registrado
             if user.get('email') and '@' in user['email']:
-                # Cargar transacciones del usuario
-                df = data_manager.load_expenses(usuario=user['username'])
+                stats = stats_by_user[user['username']]
                 
-                if not df.empty:
-                    # Calcular estadísticas
-                    stats = self.calculate_monthly_stats(df)
-                    
-                    # Enviar email
-                    result = self.send_monthly_summary(
-                        sender_email=sender_email,
-                        sender_password=sender_password,
-                        recipient_email=user['email'],
-                        user_data=user,
-                        stats=stats
-                    )
-                    
-                    results.append({
-                        'user': user['username'],
-                        'email': user['email'],
-                        'result': result
-                    })
-        
-        return results
+                # Solo usuarios con transacciones
+                if user['username'] in with_transactions:
+                    recipients.append(user)
+                    messages.append((
+                        sender_email,
+                        user['email'],
+                        self._build_monthly_summary_message(sender_email, user['email'], user, stats)
+                    ))
+        
+        dispatcher = EmailDispatcher(
+            lambda: self.open_session(sender_email, sender_password,
+                                      max_messages=max_messages_per_connection),
+            workers=workers,
+            rate_limiter=TokenBucket(max_per_second, capacity=workers) if max_per_second else None,
+            max_retries=max_retries
+        )
+        
+        return [
+            {
+                'user': user['username'],
+                'email': user['email'],
+                'result': result
+            }
+            for user, result in zip(recipients, dispatcher.send_all(messages))
+        ]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,266 @@
+"""
+Cola durable de emails en SQLite
+El web solo encola; un proceso worker aparte (utils.email_worker) hace el SMTP
+"""
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def monthly_summary_key(username: str, month: int, year: int) -> str:
+    """Clave de idempotencia del resumen mensual: uno por usuario y mes"""
+    return f"resumen_mensual:{year}-{month:02d}:{username}"
+
+
+class EmailJobQueue:
+    """
+    Cola de trabajos de email compartida entre procesos
+    
+    Cada trabajo tiene una clave única (job_key); encolar dos veces la misma
+    clave no hace nada, así nadie recibe dos veces el mismo resumen aunque
+    el programador y el botón del sidebar lo pidan a la vez. El worker toma
+    trabajos con claim(), que los marca como 'sending' con un plazo (lease):
+    si el proceso muere a mitad de camino, al vencer el plazo otro worker
+    los retoma. Los errores transitorios se reintentan con backoff
+    exponencial; los permanentes marcan el trabajo como 'failed'.
+    """
+    
+    def __init__(self,
+                 db_path: str = "data/email_jobs.db",
+                 lease_seconds: float = 300.0,
+                 base_delay: float = 60.0,
+                 max_delay: float = 3600.0,
+                 max_attempts: int = 8):
+        """
+        Args:
+            db_path: Ruta al archivo SQLite de la cola (compartido por web y worker)
+            lease_seconds: Segundos que un trabajo tomado queda reservado
+            base_delay: Espera inicial entre reintentos (segundos)
+            max_delay: Espera máxima entre reintentos (segundos)
+            max_attempts: Intentos antes de marcar el trabajo como fallido
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self._create_tables()
+    
+    def _get_connection(self):
+        """Obtiene una conexión a la base de la cola"""
+        # isolation_level=None: las transacciones se abren a mano con BEGIN IMMEDIATE
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+    
+    def _create_tables(self):
+        """Crea las tablas de la cola si no existen"""
+        conn = self._get_connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS email_jobs (
+                job_key TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                recipient TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at TEXT NOT NULL,
+                sent_at TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_email_jobs_due ON email_jobs(status, next_attempt)")
+        # Periodos ya programados por completo (ver EmailWorker.schedule_monthly_summaries)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS email_schedules (
+                period TEXT PRIMARY KEY,
+                jobs INTEGER NOT NULL,
+                scheduled_at TEXT NOT NULL
+            )
+        """)
+        conn.close()
+    
+    # ==================== ENCOLAR ====================
+    
+    def enqueue(self, job_key: str, username: str, recipient: str, payload: Dict) -> bool:
+        """
+        Agrega un trabajo si su clave no existe
+        
+        Args:
+            job_key: Clave de idempotencia (ver monthly_summary_key)
+            username: Usuario destinatario
+            recipient: Email destino
+            payload: Datos para armar el email (se guardan como JSON)
+        
+        Returns:
+            True si se encoló, False si ya existía un trabajo con esa clave
+        """
+        conn = self._get_connection()
+        cursor = conn.execute("""
+            INSERT OR IGNORE INTO email_jobs (job_key, username, recipient, payload, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (job_key, username, recipient, json.dumps(payload, default=float),
+              datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        conn.close()
+        return cursor.rowcount == 1
+    
+    def enqueue_monthly_summary(self, user: Dict, stats: Dict) -> bool:
+        """
+        Encola el resumen mensual de un usuario (una sola vez por mes)
+        
+        Args:
+            user: Usuario con keys username, full_name y email
+            stats: Estadísticas del mes (ver EmailManager.calculate_monthly_stats)
+        
+        Returns:
+            True si se encoló, False si ese resumen ya estaba en la cola
+        """
+        return self.enqueue(
+            monthly_summary_key(user['username'], stats['month'], stats['year']),
+            user['username'],
+            user['email'],
+            {
+                'user': {
+                    'username': user['username'],
+                    'full_name': user.get('full_name') or user['username'],
+                    'email': user['email']
+                },
+                'stats': stats
+            }
+        )
+    
+    def is_scheduled(self, period: str) -> bool:
+        """Indica si el periodo ya se programó por completo"""
+        conn = self._get_connection()
+        row = conn.execute("SELECT 1 FROM email_schedules WHERE period = ?", (period,)).fetchone()
+        conn.close()
+        return row is not None
+    
+    def mark_scheduled(self, period: str, jobs: int):
+        """Registra que todos los trabajos del periodo ya están en la cola"""
+        conn = self._get_connection()
+        conn.execute("""
+            INSERT OR REPLACE INTO email_schedules (period, jobs, scheduled_at)
+            VALUES (?, ?, ?)
+        """, (period, jobs, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        conn.close()
+    
+    # ==================== CONSUMIR ====================
+    
+    def claim(self, limit: int = 50) -> List[Dict]:
+        """
+        Reserva trabajos listos para enviar
+        
+        Toma los pendientes cuyo reintento ya venció y los 'sending' cuyo
+        plazo expiró (worker caído). Un trabajo cuyo plazo expiró después de
+        max_attempts intentos se marca como fallido en lugar de reservarse:
+        si tira abajo al worker, no lo hace en un bucle infinito. La reserva
+        es atómica entre procesos.
+        
+        Returns:
+            Trabajos con keys: job_key, username, recipient, payload, attempts
+        """
+        now = time.time()
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                UPDATE email_jobs
+                SET status = 'failed', next_attempt = 0,
+                    last_error = 'El worker no terminó el envío tras ' || attempts || ' intentos'
+                WHERE status = 'sending' AND next_attempt <= ? AND attempts >= ?
+            """, (now, self.max_attempts))
+            rows = conn.execute("""
+                SELECT job_key, username, recipient, payload, attempts
+                FROM email_jobs
+                WHERE status IN ('pending', 'sending') AND next_attempt <= ?
+                ORDER BY created_at, job_key
+                LIMIT ?
+            """, (now, limit)).fetchall()
+            
+            # En 'sending', next_attempt es el vencimiento del plazo
+            conn.executemany("""
+                UPDATE email_jobs SET status = 'sending', attempts = attempts + 1, next_attempt = ?
+                WHERE job_key = ?
+            """, [(now + self.lease_seconds, row[0]) for row in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        
+        return [
+            {
+                'job_key': job_key,
+                'username': username,
+                'recipient': recipient,
+                'payload': json.loads(payload),
+                'attempts': attempts + 1
+            }
+            for job_key, username, recipient, payload, attempts in rows
+        ]
+    
+    def mark_sent(self, job_key: str):
+        """Marca un trabajo como enviado"""
+        conn = self._get_connection()
+        conn.execute("""
+            UPDATE email_jobs SET status = 'sent', last_error = NULL, sent_at = ?
+            WHERE job_key = ?
+        """, (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), job_key))
+        conn.close()
+    
+    def mark_failed(self, job_key: str, attempts: int, error: str, transient: bool = True):
+        """
+        Registra un envío fallido
+        
+        Args:
+            job_key: Trabajo que falló
+            attempts: Intentos hechos (incluido este)
+            error: Mensaje de error
+            transient: Si vale la pena reintentar (errores 4xx, cortes de red)
+        """
+        if transient and attempts < self.max_attempts:
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+            status, next_attempt = 'pending', time.time() + delay * random.uniform(0.5, 1.0)
+        else:
+            status, next_attempt = 'failed', 0
+        
+        conn = self._get_connection()
+        conn.execute("""
+            UPDATE email_jobs SET status = ?, next_attempt = ?, last_error = ?
+            WHERE job_key = ?
+        """, (status, next_attempt, error, job_key))
+        conn.close()
+    
+    # ==================== CONSULTAS ====================
+    
+    def get_job(self, job_key: str) -> Optional[Dict]:
+        """Estado de un trabajo (None si no existe)"""
+        conn = self._get_connection()
+        row = conn.execute("""
+            SELECT status, attempts, last_error, created_at, sent_at
+            FROM email_jobs WHERE job_key = ?
+        """, (job_key,)).fetchone()
+        conn.close()
+        
+        if row is None:
+            return None
+        return dict(zip(('status', 'attempts', 'last_error', 'created_at', 'sent_at'), row))
+    
+    def stats(self) -> Dict[str, int]:
+        """Cantidad de trabajos por estado"""
+        conn = self._get_connection()
+        rows = conn.execute("SELECT status, COUNT(*) FROM email_jobs GROUP BY status").fetchall()
+        conn.close()
+        counts = {'pending': 0, 'sending': 0, 'sent': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
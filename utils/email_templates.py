@@ -0,0 +1,326 @@
+"""
+Plantillas del email de resumen mensual
+La parte fija (CSS, fuentes, encabezado y pie) se arma una sola vez al
+importar el módulo; por cada email solo se formatean los datos del usuario
+"""
+from html import escape
+from string import Template
+from typing import Dict
+
+
+# Colores neón para el email
+CYAN = '#00d4ff'
+GREEN = '#00ff88'
+RED = '#ff5252'
+PURPLE = '#7a5af8'
+
+# Cabecera y CSS; lo único que varía es el color del balance
+_HEAD = Template("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <style>
+        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
+        body {
+            font-family: 'Inter', sans-serif;
+            background: linear-gradient(135deg, #0a0a0a 0%, #1a1a1a 100%);
+            color: #e0e0e0;
+            padding: 20px;
+            margin: 0;
+        }
+        .container {
+            max-width: 600px;
+            margin: 0 auto;
+            background: rgba(20, 20, 20, 0.9);
+            border-radius: 20px;
+            border: 1px solid rgba(0, 212, 255, 0.3);
+            overflow: hidden;
+            box-shadow: 0 20px 60px rgba(0, 212, 255, 0.2);
+        }
+        .header {
+            background: linear-gradient(135deg, $cyan 0%, $purple 100%);
+            padding: 30px;
+            text-align: center;
+            color: white;
+        }
+        .header h1 {
+            margin: 0;
+            font-size: 2rem;
+            font-weight: 700;
+        }
+        .header p {
+            margin: 10px 0 0 0;
+            font-size: 1.1rem;
+            opacity: 0.9;
+        }
+        .content {
+            padding: 30px;
+        }
+        .greeting {
+            font-size: 1.2rem;
+            margin-bottom: 20px;
+            color: $cyan;
+        }
+        .metrics {
+            display: flex;
+            gap: 15px;
+            margin: 20px 0;
+        }
+        .metric-card {
+            flex: 1;
+            padding: 20px;
+            border-radius: 12px;
+            text-align: center;
+            border: 1px solid rgba(255, 255, 255, 0.1);
+        }
+        .metric-card.green {
+            background: rgba(0, 255, 136, 0.1);
+            border-color: rgba(0, 255, 136, 0.3);
+        }
+        .metric-card.red {
+            background: rgba(255, 82, 82, 0.1);
+            border-color: rgba(255, 82, 82, 0.3);
+        }
+        .metric-card.cyan {
+            background: rgba(0, 212, 255, 0.1);
+            border-color: rgba(0, 212, 255, 0.3);
+        }
+        .metric-card .icon {
+            font-size: 2rem;
+            margin-bottom: 10px;
+        }
+        .metric-card .label {
+            font-size: 0.85rem;
+            color: #888;
+            text-transform: uppercase;
+            letter-spacing: 1px;
+            font-weight: 600;
+            margin-bottom: 5px;
+        }
+        .metric-card .value {
+            font-size: 1.8rem;
+            font-weight: 700;
+        }
+        .metric-card.green .value { color: $green; }
+        .metric-card.red .value { color: $red; }
+        .metric-card.cyan .value { color: $balance_color; }
+        .categories {
+            margin: 30px 0;
+        }
+        .categories h3 {
+            color: $purple;
+            margin-bottom: 15px;
+        }
+        .category-item {
+            display: flex;
+            justify-content: space-between;
+            padding: 12px;
+            margin: 8px 0;
+            background: rgba(255, 255, 255, 0.05);
+            border-radius: 8px;
+            border-left: 3px solid $cyan;
+        }
+        .category-name {
+            font-weight: 600;
+        }
+        .category-amount {
+            color: $cyan;
+            font-weight: 700;
+        }
+        .footer {
+            margin-top: 30px;
+            padding: 20px;
+            text-align: center;
+            background: rgba(0, 0, 0, 0.3);
+            border-top: 1px solid rgba(255, 255, 255, 0.1);
+            color: #888;
+            font-size: 0.9rem;
+        }
+        .cta-button {
+            display: inline-block;
+            margin-top: 20px;
+            padding: 15px 30px;
+            background: linear-gradient(135deg, $cyan 0%, $purple 100%);
+            color: white;
+            text-decoration: none;
+            border-radius: 10px;
+            font-weight: 700;
+            box-shadow: 0 5px 20px rgba(0, 212, 255, 0.4);
+        }
+    </style>
+</head>
+""")
+
+# Cabecera ya armada para balance positivo (True) y negativo (False)
+_HEADS = {
+    positive: _HEAD.substitute(
+        cyan=CYAN, green=GREEN, red=RED, purple=PURPLE,
+        balance_color=GREEN if positive else RED
+    )
+    for positive in (True, False)
+}
+
+_BODY = """<body>
+    <div class="container">
+        <div class="header">
+            <h1>💰 Misti AI Wallet</h1>
+            <p>Resumen Mensual - {month_name} {year}</p>
+        </div>
+        
+        <div class="content">
+            <div class="greeting">
+                ¡Hola {full_name}! 👋
+            </div>
+            
+            <p>Aquí está tu resumen financiero de <strong>{month_name} {year}</strong>:</p>
+            
+            <div class="metrics">
+                <div class="metric-card green">
+                    <div class="icon">💰</div>
+                    <div class="label">Ingresos</div>
+                    <div class="value">S/ {total_ingresos:,.2f}</div>
+                </div>
+                
+                <div class="metric-card red">
+                    <div class="icon">💸</div>
+                    <div class="label">Gastos</div>
+                    <div class="value">S/ {total_gastos:,.2f}</div>
+                </div>
+            </div>
+            
+            <div class="metric-card cyan" style="margin: 20px 0;">
+                <div class="icon">{balance_icon}</div>
+                <div class="label">Balance Final</div>
+                <div class="value">S/ {balance:,.2f}</div>
+            </div>
+            
+            <div class="categories">
+                <h3>📊 Top Categorías de Gastos</h3>
+{category_rows}
+            </div>
+            
+            <p style="margin-top: 30px; color: #b0b0b0; text-align: center;">
+                📝 Registraste <strong>{num_transacciones}</strong> transacciones este mes
+            </p>
+            
+            <div style="text-align: center;">
+                <a href="#" class="cta-button">Ver Detalles Completos →</a>
+            </div>
+        </div>
+        
+        <div class="footer">
+            <p>Este es un mensaje automático de Misti AI Wallet</p>
+            <p>💡 Gestiona tus finanzas de forma inteligente</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+_CATEGORY_ROW = """                <div class="category-item">
+                    <span class="category-name">{emoji} {name}</span>
+                    <span class="category-amount">S/ {monto:,.2f}</span>
+                </div>"""
+
+_TEXT = """💰 Misti AI Wallet - Resumen Mensual de {month_name} {year}
+
+¡Hola {full_name}! 👋
+
+Aquí está tu resumen financiero de {month_name} {year}:
+
+💰 Ingresos:      S/ {total_ingresos:,.2f}
+💸 Gastos:        S/ {total_gastos:,.2f}
+{balance_icon} Balance final: S/ {balance:,.2f}
+
+📊 Top categorías de gastos:
+{category_lines}
+
+📝 Registraste {num_transacciones} transacciones este mes
+
+--
+Este es un mensaje automático de Misti AI Wallet
+💡 Gestiona tus finanzas de forma inteligente
+"""
+
+_CATEGORY_LINE = "  {emoji} {name}: S/ {monto:,.2f}"
+
+
+class MonthlySummaryTemplate:
+    """
+    Renderiza el resumen mensual en HTML y en texto plano
+    
+    Las partes estáticas son constantes del módulo; render_html solo elige
+    la cabecera ya armada según el signo del balance y formatea el cuerpo
+    con los datos del usuario.
+    """
+    
+    def __init__(self, max_categories: int = 5):
+        """
+        Args:
+            max_categories: Categorías de gasto que se muestran en el top
+        """
+        self.max_categories = max_categories
+    
+    def _fields(self, stats: Dict) -> Dict:
+        """Valores comunes a las dos versiones del email"""
+        return {
+            'month_name': stats['month_name'],
+            'year': stats['year'],
+            'total_ingresos': stats['total_ingresos'],
+            'total_gastos': stats['total_gastos'],
+            'balance': stats['balance'],
+            'balance_icon': '📈' if stats['balance'] >= 0 else '📉',
+            'num_transacciones': stats['num_transacciones']
+        }
+    
+    def render_html(self, user_data: Dict, stats: Dict) -> str:
+        """
+        Crea el HTML del resumen mensual
+        
+        Args:
+            user_data: Información del usuario (full_name)
+            stats: Estadísticas del mes (ver EmailManager.calculate_monthly_stats)
+        
+        Returns:
+            HTML formateado del email
+        """
+        category_rows = "\n".join(
+            _CATEGORY_ROW.format(
+                emoji=cat['emoji'],
+                name=escape(cat['categoria'].title()),
+                monto=cat['monto']
+            )
+            for cat in stats['top_categories'][:self.max_categories]
+        )
+        
+        return _HEADS[stats['balance'] >= 0] + _BODY.format(
+            full_name=escape(user_data['full_name']),
+            category_rows=category_rows,
+            **self._fields(stats)
+        )
+    
+    def render_text(self, user_data: Dict, stats: Dict) -> str:
+        """
+        Crea la versión en texto plano del resumen mensual
+        
+        Args:
+            user_data: Información del usuario (full_name)
+            stats: Estadísticas del mes
+        
+        Returns:
+            Texto del email para clientes sin HTML
+        """
+        category_lines = "\n".join(
+            _CATEGORY_LINE.format(
+                emoji=cat['emoji'],
+                name=cat['categoria'].title(),
+                monto=cat['monto']
+            )
+            for cat in stats['top_categories'][:self.max_categories]
+        ) or "  Sin gastos registrados"
+        
+        return _TEXT.format(
+            full_name=user_data['full_name'],
+            category_lines=category_lines,
+            **self._fields(stats)
+        )
@@ -0,0 +1,253 @@
+"""
+Worker de emails: programa los resúmenes mensuales y vacía la cola
+Corre como proceso aparte del web (ver Procfile):
+
+    python -m utils.email_worker
+
+Variables de entorno:
+    MISTI_SMTP_USER / MISTI_SMTP_PASSWORD: Cuenta que envía los resúmenes
+    MISTI_SMTP_SERVER / MISTI_SMTP_PORT: Servidor SMTP (por defecto Gmail, 587)
+    MISTI_EMAIL_QUEUE: Archivo SQLite de la cola (el mismo que usa el web)
+    MISTI_EMAIL_MAX_PER_SECOND: Límite de envíos por segundo (por defecto 5)
+    MISTI_WORKER_OUTBOX / MISTI_WORKER_REPLICA: Bandeja y réplica propias del worker
+"""
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .email_dispatcher import EmailDispatcher
+from .email_manager import EmailManager
+from .email_queue import EmailJobQueue
+from .rate_limiter import TokenBucket
+
+
+def previous_month(now: Optional[datetime] = None) -> Tuple[int, int]:
+    """(mes, año) del mes anterior a now"""
+    last_day = (now or datetime.now()).replace(day=1) - timedelta(days=1)
+    return last_day.month, last_day.year
+
+
+class EmailWorker:
+    """
+    Programa y envía los resúmenes mensuales desde la cola
+    
+    run() da una vuelta cada poll_interval segundos: si el mes anterior
+    todavía no se programó, encola un resumen por usuario; después envía lo
+    que haya en la cola. Las claves de la cola hacen que reprogramar o
+    reiniciar el worker a mitad de un envío no duplique ningún email, y cada
+    trabajo se marca como enviado apenas el servidor SMTP lo acepta.
+    """
+    
+    def __init__(self,
+                 queue: EmailJobQueue,
+                 email_manager: EmailManager,
+                 sender_email: str,
+                 sender_password: str,
+                 workers: int = 4,
+                 max_per_second: Optional[float] = 5.0,
+                 batch_size: int = 200,
+                 max_messages_per_connection: int = 90):
+        """
+        Args:
+            queue: Cola de trabajos compartida con el web
+            email_manager: Arma los mensajes y abre las sesiones SMTP
+            sender_email: Cuenta que envía los resúmenes
+            sender_password: Contraseña de aplicación de la cuenta
+            workers: Conexiones SMTP simultáneas
+            max_per_second: Límite de envíos por segundo (None = sin límite)
+            batch_size: Trabajos que se toman de la cola por vuelta
+            max_messages_per_connection: Emails por conexión antes de reconectar
+        """
+        self.queue = queue
+        self.email_manager = email_manager
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.batch_size = batch_size
+        
+        # Los reintentos largos los maneja la cola; aquí solo uno inmediato
+        self.dispatcher = EmailDispatcher(
+            lambda: email_manager.open_session(sender_email, sender_password,
+                                               max_messages=max_messages_per_connection),
+            workers=workers,
+            rate_limiter=TokenBucket(max_per_second, capacity=workers) if max_per_second else None,
+            max_retries=1
+        )
+        self._stop = threading.Event()
+    
+    # ==================== PROGRAMACIÓN ====================
+    
+    def schedule_monthly_summaries(self,
+                                   users: List[Dict],
+                                   load_ledger: Callable[[], pd.DataFrame],
+                                   month: int,
+                                   year: int) -> int:
+        """
+        Encola el resumen del mes para cada usuario con email y transacciones
+        
+        Args:
+            users: Usuarios con keys username, full_name y email
+            load_ledger: Función que devuelve las transacciones del mes de
+                todos los usuarios (columna usuario); no se llama si la caché
+                de meses cerrados ya tiene a todos
+            month: Mes a resumir
+            year: Año a resumir
+        
+        Returns:
+            Trabajos nuevos encolados (los ya existentes no se repiten)
+        """
+        users = [user for user in users if user.get('email') and '@' in user['email']]
+        stats_by_user = self.email_manager.get_monthly_stats_for_users(
+            [user['username'] for user in users], month, year, load_ledger
+        )
+        
+        enqueued = 0
+        for user in users:
+            stats = stats_by_user[user['username']]
+            if stats['num_transacciones'] > 0:
+                enqueued += self.queue.enqueue_monthly_summary(user, stats)
+        
+        return enqueued
+    
+    def schedule_if_due(self,
+                        load_month: Callable[[int, int], Tuple[List[Dict], Callable[[], pd.DataFrame]]],
+                        now: Optional[datetime] = None) -> int:
+        """
+        Programa el mes anterior si todavía no se hizo
+        
+        Args:
+            load_month: Función (mes, año) → (usuarios, función que carga las transacciones del mes)
+            now: Fecha de referencia (por defecto ahora)
+        
+        Returns:
+            Trabajos nuevos encolados
+        """
+        month, year = previous_month(now)
+        period = f"{year}-{month:02d}"
+        if self.queue.is_scheduled(period):
+            return 0
+        
+        users, load_ledger = load_month(month, year)
+        enqueued = self.schedule_monthly_summaries(users, load_ledger, month, year)
+        # Recién ahora: si el proceso muere antes, la próxima vuelta reprograma sin duplicar
+        self.queue.mark_scheduled(period, enqueued)
+        print(f"📅 Resúmenes de {period} programados: {enqueued}")
+        return enqueued
+    
+    # ==================== ENVÍO ====================
+    
+    def run_once(self) -> int:
+        """
+        Envía un lote de trabajos de la cola
+        
+        Returns:
+            Trabajos tomados de la cola (0 si estaba vacía)
+        """
+        jobs = self.queue.claim(self.batch_size)
+        if not jobs:
+            return 0
+        
+        ready = []
+        messages = []
+        for job in jobs:
+            try:
+                message = self.email_manager._build_monthly_summary_message(
+                    self.sender_email, job['recipient'],
+                    job['payload']['user'], job['payload']['stats']
+                )
+            except Exception as e:
+                self.queue.mark_failed(job['job_key'], job['attempts'],
+                                       f"Error armando el email: {e}", transient=False)
+                continue
+            ready.append(job)
+            messages.append((self.sender_email, job['recipient'], message))
+        
+        def record(index: int, result: Dict):
+            job = ready[index]
+            if result['success']:
+                self.queue.mark_sent(job['job_key'])
+            else:
+                self.queue.mark_failed(job['job_key'], job['attempts'], result['message'],
+                                       transient=result.get('transitorio', False))
+        
+        self.dispatcher.send_all(messages, on_result=record)
+        return len(jobs)
+    
+    def run(self,
+            load_month: Callable[[int, int], Tuple[List[Dict], Callable[[], pd.DataFrame]]],
+            poll_interval: float = 60.0):
+        """
+        Bucle principal: programa el mes anterior y vacía la cola
+        
+        Args:
+            load_month: Función (mes, año) → (usuarios, función que carga las transacciones del mes)
+            poll_interval: Segundos entre vueltas cuando la cola está vacía
+        """
+        print(f"📬 Worker de emails iniciado ({self.queue.db_path})")
+        while not self._stop.is_set():
+            try:
+                self.schedule_if_due(load_month)
+                while self.run_once() and not self._stop.is_set():
+                    pass
+            except Exception as e:
+                print(f"❌ Error en el worker de emails: {e}")
+            self._stop.wait(poll_interval)
+    
+    def stop(self):
+        """Pide al bucle principal que termine tras la vuelta actual"""
+        self._stop.set()
+
+
+def load_month_from_supabase(db_manager) -> Callable[[int, int], Tuple[List[Dict], Callable[[], pd.DataFrame]]]:
+    """Fuente de datos del programador: usuarios y transacciones del mes desde Supabase"""
+    def load_month(month: int, year: int) -> Tuple[List[Dict], Callable[[], pd.DataFrame]]:
+        desde = f"{year}-{month:02d}-01"
+        hasta = f"{year + 1}-01-01" if month == 12 else f"{year}-{month + 1:02d}-01"
+        
+        def load_ledger() -> pd.DataFrame:
+            ledger = pd.DataFrame(
+                list(db_manager.iter_transactions_between(desde, hasta)),
+                columns=['username', 'fecha', 'tipo', 'monto', 'categoria']
+            ).rename(columns={'username': 'usuario'})
+            # SQL_SETUP restringe tipo a 'Gasto' / 'Ingreso'
+            ledger['tipo'] = ledger['tipo'].str.lower()
+            return ledger
+        
+        return db_manager.get_users_with_email(), load_ledger
+    
+    return load_month
+
+
+def main():
+    """Punto de entrada del proceso worker"""
+    from .supabase_manager import SupabaseManager
+    
+    sender_email = os.getenv("MISTI_SMTP_USER")
+    sender_password = os.getenv("MISTI_SMTP_PASSWORD")
+    if not sender_email or not sender_password:
+        print("❌ Faltan MISTI_SMTP_USER y MISTI_SMTP_PASSWORD")
+        sys.exit(1)
+    
+    # Bandeja y réplica propias: las del web las vacía y sincroniza el proceso web
+    db_manager = SupabaseManager(
+        outbox_path=os.getenv("MISTI_WORKER_OUTBOX", "data/email_worker_outbox.db"),
+        replica_path=os.getenv("MISTI_WORKER_REPLICA", "data/email_worker_replica.db")
+    )
+    max_per_second = float(os.getenv("MISTI_EMAIL_MAX_PER_SECOND", "5"))
+    worker = EmailWorker(
+        EmailJobQueue(os.getenv("MISTI_EMAIL_QUEUE", "data/email_jobs.db")),
+        EmailManager(os.getenv("MISTI_SMTP_SERVER", "smtp.gmail.com"),
+                     int(os.getenv("MISTI_SMTP_PORT", "587")),
+                     stats_cache=db_manager.monthly_stats),
+        sender_email,
+        sender_password,
+        max_per_second=max_per_second or None
+    )
+    worker.run(load_month_from_supabase(db_manager))
+
+
+if __name__ == "__main__":
+    main()
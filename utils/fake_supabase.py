@@ -0,0 +1,456 @@
+"""
+Supabase en memoria para desarrollo, pruebas y benchmarks sin conexión
+Imita la parte de la API de tablas y RPC que usa SupabaseManager, con
+latencia y errores configurables
+"""
+import copy
+import itertools
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Columnas únicas de cada tabla (además de id), como en SQL_SETUP
+UNIQUE_KEYS = {
+    'users': [('username',)],
+    'transactions': [('client_id',)],
+    'budgets': [('username', 'categoria', 'mes', 'anio')],
+    'transaction_tombstones': [],
+}
+
+
+class FakeSupabaseError(Exception):
+    """Error inyectado o violación de restricción en el Supabase en memoria"""
+
+
+class FakeResponse:
+    """Respuesta con la misma forma que la de supabase-py"""
+    
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class FakeSupabaseClient:
+    """
+    Cliente de Supabase que guarda las tablas en memoria
+    
+    Cada execute() espera latency segundos (más un jitter aleatorio) y falla
+    con probabilidad error_rate, para probar la app en condiciones realistas.
+    Replica los triggers de SQL_SETUP: updated_at en cada cambio y lápidas
+    al borrar transacciones.
+    """
+    
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            latency: Segundos de espera por petición
+            jitter: Segundos extra aleatorios (entre 0 y jitter) por petición
+            error_rate: Probabilidad (0 a 1) de que una petición falle
+            seed: Semilla para que latencia y errores sean reproducibles
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.tables: Dict[str, List[Dict]] = {name: [] for name in UNIQUE_KEYS}
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+    
+    def table(self, name: str) -> 'FakeQuery':
+        """Inicia una consulta sobre una tabla"""
+        return FakeQuery(self, name)
+    
+    def rpc(self, name: str, params: Dict) -> 'FakeRpc':
+        """Llama a una de las funciones de SQL_SETUP"""
+        return FakeRpc(self, name, params)
+    
+    # ==================== SIMULACIÓN ====================
+    
+    def _simulate_network(self):
+        """Aplica la latencia y los errores configurados"""
+        with self._lock:
+            self.request_count += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise FakeSupabaseError("Error inyectado en el Supabase en memoria")
+    
+    def _now(self) -> str:
+        """Marca de tiempo como la devuelve PostgREST"""
+        return datetime.now().isoformat()
+    
+    def _insert(self, table: str, rows: List[Dict], on_conflict: Optional[str] = None,
+                ignore_duplicates: bool = False) -> List[Dict]:
+        """Inserta filas respetando las claves únicas; con on_conflict hace upsert"""
+        stored = self.tables.setdefault(table, [])
+        conflict_key = tuple(on_conflict.split(',')) if on_conflict else None
+        result = []
+        
+        for row in rows:
+            row = dict(row)
+            existing = self._find_conflict(table, row, conflict_key)
+            
+            if existing is not None and conflict_key is not None:
+                if not ignore_duplicates:
+                    existing.update(row)
+                    self._touch(table, existing)
+                    result.append(copy.deepcopy(existing))
+                continue
+            if existing is not None:
+                raise FakeSupabaseError(f"duplicate key value violates unique constraint on {table}")
+            
+            row.setdefault('id', next(self._ids))
+            row.setdefault('created_at', self._now())
+            self._touch(table, row)
+            stored.append(row)
+            result.append(copy.deepcopy(row))
+        
+        return result
+    
+    def _find_conflict(self, table: str, row: Dict, conflict_key) -> Optional[Dict]:
+        """Busca una fila existente que choque con alguna clave única"""
+        keys = [conflict_key] if conflict_key else UNIQUE_KEYS.get(table, [])
+        for key in keys:
+            if any(row.get(col) is None for col in key):
+                continue
+            for existing in self.tables[table]:
+                if all(existing.get(col) == row.get(col) for col in key):
+                    return existing
+        return None
+    
+    def _touch(self, table: str, row: Dict):
+        """Equivalente a trg_transactions_updated_at"""
+        if table == 'transactions':
+            row['updated_at'] = self._now()
+    
+    def _delete(self, table: str, rows: List[Dict]):
+        """Borra filas; las transacciones dejan lápida como trg_transactions_tombstone"""
+        ids = {id(row) for row in rows}
+        self.tables[table] = [row for row in self.tables[table] if id(row) not in ids]
+        
+        if table == 'transactions':
+            tombstones = self.tables['transaction_tombstones']
+            for row in rows:
+                tombstones[:] = [t for t in tombstones if t['id'] != row['id']]
+                tombstones.append({'id': row['id'], 'username': row['username'], 'deleted_at': self._now()})
+    
+    # ==================== DATOS DE PRUEBA ====================
+    
+    def seed_user(self, username: str, password_hash: str = "", full_name: str = "",
+                  email: Optional[str] = None, transactions: int = 0, start_year: int = 2024):
+        """
+        Crea un usuario con transacciones aleatorias
+        
+        Args:
+            username: Nombre de usuario
+            password_hash: Hash SHA-256 de la contraseña (ver SupabaseManager._hash_password)
+            full_name: Nombre completo (por defecto el username)
+            email: Email del usuario
+            transactions: Cantidad de transacciones a generar
+            start_year: Año de la transacción más antigua
+        """
+        with self._lock:
+            self._insert('users', [{
+                'username': username,
+                'full_name': full_name or username,
+                'email': email,
+                'password_hash': password_hash,
+                'last_login': self._now()
+            }])
+            
+            categorias = ['Comida', 'Transporte', 'Entretenimiento', 'Salud', 'Servicios', 'Otros']
+            years = max(1, datetime.now().year - start_year + 1)
+            rows = []
+            for i in range(transactions):
+                tipo = 'Ingreso' if self._random.random() < 0.1 else 'Gasto'
+                fecha = datetime(
+                    start_year + self._random.randrange(years),
+                    self._random.randint(1, 12),
+                    self._random.randint(1, 28)
+                )
+                rows.append({
+                    'username': username,
+                    'tipo': tipo,
+                    'categoria': 'Salario' if tipo == 'Ingreso' else self._random.choice(categorias),
+                    'monto': round(self._random.uniform(5, 500), 2),
+                    'descripcion': f"Transacción de prueba {i + 1}",
+                    'fecha': min(fecha, datetime.now()).strftime('%Y-%m-%d')
+                })
+            self._insert('transactions', rows)
+
+
+class FakeRpc:
+    """Llamada a función de Postgres simulada"""
+    
+    def __init__(self, client: FakeSupabaseClient, name: str, params: Dict):
+        self._client = client
+        self._name = name
+        self._params = params
+    
+    def execute(self) -> FakeResponse:
+        self._client._simulate_network()
+        handler = getattr(self, f"_rpc_{self._name}", None)
+        if handler is None:
+            raise FakeSupabaseError(f"Could not find the function public.{self._name}")
+        with self._client._lock:
+            return FakeResponse(handler(**self._params))
+    
+    def _transactions(self, username: str) -> List[Dict]:
+        return [t for t in self._client.tables['transactions'] if t['username'] == username]
+    
+    def _rpc_get_user_stats(self, p_username: str) -> List[Dict]:
+        rows = self._transactions(p_username)
+        ingresos = sum(float(t['monto']) for t in rows if t['tipo'].lower() == 'ingreso')
+        gastos = sum(float(t['monto']) for t in rows if t['tipo'].lower() == 'gasto')
+        return [{
+            'total_transactions': len(rows),
+            'total_ingresos': ingresos,
+            'total_gastos': gastos,
+            'balance': ingresos - gastos,
+            'last_transaction': max((t['fecha'] for t in rows), default=None)
+        }]
+    
+    def _rpc_touch_last_login(self, p_logins: Dict[str, str]) -> List[Dict]:
+        for user in self._client.tables['users']:
+            when = p_logins.get(user['username'])
+            if when and when > (user.get('last_login') or ''):
+                user['last_login'] = when
+        return []
+    
+    def _rpc_get_budget_vs_actual(self, p_username: str, p_mes: int, p_anio: int) -> List[Dict]:
+        prefix = f"{p_anio:04d}-{p_mes:02d}"
+        gastado: Dict[str, float] = {}
+        for t in self._transactions(p_username):
+            if t['tipo'].lower() == 'gasto' and str(t['fecha']).startswith(prefix):
+                gastado[t['categoria']] = gastado.get(t['categoria'], 0.0) + float(t['monto'])
+        
+        presupuesto = {
+            b['categoria']: float(b['monto'])
+            for b in self._client.tables['budgets']
+            if b['username'] == p_username and b['mes'] == p_mes and b['anio'] == p_anio
+        }
+        
+        return [
+            {
+                'categoria': categoria,
+                'presupuesto': presupuesto.get(categoria, 0.0),
+                'gastado': gastado.get(categoria, 0.0),
+                'restante': presupuesto.get(categoria, 0.0) - gastado.get(categoria, 0.0)
+            }
+            for categoria in sorted(set(presupuesto) | set(gastado))
+        ]
+
+
+class FakeQuery:
+    """Constructor de consultas con la interfaz encadenable de postgrest"""
+    
+    def __init__(self, client: FakeSupabaseClient, table: str):
+        self._client = client
+        self._table = table
+        self._operation = 'select'
+        self._columns: Optional[List[str]] = None
+        self._filters: List[Callable[[Dict], bool]] = []
+        self._orders: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._count = False
+        self._head = False
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._ignore_duplicates = False
+    
+    # ---------- operaciones ----------
+    
+    def select(self, columns: str = '*', count: Optional[str] = None, head: bool = False) -> 'FakeQuery':
+        self._operation = 'select'
+        if columns.strip() != '*':
+            self._columns = [c.strip() for c in columns.split(',')]
+        self._count = count is not None
+        self._head = head
+        return self
+    
+    def insert(self, payload) -> 'FakeQuery':
+        self._operation = 'insert'
+        self._payload = payload
+        return self
+    
+    def upsert(self, payload, on_conflict: Optional[str] = None,
+               ignore_duplicates: bool = False) -> 'FakeQuery':
+        self._operation = 'upsert'
+        self._payload = payload
+        self._on_conflict = on_conflict or 'id'
+        self._ignore_duplicates = ignore_duplicates
+        return self
+    
+    def update(self, payload: Dict) -> 'FakeQuery':
+        self._operation = 'update'
+        self._payload = payload
+        return self
+    
+    def delete(self) -> 'FakeQuery':
+        self._operation = 'delete'
+        return self
+    
+    # ---------- filtros ----------
+    
+    def _compare(self, column: str, op: str, value) -> 'FakeQuery':
+        self._filters.append(_make_filter(column, op, value))
+        return self
+    
+    def eq(self, column: str, value) -> 'FakeQuery':
+        return self._compare(column, 'eq', value)
+    
+    def neq(self, column: str, value) -> 'FakeQuery':
+        return self._compare(column, 'neq', value)
+    
+    def gt(self, column: str, value) -> 'FakeQuery':
+        return self._compare(column, 'gt', value)
+    
+    def gte(self, column: str, value) -> 'FakeQuery':
+        return self._compare(column, 'gte', value)
+    
+    def lt(self, column: str, value) -> 'FakeQuery':
+        return self._compare(column, 'lt', value)
+    
+    def lte(self, column: str, value) -> 'FakeQuery':
+        return self._compare(column, 'lte', value)
+    
+    def in_(self, column: str, values) -> 'FakeQuery':
+        values = list(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+    
+    def or_(self, filters: str) -> 'FakeQuery':
+        """Soporta la sintaxis de PostgREST: 'a.lt.1,and(a.eq.1,b.gt.2)'"""
+        self._filters.append(_parse_or(filters))
+        return self
+    
+    # ---------- orden y paginación ----------
+    
+    def order(self, column: str, desc: bool = False) -> 'FakeQuery':
+        self._orders.append((column, desc))
+        return self
+    
+    def limit(self, size: int) -> 'FakeQuery':
+        self._limit = size
+        return self
+    
+    def range(self, start: int, end: int) -> 'FakeQuery':
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+    
+    # ---------- ejecución ----------
+    
+    def execute(self) -> FakeResponse:
+        self._client._simulate_network()
+        with self._client._lock:
+            if self._operation in ('insert', 'upsert'):
+                rows = self._payload if isinstance(self._payload, list) else [self._payload]
+                if self._operation == 'upsert':
+                    data = self._client._insert(self._table, rows, self._on_conflict, self._ignore_duplicates)
+                else:
+                    data = self._client._insert(self._table, rows)
+                return FakeResponse(data)
+            
+            matches = [row for row in self._client.tables.setdefault(self._table, [])
+                       if all(f(row) for f in self._filters)]
+            
+            if self._operation == 'update':
+                for row in matches:
+                    row.update(self._payload)
+                    self._client._touch(self._table, row)
+                return FakeResponse(copy.deepcopy(matches))
+            
+            if self._operation == 'delete':
+                data = copy.deepcopy(matches)
+                self._client._delete(self._table, matches)
+                return FakeResponse(data)
+            
+            for column, desc in reversed(self._orders):
+                matches.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            
+            total = len(matches) if self._count else None
+            if self._head:
+                return FakeResponse([], total)
+            
+            matches = matches[self._offset:]
+            if self._limit is not None:
+                matches = matches[:self._limit]
+            
+            if self._columns:
+                data = [{c: row.get(c) for c in self._columns} for row in matches]
+            else:
+                data = copy.deepcopy(matches)
+            return FakeResponse(data, total)
+
+
+# ==================== FILTROS ====================
+
+_OPERATORS = {
+    'eq': lambda a, b: a == b,
+    'neq': lambda a, b: a != b,
+    'gt': lambda a, b: a > b,
+    'gte': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'lte': lambda a, b: a <= b,
+}
+
+
+def _coerce(current, value):
+    """Convierte el valor del filtro (texto en PostgREST) al tipo de la columna"""
+    if isinstance(value, str) and isinstance(current, (int, float)) and not isinstance(current, bool):
+        try:
+            return type(current)(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _make_filter(column: str, op: str, value) -> Callable[[Dict], bool]:
+    compare = _OPERATORS[op]
+    
+    def check(row: Dict) -> bool:
+        current = row.get(column)
+        if current is None:
+            return False
+        return compare(current, _coerce(current, value))
+    return check
+
+
+def _split_top_level(expr: str) -> List[str]:
+    """Separa por comas que no estén dentro de paréntesis"""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(expr):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(expr[start:i])
+            start = i + 1
+    parts.append(expr[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _parse_condition(expr: str) -> Callable[[Dict], bool]:
+    match = re.fullmatch(r'(and|or)\((.*)\)', expr)
+    if match:
+        children = [_parse_condition(part) for part in _split_top_level(match.group(2))]
+        if match.group(1) == 'and':
+            return lambda row: all(child(row) for child in children)
+        return lambda row: any(child(row) for child in children)
+    
+    column, op, value = expr.split('.', 2)
+    return _make_filter(column, op, value.strip('"'))
+
+
+def _parse_or(filters: str) -> Callable[[Dict], bool]:
+    return _parse_condition(f"or({filters})")
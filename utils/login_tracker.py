@@ -0,0 +1,83 @@
+"""
+Registro diferido de last_login
+Los inicios de sesión se anotan en memoria y se guardan por lotes
+"""
+import threading
+from typing import Callable, Dict, Optional
+
+
+class LastLoginTracker:
+    """
+    Acumula el último login de cada usuario y lo guarda en lote
+    
+    touch() solo actualiza un dict en memoria, así el login cuesta lo que
+    cuesta verificar la contraseña. Un hilo de fondo llama a flush_fn con
+    todos los pendientes cada max_delay segundos, que es lo máximo que
+    last_login puede quedar desactualizado en disco. close() guarda lo que
+    quede (llamarlo al cerrar el proceso).
+    """
+    
+    def __init__(self, flush_fn: Callable[[Dict[str, str]], None], max_delay: float = 30.0):
+        """
+        Args:
+            flush_fn: Función que guarda un dict username → last_login
+            max_delay: Segundos máximos que un login espera a guardarse
+        """
+        self._flush_fn = flush_fn
+        self.max_delay = max_delay
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def touch(self, username: str, when: str):
+        """Anota un login; se guardará en el próximo lote"""
+        with self._lock:
+            if when > self._pending.get(username, ''):
+                self._pending[username] = when
+            if self._thread is None:
+                # El hilo se crea con el primer login, no por cada gestor creado
+                self._thread = threading.Thread(target=self._run, name="misti-last-login", daemon=True)
+                self._thread.start()
+    
+    def pending(self, username: str) -> Optional[str]:
+        """last_login anotado y todavía sin guardar (None si no hay)"""
+        with self._lock:
+            return self._pending.get(username)
+    
+    def flush(self) -> int:
+        """
+        Guarda todos los logins pendientes en un solo lote
+        
+        Returns:
+            Cantidad de usuarios guardados
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            
+            try:
+                self._flush_fn(batch)
+            except Exception as e:
+                print(f"❌ Error guardando last_login: {e}")
+                # Devolver el lote sin pisar logins más nuevos
+                with self._lock:
+                    for username, when in batch.items():
+                        if when > self._pending.get(username, ''):
+                            self._pending[username] = when
+                return 0
+            
+            return len(batch)
+    
+    def _run(self):
+        """Bucle del hilo de fondo: guarda cada max_delay segundos"""
+        while not self._stop.wait(self.max_delay):
+            self.flush()
+    
+    def close(self):
+        """Detiene el hilo y guarda lo pendiente"""
+        self._stop.set()
+        self.flush()
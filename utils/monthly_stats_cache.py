@@ -0,0 +1,249 @@
+"""
+Caché permanente de estadísticas de meses cerrados
+Un mes pasado no cambia salvo que llegue una transacción fechada dentro de él
+"""
+import json
+import os
+import sqlite3
+from datetime import date, datetime
+from typing import Callable, Dict, Optional, Tuple
+
+# Formato de las estadísticas guardadas; subirlo descarta las entradas de
+# versiones anteriores (por ejemplo, las calculadas con tipo sin normalizar)
+STATS_SCHEMA = 2
+
+
+class MonthlyStatsCache:
+    """
+    Estadísticas por (usuario, año, mes) guardadas en SQLite
+    
+    Solo se guardan meses cerrados (anteriores al mes actual); el mes en
+    curso siempre se calcula. Una entrada vive hasta que una escritura
+    fechada dentro de ese mes la invalida con invalidate(). Cada mes tiene
+    un número de versión que las invalidaciones incrementan: un cálculo que
+    empezó antes de una escritura ya no se guarda, igual que en
+    TransactionCache. Al estar en disco, la comparten el web y el worker de
+    emails. Cada fila lleva el STATS_SCHEMA con que se calculó; las de
+    otro formato se tratan como ausentes.
+    """
+    
+    def __init__(self, db_path: str = "data/monthly_stats.db"):
+        """
+        Args:
+            db_path: Ruta al archivo SQLite de la caché
+        """
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self._create_tables()
+    
+    def _get_connection(self):
+        """Obtiene una conexión a la base de la caché"""
+        return sqlite3.connect(self.db_path, timeout=30)
+    
+    def _create_tables(self):
+        """Crea la tabla de la caché si no existe"""
+        conn = self._get_connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS monthly_stats (
+                username TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                month INTEGER NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0,
+                stats TEXT,
+                computed_at TEXT,
+                schema INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (username, year, month)
+            )
+        """)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(monthly_stats)")}
+        if 'schema' not in columns:
+            conn.execute("ALTER TABLE monthly_stats ADD COLUMN schema INTEGER NOT NULL DEFAULT 0")
+        # Las entradas de otro formato se recalculan
+        conn.execute("""
+            UPDATE monthly_stats SET stats = NULL, computed_at = NULL
+            WHERE schema <> ? AND stats IS NOT NULL
+        """, (STATS_SCHEMA,))
+        conn.commit()
+        conn.close()
+    
+    @staticmethod
+    def is_closed(month: int, year: int, now: Optional[datetime] = None) -> bool:
+        """Indica si el mes ya terminó"""
+        now = now or datetime.now()
+        return (year, month) < (now.year, now.month)
+    
+    # ==================== LECTURA ====================
+    
+    def lookup(self, username: str, month: int, year: int) -> Tuple[Optional[Dict], int]:
+        """
+        Busca las estadísticas de un mes
+        
+        Returns:
+            (estadísticas o None si no están, versión actual del mes)
+        """
+        conn = self._get_connection()
+        row = conn.execute(
+            "SELECT stats, version, schema FROM monthly_stats WHERE username = ? AND year = ? AND month = ?",
+            (username, year, month)
+        ).fetchone()
+        conn.close()
+        
+        if row is None:
+            return None, 0
+        stats, version, schema = row
+        if stats is None or schema != STATS_SCHEMA:
+            return None, version
+        return json.loads(stats), version
+    
+    def get(self, username: str, month: int, year: int) -> Optional[Dict]:
+        """Estadísticas guardadas de un mes (None si no están)"""
+        stats, _ = self.lookup(username, month, year)
+        if stats is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return stats
+    
+    def get_month(self, month: int, year: int) -> Tuple[Dict[str, Dict], Dict[str, int]]:
+        """
+        Estadísticas guardadas de todos los usuarios para un mes
+        
+        Returns:
+            (usuario → estadísticas, usuario → versión actual del mes)
+        """
+        conn = self._get_connection()
+        rows = conn.execute(
+            "SELECT username, stats, version, schema FROM monthly_stats WHERE year = ? AND month = ?",
+            (year, month)
+        ).fetchall()
+        conn.close()
+        
+        cached = {
+            username: json.loads(stats)
+            for username, stats, _, schema in rows
+            if stats is not None and schema == STATS_SCHEMA
+        }
+        versions = {username: version for username, _, version, _ in rows}
+        return cached, versions
+    
+    def get_or_compute(self, username: str, month: int, year: int,
+                       compute: Callable[[], Dict]) -> Dict:
+        """
+        Devuelve las estadísticas guardadas o las calcula y las guarda
+        
+        Args:
+            username: Usuario
+            month: Mes
+            year: Año
+            compute: Función que calcula las estadísticas desde las transacciones
+        """
+        if not self.is_closed(month, year):
+            return compute()
+        
+        stats, version = self.lookup(username, month, year)
+        if stats is not None:
+            self.hits += 1
+            return stats
+        
+        self.misses += 1
+        stats = compute()
+        self.put(username, month, year, stats, version)
+        return stats
+    
+    # ==================== ESCRITURA ====================
+    
+    def put(self, username: str, month: int, year: int, stats: Dict, version: int = 0):
+        """
+        Guarda las estadísticas de un mes cerrado
+        
+        Args:
+            version: Versión leída antes de calcular; si desde entonces hubo
+                una escritura en ese mes, el resultado se descarta
+        """
+        self.put_many(month, year, {username: stats}, {username: version})
+    
+    def put_many(self, month: int, year: int, stats_by_user: Dict[str, Dict], versions: Dict[str, int]):
+        """
+        Guarda las estadísticas de un mes cerrado para varios usuarios
+        
+        Args:
+            stats_by_user: usuario → estadísticas
+            versions: Versiones leídas con get_month antes de calcular
+        """
+        if not self.is_closed(month, year) or not stats_by_user:
+            return
+        
+        computed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        conn = self._get_connection()
+        conn.executemany("""
+            INSERT INTO monthly_stats (username, year, month, version, stats, computed_at, schema)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (username, year, month) DO UPDATE
+                SET stats = excluded.stats, computed_at = excluded.computed_at,
+                    schema = excluded.schema
+                WHERE monthly_stats.version = excluded.version
+        """, [
+            (username, year, month, versions.get(username, 0),
+             json.dumps(stats, default=float), computed_at, STATS_SCHEMA)
+            for username, stats in stats_by_user.items()
+        ])
+        conn.commit()
+        conn.close()
+    
+    def invalidate(self, username: str, fecha) -> bool:
+        """
+        Descarta el mes de una transacción escrita (alta, baja o cambio)
+        
+        Args:
+            username: Usuario dueño de la transacción
+            fecha: Fecha de la transacción (date, datetime o 'YYYY-MM-DD')
+        
+        Returns:
+            True si la fecha se pudo interpretar; si no, se invalidó todo el usuario
+        """
+        try:
+            if not isinstance(fecha, (date, datetime)):
+                fecha = datetime.strptime(str(fecha)[:10], '%Y-%m-%d')
+        except ValueError:
+            self.invalidate_user(username)
+            return False
+        
+        # El mes en curso nunca se guarda: no hay nada que invalidar
+        if not self.is_closed(fecha.month, fecha.year):
+            return True
+        
+        conn = self._get_connection()
+        conn.execute("""
+            INSERT INTO monthly_stats (username, year, month, version)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT (username, year, month) DO UPDATE
+                SET version = monthly_stats.version + 1, stats = NULL, computed_at = NULL
+        """, (username, fecha.year, fecha.month))
+        conn.commit()
+        conn.close()
+        return True
+    
+    def invalidate_user(self, username: str):
+        """Descarta todos los meses de un usuario (escrituras sin fecha conocida)"""
+        conn = self._get_connection()
+        conn.execute("""
+            UPDATE monthly_stats SET version = version + 1, stats = NULL, computed_at = NULL
+            WHERE username = ?
+        """, (username,))
+        conn.commit()
+        conn.close()
+    
+    def stats(self) -> Dict:
+        """Devuelve métricas de uso de la caché"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
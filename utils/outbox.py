@@ -0,0 +1,403 @@
+"""
+Bandeja de salida local (outbox) para escrituras hacia Supabase
+Guarda cada transacción en SQLite antes de enviarla y la reintenta si la nube falla
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class CircuitBreaker:
+    """
+    Corta los envíos tras varios fallos seguidos
+    
+    Con el circuito abierto no se intenta nada hasta que pasa reset_timeout;
+    entonces se deja pasar un solo intento de prueba (medio abierto): el
+    resto espera su resultado. Si sale bien el circuito se cierra, si falla
+    vuelve a abrirse.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold: Fallos seguidos que abren el circuito
+            reset_timeout: Segundos abierto antes de permitir un intento de prueba
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """'closed', 'open' o 'half-open'"""
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+    
+    def allow(self) -> bool:
+        """
+        Indica si se puede intentar un envío
+        
+        En medio abierto solo el primero que pregunta recibe True; quien lo
+        recibe debe llamar a record_success o record_failure.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+    
+    def record_success(self):
+        """Registra un envío exitoso y cierra el circuito"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+    
+    def record_failure(self):
+        """Registra un fallo; abre el circuito al llegar al umbral"""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class Outbox:
+    """
+    Cola durable de transacciones pendientes de enviar
+    
+    add() escribe la fila en SQLite y vuelve enseguida; un hilo de fondo
+    junta lo pendiente, lo envía con send_fn agrupado por usuario y borra lo
+    confirmado. Cada fila lleva un client_id (UUID) que viaja a Supabase como
+    clave de idempotencia, así reenviar una fila ya guardada no la duplica.
+    Si falla el lote de un usuario, sus filas se reenvían de a una, así una
+    fila que el servidor rechaza no bloquea a las demás. Los fallos se
+    reintentan con backoff exponencial y, si se acumulan, el circuit
+    breaker pausa los envíos. Una fila que agota max_attempts queda
+    como 'failed' en la bandeja (se sigue mostrando y contando) hasta que
+    retry_failed() la vuelve a encolar.
+    """
+    
+    def __init__(self,
+                 send_fn: Callable[[str, List[Dict]], Tuple[bool, str, Dict[str, int]]],
+                 db_path: str = "data/outbox.db",
+                 window: float = 0.2,
+                 max_batch: int = 500,
+                 base_delay: float = 1.0,
+                 max_delay: float = 300.0,
+                 max_attempts: int = 10,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Inicializa la bandeja y arranca el hilo de reenvío
+        
+        Args:
+            send_fn: Función que envía varias filas de un usuario; devuelve
+                (success, message, ids) con el id que el servidor asignó a cada client_id
+            db_path: Ruta al archivo SQLite de la bandeja
+            window: Segundos que se espera para juntar más filas
+            max_batch: Máximo de filas por envío
+            base_delay: Espera inicial entre reintentos (segundos)
+            max_delay: Espera máxima entre reintentos (segundos)
+            max_attempts: Intentos antes de marcar la fila como fallida
+            breaker: Circuit breaker a usar (por defecto uno nuevo)
+        """
+        self._send_fn = send_fn
+        self.db_path = db_path
+        self.window = window
+        self.max_batch = max_batch
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.breaker = breaker or CircuitBreaker()
+        
+        # Acuses de entrega de las filas agregadas en este proceso
+        self._futures: Dict[str, Future] = {}
+        self._futures_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self._create_tables()
+        
+        self._thread = threading.Thread(target=self._run, name="misti-outbox", daemon=True)
+        self._thread.start()
+    
+    def _get_connection(self):
+        """Obtiene una conexión a la base de la bandeja"""
+        return sqlite3.connect(self.db_path)
+    
+    def _create_tables(self):
+        """Crea la tabla de la bandeja si no existe"""
+        conn = self._get_connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                client_id TEXT UNIQUE NOT NULL,
+                username TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt)")
+        conn.commit()
+        conn.close()
+    
+    # ==================== ESCRITURA ====================
+    
+    def add(self, username: str, row: Dict) -> Future:
+        """
+        Guarda una fila en la bandeja de forma durable
+        
+        Returns:
+            Future que se resuelve con (success, message, id) al confirmarse el
+            envío; id es el que asignó el servidor (None si falló)
+        """
+        client_id = str(row.get('client_id') or uuid.uuid4())
+        payload = {**row, 'client_id': client_id}
+        
+        future = Future()
+        with self._futures_lock:
+            self._futures[client_id] = future
+        
+        conn = self._get_connection()
+        conn.execute("""
+            INSERT INTO outbox (client_id, username, payload, created_at)
+            VALUES (?, ?, ?, ?)
+        """, (client_id, username, json.dumps(payload, default=str),
+              datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        conn.commit()
+        conn.close()
+        
+        self._wake.set()
+        return future
+    
+    # ==================== CONSULTAS ====================
+    
+    def size(self, username: Optional[str] = None, status: str = 'pending') -> int:
+        """Cantidad de filas en un estado (de un usuario o de todos)"""
+        conn = self._get_connection()
+        if username:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status = ? AND username = ?", (status, username)
+            ).fetchone()
+        else:
+            row = conn.execute("SELECT COUNT(*) FROM outbox WHERE status = ?", (status,)).fetchone()
+        conn.close()
+        return row[0]
+    
+    def pending_rows(self, username: str) -> List[Dict]:
+        """
+        Filas de un usuario que aún no llegaron a Supabase, en el orden en que se agregaron
+        
+        Incluye las fallidas (marcadas con fallida=True): siguen sin guardarse
+        en la nube y no deben desaparecer de la vista.
+        """
+        conn = self._get_connection()
+        rows = conn.execute(
+            "SELECT payload, status FROM outbox WHERE username = ? ORDER BY id",
+            (username,)
+        ).fetchall()
+        conn.close()
+        return [{**json.loads(payload), 'fallida': status == 'failed'} for payload, status in rows]
+    
+    def retry_failed(self, username: Optional[str] = None) -> int:
+        """
+        Vuelve a encolar las filas fallidas (de un usuario o de todas)
+        
+        Returns:
+            Cantidad de filas reencoladas
+        """
+        conn = self._get_connection()
+        if username:
+            cursor = conn.execute("""
+                UPDATE outbox SET status = 'pending', attempts = 0, next_attempt = 0
+                WHERE status = 'failed' AND username = ?
+            """, (username,))
+        else:
+            cursor = conn.execute("""
+                UPDATE outbox SET status = 'pending', attempts = 0, next_attempt = 0
+                WHERE status = 'failed'
+            """)
+        retried = cursor.rowcount
+        conn.commit()
+        conn.close()
+        
+        if retried:
+            self._wake.set()
+        return retried
+    
+    # ==================== REENVÍO ====================
+    
+    def replay(self) -> int:
+        """
+        Envía las filas pendientes cuyo reintento ya venció
+        
+        Returns:
+            Cantidad de filas confirmadas
+        """
+        with self._replay_lock:
+            # Solo consulta el estado: el intento de prueba lo pide cada envío
+            if self.breaker.state == 'open':
+                return 0
+            
+            conn = self._get_connection()
+            due = conn.execute("""
+                SELECT id, client_id, username, payload, attempts
+                FROM outbox
+                WHERE status = 'pending' AND next_attempt <= ?
+                ORDER BY id
+                LIMIT ?
+            """, (time.time(), self.max_batch)).fetchall()
+            conn.close()
+            
+            by_user = defaultdict(list)
+            for row in due:
+                by_user[row[2]].append(row)
+            
+            delivered = 0
+            for username, rows in by_user.items():
+                if not self.breaker.allow():
+                    break
+                
+                success, message, ids = self._send(username, rows)
+                if success:
+                    self.breaker.record_success()
+                    self._mark_delivered(rows, message, ids)
+                    delivered += len(rows)
+                    continue
+                
+                self.breaker.record_failure()
+                if len(rows) == 1:
+                    self._mark_failed(rows, message)
+                    continue
+                
+                # Una fila que el servidor rechaza no debe frenar a las demás del
+                # lote: se reenvían de a una mientras el circuito lo permita
+                for i, row in enumerate(rows):
+                    if not self.breaker.allow():
+                        self._mark_failed(rows[i:], message)
+                        break
+                    
+                    success, row_message, ids = self._send(username, [row])
+                    if success:
+                        self.breaker.record_success()
+                        self._mark_delivered([row], row_message, ids)
+                        delivered += 1
+                    else:
+                        self.breaker.record_failure()
+                        self._mark_failed([row], row_message)
+            
+            return delivered
+    
+    def _send(self, username: str, rows: List[tuple]) -> Tuple[bool, str, Dict[str, int]]:
+        """Envía filas de la bandeja con send_fn; una excepción cuenta como fallo"""
+        try:
+            return self._send_fn(username, [json.loads(r[3]) for r in rows])
+        except Exception as e:
+            return False, f"❌ Error: {str(e)}", {}
+    
+    def _mark_delivered(self, rows: List[tuple], message: str, ids: Dict[str, int]):
+        """Borra de la bandeja las filas confirmadas y resuelve sus acuses"""
+        conn = self._get_connection()
+        conn.executemany("DELETE FROM outbox WHERE id = ?", [(r[0],) for r in rows])
+        conn.commit()
+        conn.close()
+        
+        for r in rows:
+            self._resolve(r[1], (True, message, ids.get(r[1])))
+    
+    def _mark_failed(self, rows: List[tuple], message: str):
+        """Programa el siguiente reintento con backoff exponencial y jitter"""
+        now = time.time()
+        updates = []
+        exhausted = []
+        for r in rows:
+            attempts = r[4] + 1
+            if attempts >= self.max_attempts:
+                updates.append(('failed', attempts, now, message, r[0]))
+                exhausted.append(r[1])
+            else:
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+                delay *= random.uniform(0.5, 1.0)
+                updates.append(('pending', attempts, now + delay, message, r[0]))
+        
+        conn = self._get_connection()
+        conn.executemany("""
+            UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, last_error = ?
+            WHERE id = ?
+        """, updates)
+        conn.commit()
+        conn.close()
+        
+        # Después de guardar el estado: quien recibe el acuse ya ve la fila como fallida
+        for client_id in exhausted:
+            self._resolve(client_id, (False, message, None))
+    
+    def _resolve(self, client_id: str, result: Tuple[bool, str, Optional[int]]):
+        """Resuelve el acuse de una fila si fue agregada en este proceso"""
+        with self._futures_lock:
+            future = self._futures.pop(client_id, None)
+        if future is not None:
+            future.set_result(result)
+    
+    def _next_due_in(self) -> Optional[float]:
+        """Segundos hasta el próximo reintento pendiente (None si no hay)"""
+        conn = self._get_connection()
+        row = conn.execute(
+            "SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'"
+        ).fetchone()
+        conn.close()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+    
+    def _run(self):
+        """Bucle del hilo de fondo: espera filas nuevas o reintentos vencidos"""
+        while not self._closed:
+            wait = self._next_due_in()
+            if wait is not None and self.breaker.state == 'open':
+                wait = max(wait, self.breaker.reset_timeout)
+            
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+            if self._closed:
+                return
+            
+            # Dar tiempo a que lleguen más filas para enviarlas juntas
+            time.sleep(self.window)
+            try:
+                self.replay()
+            except Exception as e:
+                print(f"❌ Error reenviando la bandeja de salida: {e}")
+                time.sleep(self.base_delay)
+    
+    def close(self, timeout: float = None):
+        """Detiene el hilo de fondo; lo pendiente queda en disco para el próximo inicio"""
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout)
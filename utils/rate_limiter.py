@@ -0,0 +1,43 @@
+"""
+Limitador de tasa tipo token bucket
+Mantiene los envíos por debajo del límite por segundo del proveedor
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Cubeta de fichas compartida entre hilos
+    
+    Se recargan rate fichas por segundo hasta un máximo de capacity; cada
+    envío consume una. capacity permite ráfagas cortas sin superar la tasa
+    promedio.
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: Fichas por segundo (envíos por segundo permitidos)
+            capacity: Máximo de fichas acumuladas (tamaño de ráfaga)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0):
+        """Espera hasta que haya fichas suficientes y las consume"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            
+            time.sleep(wait)
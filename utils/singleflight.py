@@ -0,0 +1,70 @@
+"""
+Agrupación de peticiones idénticas concurrentes (singleflight)
+Si varias llamadas piden la misma clave a la vez, solo una va al servidor
+"""
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Comparte una sola ejecución entre llamadas concurrentes con la misma clave
+    
+    La primera llamada (líder) ejecuta la función; las que llegan mientras
+    sigue en curso esperan y reciben el mismo resultado o la misma excepción.
+    En cuanto termina, la clave se libera y la siguiente llamada vuelve a
+    ejecutar: no es una caché.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._calls = 0
+        self._executions = 0
+    
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """
+        Ejecuta fn(*args, **kwargs) o espera a la ejecución en curso de key
+        
+        Returns:
+            El resultado de fn (compartido entre las llamadas agrupadas)
+        """
+        with self._lock:
+            self._calls += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self._executions += 1
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+    
+    def stats(self) -> Dict:
+        """
+        Métricas de agrupación
+        
+        Returns:
+            Dict con keys: llamadas, ejecuciones, agrupadas, en_curso
+        """
+        with self._lock:
+            return {
+                'llamadas': self._calls,
+                'ejecuciones': self._executions,
+                'agrupadas': self._calls - self._executions,
+                'en_curso': len(self._in_flight)
+            }
@@ -0,0 +1,114 @@
+"""
+Sesión SMTP reutilizable para envíos por lote
+Conecta, hace STARTTLS y login una sola vez y envía muchos mensajes
+"""
+import smtplib
+import ssl
+from typing import List, Optional, Union
+
+
+class SMTPSession:
+    """
+    Conexión SMTP autenticada que se reutiliza entre mensajes
+    
+    La conexión se abre con el primer envío. Si el servidor la corta, se
+    reconecta y se reintenta el mensaje una vez. Tras max_messages mensajes
+    se cierra y se abre otra, porque muchos proveedores limitan los
+    mensajes por conexión (Gmail, por ejemplo, corta cerca de los 100).
+    """
+    
+    def __init__(self,
+                 smtp_server: str,
+                 smtp_port: int,
+                 sender_email: str,
+                 sender_password: str,
+                 max_messages: int = 90,
+                 timeout: float = 30.0,
+                 use_tls: bool = True):
+        """
+        Args:
+            smtp_server: Servidor SMTP
+            smtp_port: Puerto SMTP (587 para STARTTLS)
+            sender_email: Cuenta con la que se inicia sesión
+            sender_password: Contraseña (de aplicación) de la cuenta
+            max_messages: Mensajes por conexión antes de reconectar
+            timeout: Segundos máximos por operación de red
+            use_tls: Hacer STARTTLS (desactivar solo con servidores locales de prueba)
+        """
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self.use_tls = use_tls
+        
+        self._server: Optional[smtplib.SMTP] = None
+        self._sent_on_connection = 0
+        self.connections = 0
+        self.messages_sent = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _connect(self):
+        """Abre la conexión: EHLO, STARTTLS, EHLO y login"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.use_tls:
+                server.starttls(context=ssl.create_default_context())
+                server.ehlo()
+            server.login(self.sender_email, self.sender_password)
+        except Exception:
+            server.close()
+            raise
+        
+        self._server = server
+        self._sent_on_connection = 0
+        self.connections += 1
+    
+    def close(self):
+        """Cierra la conexión actual (si hay una)"""
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except smtplib.SMTPException:
+            self._server.close()
+        except OSError:
+            pass
+        self._server = None
+    
+    def send(self, from_addr: str, to_addrs: Union[str, List[str]], message: str):
+        """
+        Envía un mensaje por la conexión abierta
+        
+        Los rechazos del destinatario (SMTPRecipientsRefused y similares) se
+        propagan sin cerrar la conexión; los cortes se reintentan una vez
+        con una conexión nueva.
+        """
+        if self._server is not None and self._sent_on_connection >= self.max_messages:
+            self.close()
+        
+        for attempt in range(2):
+            if self._server is None:
+                self._connect()
+            try:
+                self._server.sendmail(from_addr, to_addrs, message)
+                break
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self._server = None
+                if attempt == 1:
+                    raise
+            except smtplib.SMTPResponseException as e:
+                # 421: el servidor cierra la conexión (por ejemplo, por límite de mensajes)
+                if e.smtp_code != 421 or attempt == 1:
+                    raise
+                self.close()
+        
+        self._sent_on_connection += 1
+        self.messages_sent += 1
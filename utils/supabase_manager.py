@@ -2,11 +2,28 @@
 🔥 Supabase Manager - Persistencia en la Nube
 Base de datos PostgreSQL que NUNCA pierde datos
 """
+import atexit
 import os
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, List, Tuple
+from typing import TYPE_CHECKING, Optional, Dict, Iterator, List, Tuple
 import hashlib
-from supabase import create_client, Client
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+from .client_pool import ClientPool
+from .delta_sync import DeltaSync
+from .login_tracker import LastLoginTracker
+from .monthly_stats_cache import MonthlyStatsCache
+from .outbox import Outbox
+from .singleflight import SingleFlight
+from .transaction_cache import TransactionCache
+
+
+# Filas por página al paginar transacciones (PostgREST limita a 1000 por defecto)
+PAGE_SIZE = 1000
 
 
 class SupabaseManager:
@@ -17,8 +34,49 @@ class SupabaseManager:
     ✅ Gratis hasta 500MB
     """
     
-    def __init__(self):
-        """Inicializa conexión a Supabase"""
+    def __init__(self, cache_ttl: float = 30.0, cache_max_users: int = 256, max_workers: int = 4,
+                 outbox_path: str = "data/outbox.db", outbox_window: float = 0.2,
+                 replica_path: str = "data/replica.db", client=None,
+                 pool_size: int = 8, pool_timeout: float = 10.0,
+                 last_login_delay: float = 30.0, stats_path: str = "data/monthly_stats.db"):
+        """
+        Inicializa conexión a Supabase
+        
+        Args:
+            cache_ttl: Segundos que se reutilizan las transacciones leídas
+            cache_max_users: Máximo de usuarios con transacciones en caché
+            max_workers: Máximo de peticiones concurrentes a Supabase
+            outbox_path: Archivo SQLite de la bandeja de salida local
+            outbox_window: Segundos que se juntan inserciones antes de enviarlas
+            replica_path: Archivo SQLite de la réplica local de transacciones
+            client: Cliente ya creado (por ejemplo FakeSupabaseClient); si se
+                pasa, no se leen credenciales y el pool lo comparte
+            pool_size: Máximo de clientes (y peticiones simultáneas) en el pool
+            pool_timeout: Segundos máximos esperando un cliente libre
+            last_login_delay: Segundos máximos que last_login tarda en guardarse
+            stats_path: Archivo SQLite de la caché de estadísticas de meses cerrados
+        """
+        # Cada cliente tiene su propio pool HTTP; las peticiones toman uno
+        # libre solo mientras se ejecutan
+        factory = (lambda: client) if client is not None else self._create_client
+        self.client = ClientPool(factory, max_size=pool_size, timeout=pool_timeout)
+        self.cache = TransactionCache(ttl=cache_ttl, max_users=cache_max_users)
+        self.monthly_stats = MonthlyStatsCache(stats_path)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="misti-supabase")
+        self.outbox = Outbox(self._insert_transactions, db_path=outbox_path, window=outbox_window)
+        atexit.register(self.outbox.close)
+        self.replica = DeltaSync(db_path=replica_path, page_size=PAGE_SIZE, executor=self._executor)
+        self._flights = SingleFlight()
+        self.last_login = LastLoginTracker(self._save_last_logins, max_delay=last_login_delay)
+        atexit.register(self.last_login.close)
+        print("✅ Conectado a Supabase")
+    
+    @staticmethod
+    def _create_client() -> "Client":
+        """Crea el cliente real con las credenciales de secrets o del entorno"""
+        # El SDK se importa solo al crear un cliente real (el Supabase en memoria no lo necesita)
+        from supabase import create_client
+        
         # Obtener credenciales desde secrets de Streamlit O variables de entorno (Railway)
         supabase_url = None
         supabase_key = None
@@ -36,8 +94,7 @@ class SupabaseManager:
         if not supabase_url or not supabase_key:
             raise ValueError("❌ Faltan credenciales de Supabase. Configura secrets.toml o variables de entorno")
         
-        self.client: Client = create_client(supabase_url, supabase_key)
-        print("✅ Conectado a Supabase")
+        return create_client(supabase_url, supabase_key)
     
     def _hash_password(self, password: str) -> str:
         """Hashea contraseña con SHA-256"""
@@ -105,8 +162,8 @@ class SupabaseManager:
             
             user = result.data[0]
             
-            # Actualizar último login
-            self.client.table('users').update({'last_login': datetime.now().isoformat()}).eq('username', username).execute()
+            # Actualizar último login (se envía en el próximo lote)
+            self.last_login.touch(username, datetime.now().isoformat())
             
             return True, user
             
@@ -115,56 +172,345 @@ class SupabaseManager:
             return False, None
     
     def get_user_by_username(self, username: str) -> Optional[Dict]:
-        """Obtiene datos de un usuario"""
+        """
+        Obtiene datos de un usuario
+        
+        Las llamadas concurrentes para el mismo usuario comparten una sola petición.
+        """
         try:
-            result = self.client.table('users').select('*').eq('username', username).execute()
-            return result.data[0] if result.data else None
+            user = self._flights.do(('user', username), self._fetch_user, username)
+            if not user:
+                return None
+            
+            user = dict(user)
+            pending = self.last_login.pending(username)
+            if pending:
+                user['last_login'] = pending
+            return user
         except:
             return None
     
+    def get_users_with_email(self, page_size: int = PAGE_SIZE) -> List[Dict]:
+        """
+        Lista los usuarios con email registrado (para los resúmenes mensuales)
+        
+        Returns:
+            Usuarios con keys username, full_name y email, ordenados por username
+        """
+        users = []
+        last = None
+        while True:
+            query = self.client.table('users')\
+                .select('username, full_name, email')\
+                .neq('email', '')
+            if last is not None:
+                query = query.gt('username', last)
+            
+            page = query.order('username').limit(page_size).execute().data or []
+            users.extend(user for user in page if user.get('email'))
+            
+            if len(page) < page_size:
+                return users
+            last = page[-1]['username']
+    
+    def _save_last_logins(self, logins: Dict[str, str]):
+        """Envía un lote de last_login en una sola llamada a touch_last_login (ver SQL_SETUP)"""
+        self.client.rpc('touch_last_login', {'p_logins': logins}).execute()
+    
+    def _fetch_user(self, username: str) -> Optional[Dict]:
+        """Pide a Supabase los datos de un usuario"""
+        result = self.client.table('users').select('*').eq('username', username).execute()
+        return result.data[0] if result.data else None
+    
     # ==================== TRANSACCIONES ====================
     
     def add_transaction(self, username: str, transaction_data: Dict) -> Tuple[bool, str]:
         """
         Agrega transacción para un usuario
         
+        La transacción se guarda primero en la bandeja de salida local y se
+        envía a Supabase en segundo plano, así que un corte de red no la
+        pierde: se reintenta hasta que la nube la confirme.
+        
         Args:
             username: Usuario dueño de la transacción
             transaction_data: Dict con keys: tipo, categoria, monto, descripcion, fecha
         """
         try:
-            # Agregar username y timestamp
-            transaction_data['username'] = username
-            transaction_data['created_at'] = datetime.now().isoformat()
-            
-            # Insertar en Supabase
-            self.client.table('transactions').insert(transaction_data).execute()
-            
+            self.enqueue_transaction(username, transaction_data)
             return True, "✅ Transacción guardada"
             
         except Exception as e:
             return False, f"❌ Error: {str(e)}"
     
-    def get_user_transactions(self, username: str, limit: int = 100) -> List[Dict]:
+    def add_transactions(self, username: str, rows: List[Dict]) -> Tuple[bool, str]:
+        """
+        Agrega varias transacciones de un usuario en una sola inserción
+        
+        Cada fila lleva un client_id único; si una fila ya se había guardado
+        (por ejemplo, al reintentar tras un corte) no se duplica.
+        
+        Args:
+            username: Usuario dueño de las transacciones
+            rows: Lista de dicts con keys: tipo, categoria, monto, descripcion, fecha
+        """
+        success, message, _ = self._insert_transactions(username, rows)
+        return success, message
+    
+    def _insert_transactions(self, username: str, rows: List[Dict]) -> Tuple[bool, str, Dict[str, int]]:
+        """
+        Inserción de add_transactions que además devuelve los ids asignados
+        
+        Es la función de envío de la bandeja: con los ids, quien encoló una
+        fila puede completarla en su vista sin volver a descargar nada.
+        
+        Returns:
+            (success, message, ids) con ids: client_id → id en Supabase
+        """
+        if not rows:
+            return True, "✅ Nada que guardar", {}
+        
+        try:
+            created_at = datetime.now().isoformat()
+            payload = [
+                {
+                    'created_at': created_at,
+                    'client_id': str(uuid.uuid4()),
+                    **row,
+                    'username': username
+                }
+                for row in rows
+            ]
+            
+            result = self.client.table('transactions')\
+                .upsert(payload, on_conflict='client_id', ignore_duplicates=True)\
+                .execute()
+            ids = {row['client_id']: row['id'] for row in result.data or []}
+            
+            # Las filas ya guardadas en un intento anterior no vuelven en la respuesta
+            missing = [row['client_id'] for row in payload if row['client_id'] not in ids]
+            if missing:
+                result = self.client.table('transactions')\
+                    .select('id, client_id')\
+                    .in_('client_id', missing)\
+                    .execute()
+                ids.update({row['client_id']: row['id'] for row in result.data or []})
+            
+            return True, f"✅ {len(rows)} transacciones guardadas", ids
+            
+        except Exception as e:
+            return False, f"❌ Error: {str(e)}", {}
+        finally:
+            self.cache.invalidate(username)
+            for fecha in {row.get('fecha') for row in rows}:
+                self.monthly_stats.invalidate(username, fecha)
+    
+    def enqueue_transaction(self, username: str, transaction_data: Dict) -> Future:
+        """
+        Guarda una transacción en la bandeja de salida para enviarla en segundo plano
+        
+        La escritura local es inmediata; las transacciones que llegan en la
+        misma ventana se envían juntas con add_transactions.
+        
+        Returns:
+            Future que se resuelve con (success, message, id) cuando Supabase
+            la confirma (id es el que asignó Supabase, None si falló)
+        """
+        row = {**transaction_data, 'created_at': datetime.now().isoformat()}
+        future = self.outbox.add(username, row)
+        # Una transacción con fecha pasada cambia las estadísticas de ese mes
+        self.monthly_stats.invalidate(username, transaction_data.get('fecha'))
+        return future
+    
+    def get_sync_status(self, username: str) -> Dict:
+        """
+        Estado de la sincronización con Supabase
+        
+        Returns:
+            Dict con keys: pendientes (filas en la bandeja), fallidas (filas
+            que agotaron los reintentos, ver retry_failed_transactions) y
+            circuito ('closed', 'open' o 'half-open')
+        """
+        return {
+            'pendientes': self.outbox.size(username),
+            'fallidas': self.outbox.size(username, status='failed'),
+            'circuito': self.outbox.breaker.state
+        }
+    
+    def retry_failed_transactions(self, username: str) -> int:
+        """Vuelve a encolar las transacciones del usuario que agotaron los reintentos"""
+        return self.outbox.retry_failed(username)
+    
+    def get_user_transactions(self, username: str, limit: Optional[int] = 100,
+                              fresh: bool = False) -> List[Dict]:
         """
         Obtiene transacciones de un usuario
         
+        Las lecturas se sirven desde la caché mientras sigan frescas y
+        ninguna escritura del usuario las haya invalidado, y las lecturas
+        concurrentes iguales comparten una sola petición. Las transacciones
+        que siguen en la bandeja de salida se agregan marcadas como pendientes.
+        
+        El historial completo (limit=None) sale de la réplica local, que solo
+        descarga los cambios desde la última sincronización. Sin conexión se
+        devuelve la última copia sincronizada.
+        
+        Args:
+            username: Usuario dueño de las transacciones
+            limit: Máximo de transacciones; None trae el historial completo
+            fresh: Ir siempre al servidor, sin caché ni lecturas ya en curso
+                (para resultados que se guardan por tiempo indefinido)
+        
         Returns:
             Lista de transacciones ordenadas por fecha (más recientes primero)
         """
+        cached = None if fresh else self.cache.get(username, ('transactions', limit))
+        if cached is not None:
+            return self._with_pending(username, cached, limit)
+        
         try:
+            # La versión va en la clave: quien llega después de una escritura
+            # no se suma a una lectura que empezó antes
+            version = self.cache.version(username)
+            if fresh:
+                return self._with_pending(username, self._load_transactions(username, limit, version), limit)
+            transactions = self._flights.do(
+                ('transactions', username, limit, version),
+                self._load_transactions, username, limit, version
+            )
+            return self._with_pending(username, transactions, limit)
+            
+        except Exception as e:
+            print(f"❌ Error obteniendo transacciones: {e}")
+            # Sin conexión se muestra al menos lo guardado localmente
+            return self._with_pending(username, [], limit)
+    
+    def _load_transactions(self, username: str, limit: Optional[int], version: int) -> List[Dict]:
+        """Lee las transacciones del servidor (o de la réplica) y las guarda en caché"""
+        if limit is None:
+            try:
+                self.replica.sync(self.client, username)
+            except Exception as e:
+                print(f"⚠️ Sin sincronizar, usando la réplica local: {e}")
+            transactions = self.replica.get_transactions(username)
+        else:
             result = self.client.table('transactions')\
                 .select('*')\
                 .eq('username', username)\
                 .order('fecha', desc=True)\
+                .order('id', desc=True)\
                 .limit(limit)\
                 .execute()
+            transactions = result.data if result.data else []
+        
+        self.cache.put(username, ('transactions', limit), version, transactions)
+        return transactions
+    
+    def get_pool_stats(self) -> Dict:
+        """
+        Métricas del pool de clientes
+        
+        Returns:
+            Dict con keys: max_size, creados, en_uso, libres, checkouts,
+            esperas, espera_total, espera_max, timeouts
+        """
+        return self.client.stats()
+    
+    def get_coalescing_stats(self) -> Dict:
+        """
+        Métricas de las lecturas agrupadas
+        
+        Returns:
+            Dict con keys: llamadas, ejecuciones, agrupadas, en_curso
+        """
+        return self._flights.stats()
+    
+    def _with_pending(self, username: str, transactions: List[Dict], limit: Optional[int]) -> List[Dict]:
+        """Agrega a la lista las transacciones que aún esperan en la bandeja de salida"""
+        pending = self.outbox.pending_rows(username)
+        if not pending:
+            return list(transactions)
+        
+        # Una fila puede estar ya en Supabase y todavía en la bandeja
+        delivered = {t.get('client_id') for t in transactions}
+        extra = [
+            {**row, 'username': username, 'pendiente': True}
+            for row in pending if row['client_id'] not in delivered
+        ]
+        
+        merged = sorted(extra + list(transactions), key=lambda t: t['fecha'], reverse=True)
+        return merged[:limit] if limit else merged
+    
+    def iter_user_transactions(self, username: str, page_size: int = PAGE_SIZE) -> Iterator[Dict]:
+        """
+        Recorre todas las transacciones de un usuario pidiendo páginas a demanda
+        
+        Usa paginación por clave (fecha, id): cada página continúa después de
+        la última fila recibida, así que no se saltan ni repiten filas aunque
+        se inserten transacciones mientras se recorre.
+        
+        Args:
+            username: Usuario dueño de las transacciones
+            page_size: Filas por petición
+        
+        Yields:
+            Transacciones de la más reciente a la más antigua
+        """
+        last = None
+        while True:
+            query = self.client.table('transactions')\
+                .select('*')\
+                .eq('username', username)
+            
+            if last is not None:
+                query = query.or_(
+                    f"fecha.lt.{last['fecha']},"
+                    f"and(fecha.eq.{last['fecha']},id.lt.{last['id']})"
+                )
+            
+            result = query\
+                .order('fecha', desc=True)\
+                .order('id', desc=True)\
+                .limit(page_size)\
+                .execute()
             
-            return result.data if result.data else []
+            page = result.data or []
+            yield from page
             
-        except Exception as e:
-            print(f"❌ Error obteniendo transacciones: {e}")
-            return []
+            if len(page) < page_size:
+                return
+            last = page[-1]
+    
+    def iter_transactions_between(self, desde: str, hasta: str, page_size: int = PAGE_SIZE) -> Iterator[Dict]:
+        """
+        Recorre las transacciones de todos los usuarios en un rango de fechas
+        
+        Pagina por id, así una sola pasada alcanza para armar los resúmenes
+        mensuales de todos los usuarios.
+        
+        Args:
+            desde: Fecha inicial incluida (YYYY-MM-DD)
+            hasta: Fecha final excluida (YYYY-MM-DD)
+            page_size: Filas por petición
+        
+        Yields:
+            Transacciones en orden de id
+        """
+        last_id = None
+        while True:
+            query = self.client.table('transactions')\
+                .select('*')\
+                .gte('fecha', desde)\
+                .lt('fecha', hasta)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            
+            page = query.order('id').limit(page_size).execute().data or []
+            yield from page
+            
+            if len(page) < page_size:
+                return
+            last_id = page[-1]['id']
     
     def delete_transaction(self, transaction_id: int, username: str) -> Tuple[bool, str]:
         """
@@ -183,12 +529,16 @@ class SupabaseManager:
                 .execute()
             
             if result.data:
+                self.replica.forget(username, transaction_id)
+                self.monthly_stats.invalidate(username, result.data[0].get('fecha'))
                 return True, "✅ Transacción eliminada"
             else:
                 return False, "❌ Transacción no encontrada"
                 
         except Exception as e:
             return False, f"❌ Error: {str(e)}"
+        finally:
+            self.cache.invalidate(username)
     
     def update_transaction(self, transaction_id: int, username: str, updated_data: Dict) -> Tuple[bool, str]:
         """
@@ -205,18 +555,29 @@ class SupabaseManager:
                 .execute()
             
             if result.data:
+                # La fecha anterior no se conoce: se descartan todos los meses del usuario
+                self.monthly_stats.invalidate_user(username)
                 return True, "✅ Transacción actualizada"
             else:
                 return False, "❌ Transacción no encontrada"
                 
         except Exception as e:
             return False, f"❌ Error: {str(e)}"
+        finally:
+            self.cache.invalidate(username)
+    
+    # Nombres de utils.backend.TransactionBackend
+    save_transaction = add_transaction
+    remove_transaction = delete_transaction
     
     # ==================== PRESUPUESTOS ====================
     
     def set_budget(self, username: str, categoria: str, monto: float, mes: int, anio: int) -> Tuple[bool, str]:
         """
         Establece presupuesto para una categoría
+        
+        Usa un upsert sobre la clave única (username, categoria, mes, anio),
+        así que crear o actualizar cuesta una sola petición.
         """
         try:
             budget_data = {
@@ -224,34 +585,51 @@ class SupabaseManager:
                 'categoria': categoria,
                 'monto': monto,
                 'mes': mes,
-                'anio': anio,
-                'created_at': datetime.now().isoformat()
+                'anio': anio
             }
             
-            # Verificar si ya existe
-            existing = self.client.table('budgets')\
-                .select('*')\
-                .eq('username', username)\
-                .eq('categoria', categoria)\
-                .eq('mes', mes)\
-                .eq('anio', anio)\
+            self.client.table('budgets')\
+                .upsert(budget_data, on_conflict='username,categoria,mes,anio')\
                 .execute()
             
-            if existing.data:
-                # Actualizar
-                self.client.table('budgets')\
-                    .update({'monto': monto})\
-                    .eq('id', existing.data[0]['id'])\
-                    .execute()
-            else:
-                # Insertar
-                self.client.table('budgets').insert(budget_data).execute()
-            
             return True, f"✅ Presupuesto de {categoria} establecido"
             
         except Exception as e:
             return False, f"❌ Error: {str(e)}"
     
+    def copy_budgets_from_previous_month(self, username: str, mes: int, anio: int) -> Tuple[bool, str]:
+        """
+        Copia los presupuestos del mes anterior al mes indicado
+        
+        Los presupuestos que ya existan en el mes destino se sobrescriben.
+        """
+        try:
+            prev_mes, prev_anio = (12, anio - 1) if mes == 1 else (mes - 1, anio)
+            previous = self.get_budgets(username, prev_mes, prev_anio)
+            
+            if not previous:
+                return False, "❌ No hay presupuestos en el mes anterior"
+            
+            rows = [
+                {
+                    'username': username,
+                    'categoria': budget['categoria'],
+                    'monto': budget['monto'],
+                    'mes': mes,
+                    'anio': anio
+                }
+                for budget in previous
+            ]
+            
+            self.client.table('budgets')\
+                .upsert(rows, on_conflict='username,categoria,mes,anio')\
+                .execute()
+            
+            return True, f"✅ {len(rows)} presupuestos copiados"
+            
+        except Exception as e:
+            return False, f"❌ Error: {str(e)}"
+    
     def get_budgets(self, username: str, mes: int, anio: int) -> List[Dict]:
         """Obtiene presupuestos de un usuario para un mes específico"""
         try:
@@ -268,25 +646,96 @@ class SupabaseManager:
             print(f"❌ Error obteniendo presupuestos: {e}")
             return []
     
+    def get_budget_vs_actual(self, username: str, mes: int, anio: int) -> List[Dict]:
+        """
+        Compara presupuesto y gasto real por categoría en un mes
+        
+        Se resuelve en una sola llamada a la función get_budget_vs_actual
+        (ver SQL_SETUP). Incluye categorías con gasto pero sin presupuesto.
+        
+        Returns:
+            Lista de dicts con keys: categoria, presupuesto, gastado, restante
+        """
+        try:
+            result = self.client.rpc('get_budget_vs_actual', {
+                'p_username': username,
+                'p_mes': mes,
+                'p_anio': anio
+            }).execute()
+            
+            return [
+                {
+                    'categoria': row['categoria'],
+                    'presupuesto': float(row['presupuesto'] or 0),
+                    'gastado': float(row['gastado'] or 0),
+                    'restante': float(row['restante'] or 0)
+                }
+                for row in (result.data or [])
+            ]
+            
+        except Exception as e:
+            print(f"❌ Error obteniendo presupuesto vs gasto: {e}")
+            return []
+    
+    # ==================== DASHBOARD ====================
+    
+    def load_dashboard_snapshot(self, username: str, mes: Optional[int] = None,
+                                anio: Optional[int] = None,
+                                with_transactions: bool = True) -> Dict:
+        """
+        Carga en paralelo los datos que necesita el dashboard
+        
+        El perfil y los presupuestos se piden en el pool de hilos mientras
+        este hilo descarga las transacciones, así la carga tarda lo que la
+        petición más lenta y no la suma de todas.
+        
+        Args:
+            username: Usuario dueño de los datos
+            mes: Mes de los presupuestos (por defecto el actual)
+            anio: Año de los presupuestos (por defecto el actual)
+            with_transactions: False si quien llama ya tiene las transacciones
+                (la app las guarda en su propio DataFrame versionado)
+        
+        Returns:
+            Dict con keys: user, transactions (None si no se pidieron), budgets
+        """
+        now = datetime.now()
+        mes = mes or now.month
+        anio = anio or now.year
+        
+        user_future = self._executor.submit(self.get_user_by_username, username)
+        budgets_future = self._executor.submit(self.get_budget_vs_actual, username, mes, anio)
+        
+        # Mientras tanto este hilo sincroniza la réplica local: solo pide a
+        # Supabase los cambios desde la última sincronización de este usuario
+        transactions = self.get_user_transactions(username, limit=None) if with_transactions else None
+        
+        return {
+            'user': user_future.result(),
+            'transactions': transactions,
+            'budgets': budgets_future.result()
+        }
+    
     # ==================== ESTADÍSTICAS ====================
     
     def get_user_stats(self, username: str) -> Dict:
         """
         Obtiene estadísticas generales del usuario
+        
+        Los totales se calculan en Postgres con la función get_user_stats
+        (ver SQL_SETUP), así que solo viaja una fila sin importar el
+        tamaño del historial.
         """
         try:
-            transactions = self.get_user_transactions(username, limit=1000)
-            
-            total_ingresos = sum(t['monto'] for t in transactions if t['tipo'] == 'Ingreso')
-            total_gastos = sum(t['monto'] for t in transactions if t['tipo'] == 'Gasto')
-            balance = total_ingresos - total_gastos
+            result = self.client.rpc('get_user_stats', {'p_username': username}).execute()
+            row = result.data[0] if result.data else {}
             
             return {
-                'total_transactions': len(transactions),
-                'total_ingresos': total_ingresos,
-                'total_gastos': total_gastos,
-                'balance': balance,
-                'last_transaction': transactions[0]['fecha'] if transactions else None
+                'total_transactions': int(row.get('total_transactions') or 0),
+                'total_ingresos': float(row.get('total_ingresos') or 0),
+                'total_gastos': float(row.get('total_gastos') or 0),
+                'balance': float(row.get('balance') or 0),
+                'last_transaction': row.get('last_transaction')
             }
             
         except Exception as e:
@@ -300,10 +749,55 @@ class SupabaseManager:
             }
 
 
+# ==================== CONSULTAS ====================
+# SQL estándar que corre igual en Postgres y en SQLite. {username} es el
+# parámetro: p_username dentro de la función de Postgres o :p_username al
+# probarla en SQLite, por ejemplo:
+#   conn.execute(USER_STATS_QUERY.format(username=':p_username'), {'p_username': 'ana'})
+# tipo se compara en minúsculas porque hay filas 'Gasto' y 'gasto'.
+
+USER_STATS_QUERY = """
+    SELECT
+        COUNT(*) AS total_transactions,
+        COALESCE(SUM(CASE WHEN LOWER(tipo) = 'ingreso' THEN monto ELSE 0 END), 0) AS total_ingresos,
+        COALESCE(SUM(CASE WHEN LOWER(tipo) = 'gasto' THEN monto ELSE 0 END), 0) AS total_gastos,
+        COALESCE(SUM(CASE WHEN LOWER(tipo) = 'ingreso' THEN monto
+                          WHEN LOWER(tipo) = 'gasto' THEN -monto
+                          ELSE 0 END), 0) AS balance,
+        MAX(fecha) AS last_transaction
+    FROM transactions
+    WHERE username = {username}
+"""
+
+# Presupuesto vs gasto real de un mes. {desde} y {hasta} limitan fecha al mes
+# [desde, hasta); en Postgres se calculan con make_date a partir de p_mes y p_anio.
+BUDGET_VS_ACTUAL_QUERY = """
+    SELECT
+        COALESCE(b.categoria, g.categoria) AS categoria,
+        COALESCE(b.monto, 0) AS presupuesto,
+        COALESCE(g.gastado, 0) AS gastado,
+        COALESCE(b.monto, 0) - COALESCE(g.gastado, 0) AS restante
+    FROM (
+        SELECT categoria, monto
+        FROM budgets
+        WHERE username = {username} AND mes = {mes} AND anio = {anio}
+    ) b
+    FULL OUTER JOIN (
+        SELECT categoria, SUM(monto) AS gastado
+        FROM transactions
+        WHERE username = {username}
+          AND LOWER(tipo) = 'gasto'
+          AND fecha >= {desde} AND fecha < {hasta}
+        GROUP BY categoria
+    ) g ON g.categoria = b.categoria
+    ORDER BY categoria
+"""
+
+
 # ==================== SQL SETUP ====================
 # Ejecuta esto en el SQL Editor de Supabase para crear las tablas:
 
-SQL_SETUP = """
+SQL_SETUP = f"""
 -- Tabla de usuarios
 CREATE TABLE IF NOT EXISTS users (
     id SERIAL PRIMARY KEY,
@@ -325,9 +819,61 @@ CREATE TABLE IF NOT EXISTS transactions (
     descripcion TEXT,
     fecha DATE NOT NULL,
     created_at TIMESTAMP DEFAULT NOW(),
-    updated_at TIMESTAMP
+    updated_at TIMESTAMP,
+    client_id UUID UNIQUE
 );
 
+-- Clave de idempotencia para los reenvíos de la bandeja de salida (tablas existentes)
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS client_id UUID UNIQUE;
+
+-- Sincronización por deltas: updated_at lo fija el servidor en cada cambio
+UPDATE transactions SET updated_at = COALESCE(created_at, NOW()) WHERE updated_at IS NULL;
+ALTER TABLE transactions ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE transactions ALTER COLUMN updated_at SET NOT NULL;
+
+CREATE OR REPLACE FUNCTION touch_transaction_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_transactions_updated_at ON transactions;
+CREATE TRIGGER trg_transactions_updated_at
+    BEFORE INSERT OR UPDATE ON transactions
+    FOR EACH ROW EXECUTE FUNCTION touch_transaction_updated_at();
+
+-- Lápidas de transacciones borradas, para propagar borrados a las réplicas
+CREATE TABLE IF NOT EXISTS transaction_tombstones (
+    id INT PRIMARY KEY,
+    username VARCHAR(50) NOT NULL,
+    deleted_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- SECURITY DEFINER: el trigger escribe la lápida aunque quien borra no
+-- tenga permisos sobre transaction_tombstones (RLS activo y sin políticas)
+CREATE OR REPLACE FUNCTION record_transaction_tombstone()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    INSERT INTO transaction_tombstones (id, username)
+    VALUES (OLD.id, OLD.username)
+    ON CONFLICT (id) DO UPDATE SET deleted_at = NOW();
+    RETURN OLD;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_transactions_tombstone ON transactions;
+CREATE TRIGGER trg_transactions_tombstone
+    AFTER DELETE ON transactions
+    FOR EACH ROW EXECUTE FUNCTION record_transaction_tombstone();
+
 -- Tabla de presupuestos
 CREATE TABLE IF NOT EXISTS budgets (
     id SERIAL PRIMARY KEY,
@@ -343,10 +889,54 @@ CREATE TABLE IF NOT EXISTS budgets (
 -- Índices para mejorar performance
 CREATE INDEX IF NOT EXISTS idx_transactions_username ON transactions(username);
 CREATE INDEX IF NOT EXISTS idx_transactions_fecha ON transactions(fecha DESC);
+CREATE INDEX IF NOT EXISTS idx_transactions_username_fecha_id ON transactions(username, fecha DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_transactions_username_updated_id ON transactions(username, updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_tombstones_username_deleted ON transaction_tombstones(username, deleted_at);
 CREATE INDEX IF NOT EXISTS idx_budgets_username ON budgets(username);
 
+-- Estadísticas por usuario calculadas en el servidor
+CREATE OR REPLACE FUNCTION get_user_stats(p_username VARCHAR)
+RETURNS TABLE (
+    total_transactions BIGINT,
+    total_ingresos NUMERIC,
+    total_gastos NUMERIC,
+    balance NUMERIC,
+    last_transaction DATE
+)
+LANGUAGE sql STABLE
+AS $${USER_STATS_QUERY.format(username='p_username')}$$;
+
+-- Presupuesto vs gasto real por categoría en un mes
+CREATE OR REPLACE FUNCTION get_budget_vs_actual(p_username VARCHAR, p_mes INT, p_anio INT)
+RETURNS TABLE (
+    categoria VARCHAR,
+    presupuesto NUMERIC,
+    gastado NUMERIC,
+    restante NUMERIC
+)
+LANGUAGE sql STABLE
+AS $${BUDGET_VS_ACTUAL_QUERY.format(
+    username='p_username',
+    mes='p_mes',
+    anio='p_anio',
+    desde='make_date(p_anio, p_mes, 1)',
+    hasta="(make_date(p_anio, p_mes, 1) + INTERVAL '1 month')::date"
+)}$$;
+
+-- Guarda en lote los last_login acumulados por la app ({{username: timestamp}})
+CREATE OR REPLACE FUNCTION touch_last_login(p_logins JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    UPDATE users u
+    SET last_login = GREATEST(u.last_login, l.value::timestamp)
+    FROM jsonb_each_text(p_logins) AS l(username, value)
+    WHERE u.username = l.username;
+$$;
+
 -- Habilitar Row Level Security (RLS) - opcional pero recomendado
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE transactions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE budgets ENABLE ROW LEVEL SECURITY;
+ALTER TABLE transaction_tombstones ENABLE ROW LEVEL SECURITY;
 """
@@ -0,0 +1,57 @@
+"""
+Medición del tiempo de arranque y de cada rerun de la app
+Se activa con la variable de entorno MISTI_TIMINGS=1
+"""
+import itertools
+import time
+from typing import Dict, Optional
+
+
+class RerunTimer:
+    """
+    Cronómetro por fases de una ejecución del script de Streamlit
+    
+    mark() registra el tiempo transcurrido desde la marca anterior con el
+    nombre de la fase que acaba de terminar. La primera ejecución del
+    proceso es el arranque en frío (incluye importar los módulos); las
+    siguientes son reruns por interacción.
+    """
+    
+    # Ejecuciones del script en este proceso (los módulos de utils no se recargan)
+    _runs = itertools.count(1)
+    
+    def __init__(self, start: Optional[float] = None):
+        """
+        Args:
+            start: time.perf_counter() al comenzar el script (por defecto ahora)
+        """
+        self.run = next(self._runs)
+        self._start = start if start is not None else time.perf_counter()
+        self._last = self._start
+        self.phases: Dict[str, float] = {}
+    
+    def mark(self, name: str):
+        """Cierra la fase actual con el nombre indicado"""
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + (now - self._last) * 1000
+        self._last = now
+    
+    @property
+    def total_ms(self) -> float:
+        """Milisegundos desde el comienzo del script hasta la última marca"""
+        return (self._last - self._start) * 1000
+    
+    def report(self) -> Dict:
+        """Tiempos de la ejecución con keys: ejecucion, arranque, total_ms, fases"""
+        return {
+            'ejecucion': self.run,
+            'arranque': self.run == 1,
+            'total_ms': self.total_ms,
+            'fases': dict(self.phases)
+        }
+    
+    def summary(self) -> str:
+        """Una línea legible con el total y el tiempo de cada fase"""
+        kind = "arranque" if self.run == 1 else f"rerun #{self.run}"
+        phases = " · ".join(f"{name} {ms:.0f}" for name, ms in self.phases.items())
+        return f"⏱️ {kind}: {self.total_ms:.0f} ms ({phases})"
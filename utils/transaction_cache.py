@@ -0,0 +1,105 @@
+"""
+Caché en memoria de transacciones por usuario
+Evita repetir la consulta a Supabase en cada rerun de Streamlit
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TransactionCache:
+    """
+    Caché read-through por usuario con TTL, versión y desalojo LRU
+    
+    Cada usuario tiene un número de versión que las escrituras incrementan.
+    Una escritura descarta lo guardado para ese usuario, y un resultado
+    leído con una versión anterior ya no se guarda, así el usuario siempre
+    ve sus propios cambios aunque una lectura lenta termine después.
+    """
+    
+    def __init__(self, ttl: float = 30.0, max_users: int = 256):
+        """
+        Inicializa la caché
+        
+        Args:
+            ttl: Segundos que una entrada se considera fresca
+            max_users: Máximo de usuarios en memoria (se desaloja el menos usado)
+        """
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries: "OrderedDict[str, Dict[Hashable, tuple]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def version(self, username: str) -> int:
+        """Devuelve la versión actual de los datos de un usuario"""
+        with self._lock:
+            return self._versions.get(username, 0)
+    
+    def get(self, username: str, key: Hashable) -> Optional[Any]:
+        """
+        Busca un resultado fresco para el usuario
+        
+        Returns:
+            El valor guardado o None si no existe, expiró o es de otra versión
+        """
+        with self._lock:
+            user_entries = self._entries.get(username)
+            entry = user_entries.get(key) if user_entries else None
+            
+            if entry is not None:
+                version, expires_at, value = entry
+                if version == self._versions.get(username, 0) and expires_at > time.monotonic():
+                    self._entries.move_to_end(username)
+                    self.hits += 1
+                    return value
+                del user_entries[key]
+            
+            self.misses += 1
+            return None
+    
+    def put(self, username: str, key: Hashable, version: int, value: Any):
+        """
+        Guarda un resultado leído con la versión indicada
+        
+        Si entre la lectura y el guardado hubo una escritura, el resultado
+        ya está desactualizado y se descarta.
+        """
+        with self._lock:
+            if version != self._versions.get(username, 0):
+                return
+            
+            self._entries.setdefault(username, {})[key] = (
+                version, time.monotonic() + self.ttl, value
+            )
+            self._entries.move_to_end(username)
+            
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, username: str) -> int:
+        """
+        Marca los datos del usuario como modificados
+        
+        Returns:
+            La nueva versión del usuario
+        """
+        with self._lock:
+            version = self._versions.get(username, 0) + 1
+            self._versions[username] = version
+            self._entries.pop(username, None)
+            return version
+    
+    def stats(self) -> Dict:
+        """Devuelve métricas de uso de la caché"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'users': len(self._entries)
+            }
@@ -0,0 +1,155 @@
+"""
+DataFrame tipado de las transacciones de un usuario y sus versiones
+La app lo guarda con st.cache_data y lo parchea tras cada escritura
+"""
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# Columnas del DataFrame de la sesión (las que faltan se agregan vacías)
+FRAME_COLUMNS = ['id', 'client_id', 'fecha', 'tipo', 'categoria', 'descripcion', 'monto', 'pendiente']
+
+
+def build_transaction_frame(transactions: List[Dict]) -> pd.DataFrame:
+    """
+    Convierte las transacciones en un DataFrame con tipos fijos
+    
+    fecha queda como datetime64, monto como float, id como entero que
+    admite nulos (las filas pendientes aún no tienen id) y tipo en
+    minúsculas, que es como lo compara el dashboard aunque Supabase lo
+    guarde como 'Gasto' / 'Ingreso'.
+    
+    Args:
+        transactions: Filas como las devuelve get_user_transactions
+    
+    Returns:
+        DataFrame ordenado por fecha (más recientes primero)
+    """
+    df = pd.DataFrame(transactions)
+    for column in FRAME_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    
+    df['id'] = pd.to_numeric(df['id'], errors='coerce').astype('Int64')
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    df['tipo'] = df['tipo'].fillna('').astype(str).str.lower()
+    df['monto'] = pd.to_numeric(df['monto'], errors='coerce').fillna(0.0).astype(float)
+    df['pendiente'] = df['pendiente'].fillna(False).astype(bool)
+    
+    return df.sort_values('fecha', ascending=False, kind='stable').reset_index(drop=True)
+
+
+class TransactionFrameVersions:
+    """
+    Versión de los datos de cada usuario y parches sobre esa versión
+    
+    Una versión base se arma descargando las transacciones; cada alta o
+    baja confirmada crea la versión siguiente como (versión anterior +
+    parche), así que tras una escritura no se vuelve a descargar nada.
+    Cuando la bandeja confirma un alta, otro parche le pone el id que
+    asignó Supabase. La base se rehace con rebase() (botón de actualizar,
+    o cuando la bandeja no pudo entregar un alta) o cuando pasan ttl
+    segundos, para ver los cambios hechos desde otro dispositivo.
+    """
+    
+    def __init__(self, ttl: float = 60.0):
+        """
+        Args:
+            ttl: Segundos que se usa una base antes de volver a descargarla
+        """
+        self.ttl = ttl
+        # Distingue estas versiones de las de un proceso anterior en la clave de st.cache_data
+        self.epoch = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        # usuario → (versión actual, versión base, momento en que se creó la base)
+        self._versions: Dict[str, Tuple[int, int, float]] = {}
+        # (usuario, versión) → parche que lleva de la versión anterior a esa
+        self._patches: Dict[Tuple[str, int], Tuple[str, object]] = {}
+    
+    def current(self, username: str) -> int:
+        """Versión a mostrar; si la base expiró, empieza una nueva"""
+        with self._lock:
+            entry = self._versions.get(username)
+            if entry is None or time.monotonic() - entry[2] > self.ttl:
+                return self._rebase(username)
+            return entry[0]
+    
+    def rebase(self, username: str) -> int:
+        """Descarta los parches: la próxima lectura vuelve a descargar los datos"""
+        with self._lock:
+            return self._rebase(username)
+    
+    def _rebase(self, username: str) -> int:
+        version = self._versions.get(username, (0, 0, 0.0))[0] + 1
+        self._versions[username] = (version, version, time.monotonic())
+        for key in [key for key in self._patches if key[0] == username]:
+            del self._patches[key]
+        return version
+    
+    def record_add(self, username: str, row: Dict) -> int:
+        """Registra una transacción nueva (aún pendiente) y devuelve la nueva versión"""
+        return self._record(username, ('add', {**row, 'pendiente': True}))
+    
+    def record_ack(self, username: str, client_id: str, transaction_id: int) -> int:
+        """Registra que Supabase guardó una fila pendiente con ese id"""
+        return self._record(username, ('ack', (client_id, int(transaction_id))))
+    
+    def record_delete(self, username: str, transaction_id: int) -> int:
+        """Registra una transacción eliminada y devuelve la nueva versión"""
+        return self._record(username, ('delete', int(transaction_id)))
+    
+    def _record(self, username: str, patch: Tuple[str, object]) -> int:
+        with self._lock:
+            entry = self._versions.get(username)
+            if entry is None:
+                # Sin base todavía: la primera lectura ya incluirá la escritura
+                return self._rebase(username)
+            version, base, loaded_at = entry
+            self._versions[username] = (version + 1, base, loaded_at)
+            self._patches[(username, version + 1)] = patch
+            return version + 1
+    
+    def patch_for(self, username: str, version: int) -> Optional[Tuple[str, object]]:
+        """Parche que crea esa versión (None si es una base y hay que descargar)"""
+        with self._lock:
+            return self._patches.get((username, version))
+    
+    @staticmethod
+    def apply(df: pd.DataFrame, patch: Tuple[str, object]) -> pd.DataFrame:
+        """
+        Aplica un parche a la versión anterior del DataFrame
+        
+        Args:
+            df: DataFrame de la versión anterior
+            patch: ('add', fila), ('ack', (client_id, id)) o ('delete', id)
+        
+        Returns:
+            DataFrame de la nueva versión
+        """
+        action, value = patch
+        if action == 'delete':
+            return df[~df['id'].eq(value).fillna(False)].reset_index(drop=True)
+        
+        if action == 'ack':
+            client_id, transaction_id = value
+            acked = (df['client_id'] == client_id).to_numpy()
+            # Sin la fila (la base se descargó después de guardarla) no hay nada que cambiar
+            if not acked.any():
+                return df
+            df = df.copy()
+            df.loc[acked, 'id'] = transaction_id
+            df.loc[acked, 'pendiente'] = False
+            return df
+        
+        # La base pudo descargarse después de encolar la fila
+        if value.get('client_id') and (df['client_id'] == value['client_id']).any():
+            return df
+        
+        added = build_transaction_frame([value])
+        if df.empty:
+            return added
+        merged = pd.concat([added, df], ignore_index=True)
+        return merged.sort_values('fecha', ascending=False, kind='stable').reset_index(drop=True)
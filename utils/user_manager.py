@@ -1,42 +1,202 @@
 """
 Módulo de gestión de usuarios para el sistema multi-usuario
 """
+import atexit
 import json
 import os
 import hashlib
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sin candado entre procesos, solo el de hilos
+    fcntl = None
+
+from .login_tracker import LastLoginTracker
 
 
 class UserManager:
     """
     Clase para gestionar usuarios y autenticación
+    
+    Los usuarios viven en memoria en un dict username → registro. En disco
+    hay una foto completa (users.json) y un registro de cambios que solo
+    crece (users.log, una línea JSON por cambio). Cada escritura agrega una
+    línea al registro; cada compact_every cambios se reescribe la foto de
+    forma atómica y se vacía el registro. Si otro proceso modifica los
+    archivos, se detecta por fecha de modificación y se vuelve a cargar.
+    Agregar y compactar se hacen con un candado de archivo (users.lock),
+    así ningún proceso pierde un cambio escrito por otro al mismo tiempo.
     """
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", compact_every: int = 200,
+                 last_login_delay: float = 30.0):
         """
         Inicializa el gestor de usuarios
         
         Args:
             data_dir: Directorio donde se almacenarán los datos
+            compact_every: Cambios en el registro antes de reescribir la foto
+            last_login_delay: Segundos máximos que last_login tarda en guardarse
         """
         self.data_dir = data_dir
         self.users_file = os.path.join(data_dir, "users.json")
+        self.log_file = os.path.join(data_dir, "users.log")
+        self.lock_file = os.path.join(data_dir, "users.lock")
+        self.compact_every = compact_every
+        
+        self._users: Dict[str, Dict] = {}
+        self._log_entries = 0
+        self._signature: Optional[Tuple] = None
+        self._lock = threading.RLock()
+        self.last_login = LastLoginTracker(self._save_last_logins, max_delay=last_login_delay)
+        atexit.register(self.last_login.close)
         
         # Crear directorio si no existe
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
         
-        # Crear archivo de usuarios si no existe
-        if not os.path.exists(self.users_file):
-            self._create_users_file()
+        # Crear archivo de usuarios si no existe (varios procesos pueden arrancar a la vez)
+        with self._file_lock():
+            if not os.path.exists(self.users_file):
+                self._create_users_file()
+        
+        self._refresh()
     
     def _create_users_file(self):
         """
         Crea un archivo JSON vacío para usuarios
         """
-        with open(self.users_file, 'w', encoding='utf-8') as f:
-            json.dump({"users": []}, f, indent=4)
+        self._write_atomic(self.users_file, json.dumps({"users": []}, indent=4))
+    
+    # ==================== ALMACENAMIENTO ====================
+    
+    def _write_atomic(self, path: str, content: str):
+        """Escribe un archivo completo y lo reemplaza de una sola vez"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    @contextmanager
+    def _file_lock(self):
+        """Candado entre hilos y entre procesos para modificar la foto y el registro"""
+        with self._lock:
+            with open(self.lock_file, 'a') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+    
+    def _file_signature(self) -> Tuple:
+        """Fecha de modificación y tamaño de la foto y del registro"""
+        signature = []
+        for path in (self.users_file, self.log_file):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def _refresh(self):
+        """Recarga los usuarios si los archivos cambiaron desde la última lectura"""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        
+        users: Dict[str, Dict] = {}
+        if os.path.exists(self.users_file):
+            with open(self.users_file, 'r', encoding='utf-8') as f:
+                for user in json.load(f)['users']:
+                    users[user['username']] = user
+        
+        entries = 0
+        if os.path.exists(self.log_file):
+            with open(self.log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        # Línea cortada por una escritura interrumpida
+                        continue
+                    self._apply(users, change)
+                    entries += 1
+        
+        self._users = users
+        self._log_entries = entries
+        self._signature = signature
+    
+    @staticmethod
+    def _apply(users: Dict[str, Dict], change: Dict):
+        """Aplica un cambio del registro al dict de usuarios"""
+        if change['op'] == 'put':
+            users[change['user']['username']] = change['user']
+        elif change['op'] == 'update':
+            if change['username'] in users:
+                users[change['username']] = {**users[change['username']], **change['fields']}
+        elif change['op'] == 'delete':
+            users.pop(change['username'], None)
+        elif change['op'] == 'logins':
+            for username, when in change['last_login'].items():
+                if username in users:
+                    users[username] = {**users[username], 'last_login': when}
+    
+    def _append(self, change: Dict):
+        """Registra un cambio en disco y en memoria"""
+        with self._file_lock():
+            self._refresh()
+            
+            line = (json.dumps(change, ensure_ascii=False) + "\n").encode('utf-8')
+            size_before = self._signature[1][1] if self._signature[1] else 0
+            with open(self.log_file, 'a+b') as f:
+                # Una escritura cortada deja la última línea sin "\n": se cierra
+                # antes de agregar, si no este cambio quedaría pegado a ella
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        line = b"\n" + line
+                f.write(line)
+            
+            self._apply(self._users, change)
+            self._log_entries += 1
+            
+            # Si otro proceso escribió en medio, la próxima lectura recarga todo
+            signature = self._file_signature()
+            self._signature = signature if signature[1][1] == size_before + len(line) else None
+            
+            if self._log_entries >= self.compact_every:
+                self._compact()
+    
+    def _save_last_logins(self, logins: Dict[str, str]):
+        """Guarda un lote de last_login como una sola línea del registro"""
+        self._append({'op': 'logins', 'last_login': logins})
+    
+    def compact(self):
+        """Reescribe users.json con el estado actual y vacía el registro de cambios"""
+        with self._file_lock():
+            self._compact()
+    
+    def _compact(self):
+        """compact() con el candado de archivo ya tomado"""
+        self._refresh()
+        data = {"users": list(self._users.values())}
+        self._write_atomic(self.users_file, json.dumps(data, indent=4, ensure_ascii=False))
+        # Si se corta aquí, el registro se vuelve a aplicar sobre la foto nueva sin efecto
+        self._write_atomic(self.log_file, "")
+        self._log_entries = 0
+        self._signature = self._file_signature()
+    
+    # ==================== USUARIOS ====================
     
     def _hash_password(self, password: str) -> str:
         """Hashea una contraseña usando SHA-256"""
@@ -71,17 +231,6 @@ class UserManager:
         
         username = username.strip().lower()
         
-        # Verificar si el usuario ya existe
-        if self.user_exists(username):
-            return {
-                'success': False,
-                'message': f'El usuario "{username}" ya está registrado'
-            }
-        
-        # Cargar usuarios existentes
-        with open(self.users_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
         # Crear nuevo usuario
         new_user = {
             'username': username,
@@ -92,12 +241,16 @@ class UserManager:
             'last_login': None
         }
         
-        # Agregar usuario
-        data['users'].append(new_user)
-        
-        # Guardar
-        with open(self.users_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        with self._lock:
+            # Verificar si el usuario ya existe
+            if self.user_exists(username):
+                return {
+                    'success': False,
+                    'message': f'El usuario "{username}" ya está registrado'
+                }
+            
+            # Agregar usuario
+            self._append({'op': 'put', 'user': new_user})
         
         # No devolver el hash de la contraseña
         user_info = {k: v for k, v in new_user.items() if k != 'password_hash'}
@@ -119,13 +272,9 @@ class UserManager:
         """
         username = username.strip().lower()
         
-        if not os.path.exists(self.users_file):
-            return False
-        
-        with open(self.users_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        return any(user['username'] == username for user in data['users'])
+        with self._lock:
+            self._refresh()
+            return username in self._users
     
     def get_user(self, username: str) -> Optional[Dict]:
         """
@@ -139,17 +288,17 @@ class UserManager:
         """
         username = username.strip().lower()
         
-        if not os.path.exists(self.users_file):
-            return None
-        
-        with open(self.users_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        for user in data['users']:
-            if user['username'] == username:
-                return user
-        
-        return None
+        with self._lock:
+            self._refresh()
+            user = self._users.get(username)
+            if not user:
+                return None
+            
+            user = dict(user)
+            pending = self.last_login.pending(username)
+            if pending:
+                user['last_login'] = pending
+            return user
     
     def login_user(self, username: str, password: str = "") -> Dict[str, any]:
         """
@@ -188,17 +337,8 @@ class UserManager:
                     'message': '❌ Contraseña incorrecta'
                 }
         
-        # Actualizar última fecha de login
-        with open(self.users_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        for u in data['users']:
-            if u['username'] == username:
-                u['last_login'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                break
-        
-        with open(self.users_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        # Actualizar última fecha de login (se guarda en el próximo lote)
+        self.last_login.touch(username, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
         
         # No devolver el hash de la contraseña
         user_info = {k: v for k, v in user.items() if k != 'password_hash'}
@@ -216,13 +356,9 @@ class UserManager:
         Returns:
             Lista de diccionarios con información de usuarios
         """
-        if not os.path.exists(self.users_file):
-            return []
-        
-        with open(self.users_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        return data['users']
+        with self._lock:
+            self._refresh()
+            return [dict(user) for user in self._users.values()]
     
     def delete_user(self, username: str) -> Dict[str, any]:
         """
@@ -236,22 +372,14 @@ class UserManager:
         """
         username = username.strip().lower()
         
-        if not self.user_exists(username):
-            return {
-                'success': False,
-                'message': f'El usuario "{username}" no existe'
-            }
-        
-        # Cargar usuarios
-        with open(self.users_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Filtrar usuario
-        data['users'] = [u for u in data['users'] if u['username'] != username]
-        
-        # Guardar
-        with open(self.users_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        with self._lock:
+            if not self.user_exists(username):
+                return {
+                    'success': False,
+                    'message': f'El usuario "{username}" no existe'
+                }
+            
+            self._append({'op': 'delete', 'username': username})
         
         return {
             'success': True,